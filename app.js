@@ -126,15 +126,20 @@ let selectedEnemyBotId = 0;
 let championOptionsAll = [];
 let supportOptionsAll = [];
 let botOptionsAll = [];
+let catalogVersion = "";
 let matchupRunesCache = {};
 let matrixRainController = null;
 let currentMatchLimit = 15;
+let matchesCursor = "";
+let shownMatchCount = 0;
+let lastStatsPayload = null;
 let activeProfileTab = "summary";
 let dashboardHasData = false;
 
 const MATCH_LIMIT_INITIAL = 15;
 const MATCH_LIMIT_STEP = 10;
-const MATCH_LIMIT_MAX = 50;
+// A 503 asking to come back within this many seconds is retried once automatically.
+const BUSY_RETRY_MAX_SECONDS = 10;
 
 function safeNum(value) {
   const n = Number(value);
@@ -714,9 +719,6 @@ function findChampionOptionInPayload(payload, championId) {
   const targetId = safeNum(championId);
   const matchup = payload?.karmaMatchup || {};
   const pools = [
-    matchup.championOptions,
-    matchup.supportChampionOptions,
-    matchup.botChampionOptions,
     championOptionsAll,
     supportOptionsAll,
     botOptionsAll,
@@ -766,12 +768,50 @@ function renderMatchupFilters() {
   renderChampionSelect(enemyBotSelectEl, botOptions, selectedEnemyBotId, "Select enemy bot carry");
 }
 
-function renderDashboard(payload) {
+function matchCardHtml(match, payload) {
+  const win = match.result === "Win";
+  const role = String(match.role || "UNKNOWN").replace("UTILITY", "SUPPORT");
+  const kda = `${safeNum(match.kills)} / ${safeNum(match.deaths)} / ${safeNum(match.assists)}`;
+  const championOption = findChampionOptionInPayload(payload, match.championId);
+  const championName = championOption?.name || match.champion || "Unknown";
+  const championImage = championOption?.icon
+    ? `<img class="match-champion-img" src="${championOption.icon}" alt="${championName}" loading="lazy">`
+    : `<span class="match-champion-fallback">${String(championName).charAt(0) || "?"}</span>`;
+  return (
+    `<article class="match-card ${win ? "win" : "loss"}">` +
+    `<div class="match-result-bar"></div>` +
+    `<div class="match-champion">${championImage}</div>` +
+    `<div class="match-main">` +
+    `<strong>${championName}</strong>` +
+    `<span>${role} - ${safeNum(match.durationMin).toFixed(1)}m</span>` +
+    `<span class="match-result">${win ? "Victory" : "Defeat"}</span>` +
+    `</div>` +
+    `<div class="match-stat match-kda">` +
+    `<strong>${kda}</strong>` +
+    `<span>KDA ${safeNum(match.killParticipation).toFixed(1)}% KP</span>` +
+    `</div>` +
+    `<div class="match-stat optional"><strong>${safeNum(match.cs)}</strong><span>CS</span></div>` +
+    `<div class="match-stat optional"><strong>${safeNum(match.visionScore)}</strong><span>Vision</span></div>` +
+    `<div class="match-stat optional"><strong>${safeNum(match.controlWards)}</strong><span>Control</span></div>` +
+    `<div class="match-stat optional"><strong>${safeNum(match.gold).toLocaleString()}</strong><span>Gold</span></div>` +
+    `</article>`
+  );
+}
+
+function updateLoadMoreButton(hasMore) {
+  if (!loadMoreMatchesBtnEl) {
+    return;
+  }
+  loadMoreMatchesBtnEl.hidden = !hasMore;
+  loadMoreMatchesBtnEl.disabled = false;
+  loadMoreMatchesBtnEl.textContent = hasMore
+    ? `Load more matches (${shownMatchCount} shown)`
+    : "All available matches loaded";
+}
+
+function renderProfile(payload) {
   const player = payload.player || {};
   const rankedSolo = player.rankedSolo || {};
-  const aggregate = payload.aggregate || {};
-  const support = payload.supportInsights || {};
-  const matches = Array.isArray(payload.recentMatches) ? payload.recentMatches : [];
   const ddragonVersion = payload.ddragonVersion || "";
   const profileIconId = safeNum(player.profileIconId);
 
@@ -806,7 +846,22 @@ function renderDashboard(payload) {
       ? `${safeNum(rankedSolo.leaguePoints)} LP - ${safeNum(rankedSolo.wins)}W ${safeNum(rankedSolo.losses)}L`
       : "Ranked Solo/Duo"
   );
+}
+
+function showDashboard() {
+  if (dashboardEl) {
+    dashboardHasData = true;
+    dashboardEl.classList.remove("hidden");
+    setActiveProfileTab(activeProfileTab);
+  }
+}
+
+function renderDashboard(payload) {
+  const aggregate = payload.aggregate || {};
+  const support = payload.supportInsights || {};
+  const matches = Array.isArray(payload.recentMatches) ? payload.recentMatches : [];
 
+  renderProfile(payload);
   setText(gamesMetricEl, safeNum(aggregate.games));
   setText(winRateMetricEl, `${safeNum(aggregate.winRate).toFixed(1)}%`);
   setText(kdaMetricEl, safeNum(aggregate.avgKda).toFixed(2));
@@ -818,70 +873,19 @@ function renderDashboard(payload) {
   setText(supportKpMetricEl, `${safeNum(support.avgKillParticipation).toFixed(1)}%`);
   setText(supportUtilityMetricEl, safeNum(support.avgAllyUtility).toLocaleString());
 
+  matchesCursor = matches.length ? String(matches[matches.length - 1].matchId || "") : "";
+  shownMatchCount = matches.length;
   if (!matches.length) {
     setHtml(matchesBodyEl, `<div class="empty-row">No recent matches found.</div>`);
   } else {
-    setHtml(
-      matchesBodyEl,
-      matches
-      .map((match) => {
-        const win = match.result === "Win";
-        const role = String(match.role || "UNKNOWN").replace("UTILITY", "SUPPORT");
-        const kda = `${safeNum(match.kills)} / ${safeNum(match.deaths)} / ${safeNum(match.assists)}`;
-        const championOption = findChampionOptionInPayload(payload, match.championId);
-        const championName = championOption?.name || match.champion || "Unknown";
-        const championImage = championOption?.icon
-          ? `<img class="match-champion-img" src="${championOption.icon}" alt="${championName}" loading="lazy">`
-          : `<span class="match-champion-fallback">${String(championName).charAt(0) || "?"}</span>`;
-        return (
-          `<article class="match-card ${win ? "win" : "loss"}">` +
-          `<div class="match-result-bar"></div>` +
-          `<div class="match-champion">${championImage}</div>` +
-          `<div class="match-main">` +
-          `<strong>${championName}</strong>` +
-          `<span>${role} - ${safeNum(match.durationMin).toFixed(1)}m</span>` +
-          `<span class="match-result">${win ? "Victory" : "Defeat"}</span>` +
-          `</div>` +
-          `<div class="match-stat match-kda">` +
-          `<strong>${kda}</strong>` +
-          `<span>KDA ${safeNum(match.killParticipation).toFixed(1)}% KP</span>` +
-          `</div>` +
-          `<div class="match-stat optional"><strong>${safeNum(match.cs)}</strong><span>CS</span></div>` +
-          `<div class="match-stat optional"><strong>${safeNum(match.visionScore)}</strong><span>Vision</span></div>` +
-          `<div class="match-stat optional"><strong>${safeNum(match.controlWards)}</strong><span>Control</span></div>` +
-          `<div class="match-stat optional"><strong>${safeNum(match.gold).toLocaleString()}</strong><span>Gold</span></div>` +
-          `</article>`
-        );
-      })
-      .join("")
-    );
-  }
-
-  if (loadMoreMatchesBtnEl) {
-    const reachedEnd = matches.length < currentMatchLimit || matches.length >= MATCH_LIMIT_MAX;
-    loadMoreMatchesBtnEl.hidden = reachedEnd;
-    loadMoreMatchesBtnEl.disabled = false;
-    loadMoreMatchesBtnEl.textContent = reachedEnd
-      ? "All available matches loaded"
-      : `Load more matches (${matches.length}/${MATCH_LIMIT_MAX})`;
-  }
-
-  if (dashboardEl) {
-    dashboardHasData = true;
-    dashboardEl.classList.remove("hidden");
-    setActiveProfileTab(activeProfileTab);
+    setHtml(matchesBodyEl, matches.map((match) => matchCardHtml(match, payload)).join(""));
   }
+  updateLoadMoreButton(matches.length >= currentMatchLimit);
+  showDashboard();
 }
 
 function renderHighEloMatchup(payload) {
   const data = payload.karmaMatchup || {};
-  championOptionsAll = Array.isArray(data.championOptions) ? data.championOptions : [];
-  supportOptionsAll = Array.isArray(data.supportChampionOptions)
-    ? data.supportChampionOptions
-    : (Array.isArray(data.championOptions) ? data.championOptions : []);
-  botOptionsAll = Array.isArray(data.botChampionOptions)
-    ? data.botChampionOptions
-    : (Array.isArray(data.championOptions) ? data.championOptions : []);
 
   selectedEnemySupportId = selectedEnemySupportId || safeNum(data.selectedEnemySupportId);
   selectedEnemyBotId = selectedEnemyBotId || safeNum(data.selectedEnemyBotId);
@@ -1117,6 +1121,7 @@ function renderHighEloMatchup(payload) {
 function renderKarmaInsights(payload) {
   const insights = payload.karmaInsights || {};
   const lane = insights.lanePhase || {};
+  const laneCoverage = lane.coverage || {};
   const score = insights.improvementScore || {};
   const matchups = Array.isArray(insights.matchups) ? insights.matchups : [];
   const focus = Array.isArray(score.focusTargets) ? score.focusTargets : [];
@@ -1124,7 +1129,9 @@ function renderKarmaInsights(payload) {
   setHtml(
     improvementScoreEl,
     `<div class="score-main">${safeNum(score.score)} <small>${score.grade || "-"}</small></div>` +
-    `<div class="score-sub">Your support impact score. Push this up by closing the target gaps below.</div>`
+    `<div class="score-sub">Your support impact score. Push this up by closing the target gaps below.` +
+    (score.benchmarkSource ? " Gaps are percentile-ranked against benchmark Karma games." : "") +
+    "</div>"
   );
   setHtml(
     focusTargetsEl,
@@ -1139,7 +1146,12 @@ function renderKarmaInsights(payload) {
     line("XP Diff @14", safeNum(lane.avgXpDiff14).toFixed(1)) +
     line("Assists before 14", safeNum(lane.avgAssistsBefore14).toFixed(2)) +
     line("Deaths before 14", safeNum(lane.avgDeathsBefore14).toFixed(2)) +
-    line("First death minute", safeNum(lane.avgFirstDeathMin).toFixed(2))
+    line("First death minute", safeNum(lane.avgFirstDeathMin).toFixed(2)) +
+    line(
+      "Timeline coverage",
+      `${safeNum(laneCoverage.games)}/${safeNum(laneCoverage.total)} games` +
+      (safeNum(laneCoverage.pending) > 0 ? ` (${safeNum(laneCoverage.pending)} loading)` : "")
+    )
   );
 
   if (!matchups.length) {
@@ -1164,7 +1176,7 @@ function renderKarmaInsights(payload) {
   }
 }
 
-async function fetchStats() {
+function buildPlayerQuery() {
   const query = new URLSearchParams();
   query.set("game_name", gameNameInputEl?.value?.trim() || "feelsbanman");
   query.set("tag_line", tagLineInputEl?.value?.trim() || "EUW");
@@ -1173,15 +1185,22 @@ async function fetchStats() {
   if (includeTimelineMode) {
     query.set("timeline", "1");
   }
-
   if (selectedEnemySupportId > 0) {
     query.set("enemy_support_id", String(selectedEnemySupportId));
   }
   if (selectedEnemyBotId > 0) {
     query.set("enemy_bot_id", String(selectedEnemyBotId));
   }
+  return query;
+}
 
-  const response = await fetch(`/api/stats?${query.toString()}`, { cache: "no-store" });
+async function fetchApiJson(path, query, retryWhenBusy = true) {
+  const response = await fetch(`${path}?${query.toString()}`, { cache: "no-cache" });
+  const retryAfter = Number(response.headers.get("Retry-After")) || 0;
+  if (response.status === 503 && retryWhenBusy && retryAfter > 0 && retryAfter <= BUSY_RETRY_MAX_SECONDS) {
+    await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+    return fetchApiJson(path, query, false);
+  }
 
   let payload = {};
   try {
@@ -1191,14 +1210,142 @@ async function fetchStats() {
   }
 
   if (!response.ok) {
-    const reason = payload.error || `Request failed with ${response.status}`;
-    const endpoint = payload.endpoint ? ` Endpoint: ${payload.endpoint}.` : "";
-    const detail = payload.detail ? ` ${String(payload.detail).slice(0, 140)}` : "";
-    throw new Error(`${reason}${endpoint}${detail}`.trim());
+    throw new Error(apiErrorMessage(payload, `Request failed with ${response.status}`));
   }
   return payload;
 }
 
+function apiErrorMessage(payload, fallback) {
+  const reason = payload.error || fallback;
+  const endpoint = payload.endpoint ? ` Endpoint: ${payload.endpoint}.` : "";
+  const detail = payload.detail ? ` ${String(payload.detail).slice(0, 140)}` : "";
+  return `${reason}${endpoint}${detail}`.trim();
+}
+
+function parseEventData(event) {
+  try {
+    return JSON.parse(event.data) || {};
+  } catch {
+    return {};
+  }
+}
+
+function streamStats(onSection) {
+  if (typeof EventSource === "undefined") {
+    return fetchStats();
+  }
+  return new Promise((resolve, reject) => {
+    const payload = {};
+    let received = false;
+    const source = new EventSource(`/api/stats/stream?${buildPlayerQuery().toString()}`);
+    for (const section of ["player", "matches", "insights", "matchup"]) {
+      source.addEventListener(section, (event) => {
+        received = true;
+        Object.assign(payload, parseEventData(event));
+        onSection(section, payload);
+      });
+    }
+    source.addEventListener("done", () => {
+      source.close();
+      resolve(payload);
+    });
+    source.addEventListener("failed", (event) => {
+      source.close();
+      const failure = parseEventData(event);
+      if (failure.retryAfter && !received) {
+        // Shed under load; the plain endpoint waits out Retry-After and tries again.
+        fetchStats().then(resolve, reject);
+        return;
+      }
+      reject(new Error(apiErrorMessage(failure, "Failed to load stats.")));
+    });
+    source.onerror = () => {
+      // EventSource reconnects on its own, which would rerun the whole summary.
+      source.close();
+      if (received) {
+        reject(new Error("Stats stream was interrupted."));
+      } else {
+        fetchStats().then(resolve, reject);
+      }
+    };
+  });
+}
+
+async function ensureCatalog(version) {
+  if (!version || version === catalogVersion) {
+    return;
+  }
+  try {
+    const response = await fetch(`/api/catalog?v=${encodeURIComponent(version)}`);
+    if (!response.ok) {
+      return;
+    }
+    const catalog = await response.json();
+    championOptionsAll = Array.isArray(catalog.champions) ? catalog.champions : [];
+    supportOptionsAll = championOptionsAll;
+    botOptionsAll = championOptionsAll;
+    catalogVersion = String(catalog.version || version);
+  } catch {
+    // Keep the previous catalog; the matchup still renders names from its own payload.
+  }
+}
+
+async function fetchStats() {
+  return fetchApiJson("/api/stats", buildPlayerQuery());
+}
+
+async function loadMoreMatches() {
+  const puuid = lastStatsPayload?.player?.puuid;
+  if (!puuid || !loadMoreMatchesBtnEl) {
+    return;
+  }
+  loadMoreMatchesBtnEl.disabled = true;
+  const query = buildPlayerQuery();
+  query.set("cursor", matchesCursor);
+  query.set("limit", String(MATCH_LIMIT_STEP));
+
+  try {
+    const page = await fetchApiJson("/api/matches", query);
+    const rows = Array.isArray(page.matches) ? page.matches : [];
+    if (rows.length) {
+      if (!shownMatchCount) {
+        setHtml(matchesBodyEl, "");
+      }
+      matchesBodyEl?.insertAdjacentHTML(
+        "beforeend",
+        rows.map((match) => matchCardHtml(match, lastStatsPayload)).join("")
+      );
+    }
+    shownMatchCount += rows.length;
+    matchesCursor = page.nextCursor || matchesCursor;
+    updateLoadMoreButton(Boolean(page.hasMore));
+  } catch (error) {
+    setStatus(error.message || "Failed to load more matches.");
+    loadMoreMatchesBtnEl.disabled = false;
+  }
+}
+
+async function refreshMatchup() {
+  if (enemySupportSelectEl) {
+    enemySupportSelectEl.disabled = true;
+  }
+  if (enemyBotSelectEl) {
+    enemyBotSelectEl.disabled = true;
+  }
+  setMatchupStatus("Loading Diamond+ matchup recommendations...");
+
+  try {
+    const payload = await fetchApiJson("/api/matchup", buildPlayerQuery());
+    await ensureCatalog(payload.karmaMatchup?.catalogVersion);
+    selectedEnemySupportId = safeNum(payload.karmaMatchup?.selectedEnemySupportId);
+    selectedEnemyBotId = safeNum(payload.karmaMatchup?.selectedEnemyBotId);
+    renderHighEloMatchup(payload);
+  } catch (error) {
+    setMatchupStatus(error.message || "Matchup model unavailable.");
+    renderMatchupFilters();
+  }
+}
+
 async function refreshStats() {
   if (searchBtnEl) {
     searchBtnEl.disabled = true;
@@ -1221,10 +1368,23 @@ async function refreshStats() {
   setMatchupStatus("Loading Diamond+ matchup recommendations...");
 
   try {
-    const payload = await fetchStats();
+    const payload = await streamStats((section, partial) => {
+      if (section === "player") {
+        renderProfile(partial);
+        showDashboard();
+        setStatus(`Loading matches for ${gameName}#${tagLine} on ${platform}...`);
+      } else if (section === "matches") {
+        lastStatsPayload = partial;
+        renderDashboard(partial);
+      } else if (section === "insights") {
+        renderKarmaInsights(partial);
+      }
+    });
+    await ensureCatalog(payload.karmaMatchup?.catalogVersion);
     selectedEnemySupportId = safeNum(payload.karmaMatchup?.selectedEnemySupportId);
     selectedEnemyBotId = safeNum(payload.karmaMatchup?.selectedEnemyBotId);
 
+    lastStatsPayload = payload;
     renderDashboard(payload);
     renderHighEloMatchup(payload);
     renderKarmaInsights(payload);
@@ -1268,14 +1428,14 @@ if (enemyBotSearchEl) {
 if (enemySupportSelectEl) {
   enemySupportSelectEl.addEventListener("change", async () => {
     selectedEnemySupportId = safeNum(enemySupportSelectEl.value);
-    await refreshStats();
+    await refreshMatchup();
   });
 }
 
 if (enemyBotSelectEl) {
   enemyBotSelectEl.addEventListener("change", async () => {
     selectedEnemyBotId = safeNum(enemyBotSelectEl.value);
-    await refreshStats();
+    await refreshMatchup();
   });
 }
 
@@ -1311,8 +1471,7 @@ if (searchFormEl) {
 
 if (loadMoreMatchesBtnEl) {
   loadMoreMatchesBtnEl.addEventListener("click", async () => {
-    currentMatchLimit = Math.min(MATCH_LIMIT_MAX, currentMatchLimit + MATCH_LIMIT_STEP);
-    await refreshStats();
+    await loadMoreMatches();
   });
 }
 
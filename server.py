@@ -1,20 +1,45 @@
+import asyncio
+import bisect
+import codecs
+import gzip
+import hashlib
+import http.client
+import io
+import itertools
 import json
 import os
+import queue
+import re
+import socket
+import sqlite3
+import ssl
+import threading
 import time
+import traceback
 import urllib.error
 import urllib.parse
-import urllib.request
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from collections import Counter
+import zlib
+from array import array
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from http import HTTPStatus
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any
+from typing import Any, NamedTuple
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional; PlayerGameColumns falls back to plain loops over the arrays.
+    np = None
 
 
 HOST = "0.0.0.0"
 PORT = int(os.environ.get("PORT", "8090"))
 BASE_DIR = Path(__file__).resolve().parent
+DATA_DIR = Path(os.environ.get("DATA_DIR", str(BASE_DIR / "data"))).resolve()
+MATCH_STORE_PATH = DATA_DIR / "matches.sqlite3"
+STATIC_REF_DIR = DATA_DIR / "ddragon"
 PLATFORM_FIXED = "euw1"
 LOCKED_GAME_NAME = "feelsbanman"
 LOCKED_TAG_LINE = "EUW"
@@ -25,15 +50,150 @@ KARMA_SETUP_MATCH_COUNT = 15
 MATCHUP_SETUP_MATCH_COUNT = 60
 MATCHUP_PAGE_SIZE = 10
 MATCHUP_PLAYER_TYPE = "all"
+# Matchup pages kept in flight ahead of the page currently being read.
+MATCHUP_PREFETCH_PAGES = 3
+MATCH_PAGE_SIZE_DEFAULT = 10
+# /api/stats/stream event names and the summary fields each carries, in emit order.
+SUMMARY_STREAM_SECTIONS = (
+    ("player", ("player",)),
+    ("matches", ("recentMatches", "aggregate", "supportInsights")),
+    ("insights", ("karmaInsights",)),
+    ("matchup", ("karmaMatchup",)),
+)
+MATCH_PAGE_SIZE_MAX = 20
+# Riot PUUIDs are 78 URL-safe base64 characters; allow some slack but nothing path-like.
+PUUID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,100}")
+MATCH_ID_PATTERN = re.compile(r"[A-Z0-9]{2,8}_[0-9]{1,20}")
 DEEPL0L_API_BASE = "https://b2c-api-cdn.deeplol.gg"
 STATIC_CACHE_SECONDS = 6 * 60 * 60
+# After a failed Data Dragon refresh, keep serving the loaded patch this long before trying again.
+STATIC_RETRY_SECONDS = 10 * 60
 DEEPL0L_CACHE_SECONDS = 5 * 60
+# An OTP's build moves far slower than the ladder; entries past this are revalidated, not refetched.
+DEEPL0L_BUILD_CACHE_SECONDS = 6 * 60 * 60
+DEEPL0L_BUILD_STALE_SECONDS = 24 * 60 * 60
 PLAYER_SUMMARY_CACHE_SECONDS = 45
+# Expired summaries are still served for this long while one background refresh rebuilds them.
+PLAYER_SUMMARY_STALE_SECONDS = 10 * 60
 try:
     RIOT_PARALLEL_WORKERS = max(2, int(os.environ.get("RIOT_FETCH_WORKERS", "6")))
 except ValueError:
     RIOT_PARALLEL_WORKERS = 6
+# Development keys start at 20 req/1s and 100 req/2min; Riot's response headers override this.
+RIOT_APP_RATE_LIMIT_DEFAULT = os.environ.get("RIOT_APP_RATE_LIMIT", "20:1,100:120")
+RIOT_RATE_LIMIT_MAX_WAIT_SECONDS = 15.0
+RIOT_MAX_ATTEMPTS = 3
+try:
+    HTTP_POOL_MAX_PER_HOST = max(1, int(os.environ.get("HTTP_POOL_MAX_PER_HOST", "8")))
+except ValueError:
+    HTTP_POOL_MAX_PER_HOST = 8
+HTTP_POOL_IDLE_SECONDS = 45
+HTTP_READ_CHUNK_BYTES = 64 * 1024
+# "threads" gives every connection its own thread; "asyncio" multiplexes connections and upstream
+# fetches on one event loop and runs the blocking pipelines on a bounded executor.
+SERVER_RUNTIMES = ("threads", "asyncio")
+SERVER_RUNTIME = os.environ.get("SERVER_RUNTIME", "threads").strip().lower()
+if SERVER_RUNTIME not in SERVER_RUNTIMES:
+    SERVER_RUNTIME = "threads"
+try:
+    ASYNC_PIPELINE_WORKERS = max(1, int(os.environ.get("ASYNC_PIPELINE_WORKERS", "16")))
+except ValueError:
+    ASYNC_PIPELINE_WORKERS = 16
+try:
+    ASYNC_UPSTREAM_CONCURRENCY = max(1, int(os.environ.get("ASYNC_UPSTREAM_CONCURRENCY", "64")))
+except ValueError:
+    ASYNC_UPSTREAM_CONCURRENCY = 64
+# Idle keep-alive connections are dropped after this long, on either runtime.
+KEEPALIVE_IDLE_SECONDS = 30
+# Every route is a GET; anything bigger than this is not a request the asyncio runtime will buffer.
+ASYNC_MAX_REQUEST_BODY_BYTES = 64 * 1024
+# Admission control. Cache-miss pipelines (summary builds, debug runs, match pages) run at most
+# PIPELINE_MAX_INFLIGHT at a time with PIPELINE_QUEUE_MAX more waiting; cache hits never queue.
+# Keep inflight + queue below ASYNC_PIPELINE_WORKERS so the asyncio runtime always has threads for hits.
+try:
+    PIPELINE_MAX_INFLIGHT = max(1, int(os.environ.get("PIPELINE_MAX_INFLIGHT", "4")))
+except ValueError:
+    PIPELINE_MAX_INFLIGHT = 4
+try:
+    PIPELINE_QUEUE_MAX = max(0, int(os.environ.get("PIPELINE_QUEUE_MAX", "8")))
+except ValueError:
+    PIPELINE_QUEUE_MAX = 8
+PIPELINE_QUEUE_WAIT_SECONDS = 10.0
+# Connection threads on the threaded runtime only (idle keep-alive ones are reclaimed first); the asyncio
+# runtime caps requests waiting for an executor thread with ASYNC_REQUEST_QUEUE_MAX instead.
+try:
+    HTTP_MAX_CONNECTIONS = max(1, int(os.environ.get("HTTP_MAX_CONNECTIONS", "128")))
+except ValueError:
+    HTTP_MAX_CONNECTIONS = 128
+try:
+    ASYNC_REQUEST_QUEUE_MAX = max(0, int(os.environ.get("ASYNC_REQUEST_QUEUE_MAX", "256")))
+except ValueError:
+    ASYNC_REQUEST_QUEUE_MAX = 256
+BUSY_RETRY_AFTER_SECONDS = 5
+# Lower numbers are dequeued first by the shared fetch scheduler.
+FETCH_PRIORITY_ACCOUNT = 0
+FETCH_PRIORITY_MATCH = 1
+FETCH_PRIORITY_TIMELINE = 2
+FETCH_PRIORITY_DEEPL0L = 3
+FETCH_PRIORITY_BACKFILL = 4
+RIOT_ENDPOINT_PRIORITY = {
+    "match_detail": FETCH_PRIORITY_MATCH,
+    "match_timeline": FETCH_PRIORITY_TIMELINE,
+}
+# JSON responses smaller than this are sent as-is; compressing them costs more than it saves.
+JSON_COMPRESS_MIN_BYTES = 1024
+JSON_COMPRESS_LEVEL = 6
+# /api/catalog?v=<patch> and content-hashed static files never change, so browsers may keep them indefinitely.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Front-end files kept in memory; index.html is rewritten to point at content-hashed copies of the rest.
+STATIC_INDEX_FILE = "index.html"
+STATIC_FINGERPRINTED_FILES = ("app.js", "styles.css")
+STATIC_CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+}
+STATIC_ASSET_REF_PATTERN = re.compile(r'\b(href|src)="([\w.-]+)(?:\?[^"]*)?"')
+HISTORY_BACKFILL_ENABLED = os.environ.get("HISTORY_BACKFILL_ENABLED", "1").strip() != "0"
+try:
+    HISTORY_BACKFILL_MAX_GAMES = max(0, int(os.environ.get("HISTORY_BACKFILL_MAX_GAMES", "1000")))
+except ValueError:
+    HISTORY_BACKFILL_MAX_GAMES = 1000
+HISTORY_BACKFILL_PAGE_SIZE = 100
+# Backfill downloads in small batches with a pause so live requests keep most of the rate limit.
+HISTORY_BACKFILL_BATCH_SIZE = 10
+HISTORY_BACKFILL_PAUSE_SECONDS = 2.0
+# The backfill only sends while at least this share of every Riot rate-limit bucket is unused.
+HISTORY_BACKFILL_MIN_HEADROOM = 0.5
+HISTORY_MATCHUP_ROWS = 15
+LANE_BENCHMARK_ENABLED = os.environ.get("LANE_BENCHMARK_ENABLED", "1").strip() != "0"
+# Optional JSON file of per-game rows (keys from BENCHMARK_METRICS) used instead of KR OTP games.
+LANE_BENCHMARK_DATASET = os.environ.get("LANE_BENCHMARK_DATASET", "").strip()
+LANE_BENCHMARK_PATH = DATA_DIR / "lane_benchmarks.json"
+LANE_BENCHMARK_REFRESH_SECONDS = 24 * 60 * 60
+LANE_BENCHMARK_ROUTING = "asia"
+LANE_BENCHMARK_OTP_PLAYERS = 10
+LANE_BENCHMARK_GAMES_PER_PLAYER = 20
+# Benchmark rows are ranked-solo support Karma games; only the player's matching games are ranked against them.
+LANE_BENCHMARK_QUEUE_ID = 420
+# Percentiles 0..100 per metric; a bisect over 101 points replaces the raw sample list.
+LANE_BENCHMARK_QUANTILES = 101
+LANE_BENCHMARK_MIN_SAMPLES = 30
+LANE_BENCHMARK_TARGET_PERCENTILE = 50.0
+CACHE_WARMER_ENABLED = os.environ.get("CACHE_WARMER_ENABLED", "1").strip() != "0"
+# Background refreshes run this long before the matching cache entry would expire.
+CACHE_WARM_LEAD_SECONDS = {
+    "static": 10 * 60,
+    "deeplol": 45,
+    "summary": 10,
+}
 TIMELINE_ENABLED_DEFAULT = os.environ.get("TIMELINE_ENABLED_DEFAULT", "0").strip() == "1"
+# "sync" fetches missing timelines inside the request, "background" answers from stored lane
+# records and fetches the rest off the request path, "off" skips lane-phase metrics.
+TIMELINE_MODES = ("off", "background", "sync")
+TIMELINE_MODE_DEFAULT = "sync" if TIMELINE_ENABLED_DEFAULT else os.environ.get("TIMELINE_MODE", "background").strip().lower()
+if TIMELINE_MODE_DEFAULT not in TIMELINE_MODES:
+    TIMELINE_MODE_DEFAULT = "background"
 HIGH_LEVEL_TARGETS = {
     "kp": 65.0,
     "deaths": 4.5,
@@ -43,6 +203,18 @@ HIGH_LEVEL_TARGETS = {
     "deaths_14": 1.0,
     "first_death_min": 9.0,
 }
+# Metrics with a benchmark distribution, mapped to whether a higher value is better.
+BENCHMARK_METRICS = {
+    "kp": True,
+    "deaths": False,
+    "vision_per_min": True,
+    "control_wards": True,
+    "assists_14": True,
+    "deaths_14": False,
+    "first_death_min": True,
+    "gold_diff_14": True,
+    "xp_diff_14": True,
+}
 SUPPORT_CHAMPION_IDS = {
     12, 16, 22, 40, 43, 44, 53, 63, 89, 111, 117, 201, 223, 235, 267, 350, 412,
     421, 432, 497, 526, 555, 561, 875, 876, 888, 902, 950, 954,
@@ -53,6 +225,7 @@ BOT_CARRY_CHAMPION_IDS = {
 }
 STATIC_REF_CACHE: dict[str, Any] = {
     "fetched_at": 0,
+    "retry_at": 0,
     "version": "",
     "item_names": {},
     "item_tags": {},
@@ -63,13 +236,46 @@ STATIC_REF_CACHE: dict[str, Any] = {
     "champion_names": {},
     "champion_icons": {},
 }
+STATIC_REF_LOCK = threading.Lock()
+STATIC_REF_MAP_KEYS = (
+    "item_names",
+    "item_tags",
+    "rune_names",
+    "rune_icons",
+    "spell_names",
+    "spell_icons",
+    "champion_names",
+    "champion_icons",
+)
 DEEPL0L_KARMA_CACHE: dict[str, Any] = {
     "fetched_at": 0,
     "otp_rows": [],
-    "builds": {},
-    "matchup_rows": {},
+    "otp_games": {},
+}
+# Percentile table built in the background from KR Karma OTP games (or LANE_BENCHMARK_DATASET).
+LANE_BENCHMARK_CACHE: dict[str, Any] = {
+    "built_at": 0,
+    "source": "",
+    "metrics": {},
 }
-PLAYER_SUMMARY_CACHE: dict[str, Any] = {}
+CACHE_LOCK_STRIPES = 8
+# Items measured per large list or counter when estimating a cache entry's size.
+CACHE_SIZE_SAMPLE = 16
+# Champion/item/rune/spell lists for the current Data Dragon patch, served by /api/catalog.
+CATALOG_CACHE: dict[str, Any] = {"version": "", "payload": None}
+# Finished matches never change, so match-v5 payloads are kept on disk and fetched once.
+MATCH_STORE: dict[str, Any] = {"conn": None, "disabled": False}
+MATCH_STORE_LOCK = threading.Lock()
+# Bump when ParticipantRow / MatchRecord change shape so stored records are rebuilt from payloads.
+MATCH_RECORD_VERSION = 1
+MATCH_RECORD_CACHE_SECONDS = 6 * 60 * 60
+LANE_RECORD_VERSION = 1
+# Timelines that 404, fail or don't parse are not retried for this long.
+LANE_RECORD_RETRY_SECONDS = 30 * 60
+LANE_RECORD_FAILURES: dict[str, float] = {}
+LANE_RECORD_FAILURES_LOCK = threading.Lock()
+LANE_PHASE_END_MS = 14 * 60 * 1000
+TIMELINE_FRAMES_PATTERN = re.compile(r'"frames"\s*:\s*\[')
 
 # Platform regions (game shard) to regional routing values for Match-v5/Account-v1.
 PLATFORM_TO_ROUTING = {
@@ -114,49 +320,971 @@ class RiotApiError(Exception):
         self.detail = detail
 
 
-def json_response(handler: SimpleHTTPRequestHandler, status: HTTPStatus, payload: dict[str, Any]) -> None:
-    raw = json.dumps(payload, ensure_ascii=True).encode("utf-8")
+class ServerBusyError(Exception):
+    def __init__(self, retry_after: int = BUSY_RETRY_AFTER_SECONDS) -> None:
+        super().__init__("Server is busy")
+        self.retry_after = retry_after
+
+
+def accepted_encodings(header_value: str | None) -> set[str]:
+    # "gzip;q=1.0, deflate, br;q=0" -> {"gzip", "deflate"}
+    encodings: set[str] = set()
+    for part in str(header_value or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip() and quality > 0:
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # Weak comparison, as If-None-Match requires.
+    if not if_none_match:
+        return False
+    bare_etag = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == bare_etag:
+            return True
+    return False
+
+
+def json_body(payload: dict[str, Any]) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(
+    handler: SimpleHTTPRequestHandler,
+    status: HTTPStatus,
+    payload: dict[str, Any],
+    *,
+    cache_control: str = "no-cache",
+    headers: dict[str, str] | None = None,
+    body: bytes | None = None,
+) -> None:
+    # body, when given, is json_body(payload) already encoded by the caller.
+    raw = json_body(payload) if body is None else body
+    # Weak tag: the same document keeps one validator whichever encoding it was sent with.
+    etag = f'W/"{hashlib.blake2b(raw, digest_size=16).hexdigest()}"'
+    if HTTPStatus.OK <= status < HTTPStatus.MULTIPLE_CHOICES and etag_matches(handler.headers.get("If-None-Match"), etag):
+        handler.send_response(HTTPStatus.NOT_MODIFIED)
+        handler.send_header("ETag", etag)
+        handler.send_header("Cache-Control", cache_control)
+        handler.send_header("Vary", "Accept-Encoding")
+        handler.end_headers()
+        return
+
+    body = raw
+    content_encoding = ""
+    if len(raw) >= JSON_COMPRESS_MIN_BYTES:
+        encodings = accepted_encodings(handler.headers.get("Accept-Encoding"))
+        if "gzip" in encodings:
+            body = gzip.compress(raw, compresslevel=JSON_COMPRESS_LEVEL)
+            content_encoding = "gzip"
+        elif "deflate" in encodings:
+            body = zlib.compress(raw, JSON_COMPRESS_LEVEL)
+            content_encoding = "deflate"
+
     handler.send_response(status)
     handler.send_header("Content-Type", "application/json; charset=utf-8")
-    handler.send_header("Content-Length", str(len(raw)))
+    if content_encoding:
+        handler.send_header("Content-Encoding", content_encoding)
+    handler.send_header("Vary", "Accept-Encoding")
+    if HTTPStatus.OK <= status < HTTPStatus.MULTIPLE_CHOICES:
+        handler.send_header("ETag", etag)
+        handler.send_header("Cache-Control", cache_control)
+    else:
+        handler.send_header("Cache-Control", "no-store")
+    for name, value in (headers or {}).items():
+        handler.send_header(name, value)
+    handler.send_header("Content-Length", str(len(body)))
     handler.end_headers()
-    handler.wfile.write(raw)
+    handler.wfile.write(body)
+
+
+# Pre-rendered 503 for connections turned away before a handler exists to answer them.
+def busy_response_bytes(retry_after: int = BUSY_RETRY_AFTER_SECONDS) -> bytes:
+    body = json.dumps({"error": "Server is busy, try again shortly.", "retryAfter": retry_after}).encode("utf-8")
+    head = (
+        "HTTP/1.1 503 Service Unavailable\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        "Cache-Control: no-store\r\n"
+        f"Retry-After: {retry_after}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
 
 
-def riot_get_json(url: str, api_key: str, endpoint: str) -> Any:
-    headers = dict(RIOT_HTTP_HEADERS)
-    headers["X-Riot-Token"] = api_key
+class StaticAsset(NamedTuple):
+    body: bytes
+    gzip_body: bytes
+    content_type: str
+    etag: str
+    cache_control: str
 
-    last_error: RiotApiError | None = None
-    for attempt in range(2):
-        request = urllib.request.Request(url, headers=headers)
+
+# URL path -> in-memory front-end file, filled by load_static_assets() at startup.
+STATIC_ASSETS: dict[str, StaticAsset] = {}
+
+
+def make_static_asset(body: bytes, content_type: str, cache_control: str) -> StaticAsset:
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    gzip_body = gzip.compress(body, compresslevel=9, mtime=0) if len(body) >= JSON_COMPRESS_MIN_BYTES else b""
+    return StaticAsset(body, gzip_body, content_type, f'W/"{digest}"', cache_control)
+
+
+def load_static_assets() -> None:
+    assets: dict[str, StaticAsset] = {}
+    fingerprinted: dict[str, str] = {}
+    for name in STATIC_FINGERPRINTED_FILES:
+        path = BASE_DIR / name
         try:
-            with urllib.request.urlopen(request, timeout=12) as response:
-                return json.loads(response.read().decode("utf-8"))
-        except urllib.error.HTTPError as exc:
+            body = path.read_bytes()
+        except OSError:
+            continue
+        content_type = STATIC_CONTENT_TYPES.get(path.suffix, "application/octet-stream")
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()[:12]
+        fingerprinted[name] = f"{path.stem}.{digest}{path.suffix}"
+        assets[f"/{fingerprinted[name]}"] = make_static_asset(body, content_type, IMMUTABLE_CACHE_CONTROL)
+        # The plain name stays reachable for pages cached before a deploy.
+        assets[f"/{name}"] = make_static_asset(body, content_type, "no-cache")
+
+    try:
+        index_html = (BASE_DIR / STATIC_INDEX_FILE).read_text(encoding="utf-8")
+    except OSError:
+        index_html = None
+    if index_html is not None:
+
+        def rewrite(match: re.Match[str]) -> str:
+            name = fingerprinted.get(match.group(2))
+            return f'{match.group(1)}="{name}"' if name else match.group(0)
+
+        index_asset = make_static_asset(
+            STATIC_ASSET_REF_PATTERN.sub(rewrite, index_html).encode("utf-8"),
+            STATIC_CONTENT_TYPES[".html"],
+            "no-cache",
+        )
+        assets["/"] = index_asset
+        assets[f"/{STATIC_INDEX_FILE}"] = index_asset
+    STATIC_ASSETS.clear()
+    STATIC_ASSETS.update(assets)
+
+
+def send_static_asset(handler: SimpleHTTPRequestHandler, asset: StaticAsset, include_body: bool = True) -> None:
+    if etag_matches(handler.headers.get("If-None-Match"), asset.etag):
+        handler.send_response(HTTPStatus.NOT_MODIFIED)
+        handler.send_header("ETag", asset.etag)
+        handler.send_header("Cache-Control", asset.cache_control)
+        handler.send_header("Vary", "Accept-Encoding")
+        handler.end_headers()
+        return
+
+    body = asset.body
+    use_gzip = bool(asset.gzip_body) and "gzip" in accepted_encodings(handler.headers.get("Accept-Encoding"))
+    if use_gzip:
+        body = asset.gzip_body
+    handler.send_response(HTTPStatus.OK)
+    handler.send_header("Content-Type", asset.content_type)
+    if use_gzip:
+        handler.send_header("Content-Encoding", "gzip")
+    handler.send_header("Vary", "Accept-Encoding")
+    handler.send_header("ETag", asset.etag)
+    handler.send_header("Cache-Control", asset.cache_control)
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    if include_body:
+        handler.wfile.write(body)
+
+
+def parse_rate_limit_header(value: str | None) -> list[tuple[int, int]]:
+    # "20:1,100:120" -> [(20, 1), (100, 120)] as (requests, window seconds).
+    pairs: list[tuple[int, int]] = []
+    for part in str(value or "").split(","):
+        count_text, _, window_text = part.strip().partition(":")
+        try:
+            count = int(count_text)
+            window = int(window_text)
+        except ValueError:
+            continue
+        if count > 0 and window > 0:
+            pairs.append((count, window))
+    return pairs
+
+
+# Sliding-window request log for one Riot limit (e.g. 100 requests per 120 s).
+class RateLimitBucket:
+    def __init__(self, limit: int, window: int) -> None:
+        self.limit = limit
+        self.window = float(window)
+        self.sent: deque[float] = deque()
+
+    def prune(self, now: float) -> None:
+        while self.sent and now - self.sent[0] >= self.window:
+            self.sent.popleft()
+
+    def wait_time(self, now: float) -> float:
+        self.prune(now)
+        if len(self.sent) < self.limit:
+            return 0.0
+        return max(self.sent[0] + self.window - now, 0.01)
+
+    def sync_count(self, used: int, now: float) -> None:
+        # Riot counts every client sharing the key; pad our log so we never assume more headroom.
+        self.prune(now)
+        while len(self.sent) < min(used, self.limit):
+            self.sent.append(now)
+
+
+# Shared pacing for Riot calls: app limits per routing host, method limits per (host, endpoint).
+class RiotRateLimiter:
+    def __init__(self, default_app_limits: list[tuple[int, int]]) -> None:
+        self._lock = threading.Lock()
+        self._default_app_limits = default_app_limits
+        self._app_buckets: dict[str, list[RateLimitBucket]] = {}
+        self._method_buckets: dict[tuple[str, str], list[RateLimitBucket]] = {}
+        self._blocked_until: dict[Any, float] = {}
+
+    def _buckets(self, host: str, method: str) -> list[RateLimitBucket]:
+        if host not in self._app_buckets:
+            self._app_buckets[host] = [
+                RateLimitBucket(limit, window) for limit, window in self._default_app_limits
+            ]
+        return self._app_buckets[host] + self._method_buckets.get((host, method), [])
+
+    # Takes a slot and returns 0, or returns how long to wait before trying again.
+    def reserve(self, host: str, method: str) -> float:
+        now = time.monotonic()
+        with self._lock:
+            wait = max(
+                self._blocked_until.get(host, 0.0) - now,
+                self._blocked_until.get((host, method), 0.0) - now,
+                0.0,
+            )
+            buckets = self._buckets(host, method)
+            for bucket in buckets:
+                wait = max(wait, bucket.wait_time(now))
+            if wait > 0:
+                return wait
+            for bucket in buckets:
+                bucket.sent.append(now)
+            return 0.0
+
+    # Smallest fraction of any bucket still free (0.0 while a 429 back-off is active).
+    def headroom(self, host: str, method: str) -> float:
+        now = time.monotonic()
+        with self._lock:
+            if self._blocked_until.get(host, 0.0) > now or self._blocked_until.get((host, method), 0.0) > now:
+                return 0.0
+            fraction = 1.0
+            for bucket in self._buckets(host, method):
+                bucket.prune(now)
+                fraction = min(fraction, (bucket.limit - len(bucket.sent)) / bucket.limit)
+            return max(fraction, 0.0)
+
+    # Waits for a slot, but no longer than a 429 back-off may last: a drained long window would
+    # otherwise hold the caller (and its admission slot) for up to two minutes.
+    def _wait_or_raise(self, host: str, method: str, deadline: float) -> float:
+        wait = self.reserve(host, method)
+        if wait > 0 and time.monotonic() + wait > deadline:
+            raise RiotApiError(
+                status=429,
+                endpoint=method,
+                url=f"https://{host}",
+                detail=f"Rate limit window needs {wait:.0f}s; not waiting past {RIOT_RATE_LIMIT_MAX_WAIT_SECONDS:.0f}s.",
+            )
+        return wait
+
+    def acquire(self, host: str, method: str) -> None:
+        deadline = time.monotonic() + RIOT_RATE_LIMIT_MAX_WAIT_SECONDS
+        while True:
+            wait = self._wait_or_raise(host, method, deadline)
+            if wait <= 0:
+                return
+            time.sleep(min(wait, 1.0))
+
+    async def acquire_async(self, host: str, method: str) -> None:
+        deadline = time.monotonic() + RIOT_RATE_LIMIT_MAX_WAIT_SECONDS
+        while True:
+            wait = self._wait_or_raise(host, method, deadline)
+            if wait <= 0:
+                return
+            await asyncio.sleep(min(wait, 1.0))
+
+    def _apply_limits(
+        self,
+        current: list[RateLimitBucket],
+        limits_header: str | None,
+        counts_header: str | None,
+        now: float,
+    ) -> list[RateLimitBucket]:
+        limits = parse_rate_limit_header(limits_header)
+        if not limits:
+            return current
+        existing = {(bucket.limit, int(bucket.window)): bucket for bucket in current}
+        updated = [existing.get(pair) or RateLimitBucket(*pair) for pair in limits]
+        used_by_window = {window: used for used, window in parse_rate_limit_header(counts_header)}
+        for bucket in updated:
+            used = used_by_window.get(int(bucket.window), 0)
+            if used > 0:
+                bucket.sync_count(used, now)
+        return updated
+
+    def observe(self, host: str, method: str, headers: Any) -> None:
+        if headers is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._buckets(host, method)
+            self._app_buckets[host] = self._apply_limits(
+                self._app_buckets[host],
+                headers.get("X-App-Rate-Limit"),
+                headers.get("X-App-Rate-Limit-Count"),
+                now,
+            )
+            self._method_buckets[(host, method)] = self._apply_limits(
+                self._method_buckets.get((host, method), []),
+                headers.get("X-Method-Rate-Limit"),
+                headers.get("X-Method-Rate-Limit-Count"),
+                now,
+            )
+
+    def penalize(self, host: str, method: str, headers: Any) -> float:
+        retry_after = 1.0
+        limit_type = ""
+        if headers is not None:
+            try:
+                retry_after = max(float(headers.get("Retry-After") or 1.0), 0.1)
+            except ValueError:
+                retry_after = 1.0
+            limit_type = str(headers.get("X-Rate-Limit-Type") or "").lower()
+        key: Any = host if limit_type == "application" else (host, method)
+        with self._lock:
+            self._blocked_until[key] = max(self._blocked_until.get(key, 0.0), time.monotonic() + retry_after)
+        self.observe(host, method, headers)
+        return retry_after
+
+
+RIOT_RATE_LIMITER = RiotRateLimiter(
+    parse_rate_limit_header(RIOT_APP_RATE_LIMIT_DEFAULT) or [(20, 1), (100, 120)]
+)
+
+
+def iter_response_body(response: http.client.HTTPResponse) -> Any:
+    # Yields the decoded body chunk by chunk, inflating gzip/deflate as it streams in.
+    encoding = str(response.getheader("Content-Encoding", "") or "").strip().lower()
+    decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS) if encoding in {"gzip", "deflate"} else None
+    while True:
+        chunk = response.read(HTTP_READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        if decompressor is None:
+            yield chunk
+            continue
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    if decompressor is not None:
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+
+# Streams chunks into a fresh consumer() parser (feed(chunk) -> done, result()) and stops reading
+# once it reports done.
+def consume_body(consumer: Any, chunks: Any) -> Any:
+    parser = consumer()
+    for chunk in chunks:
+        if parser.feed(chunk):
+            break
+    return parser.result()
+
+
+# Keep-alive connections per (scheme, host), shared by the Riot, Data Dragon and Deeplol helpers.
+class HttpConnectionPool:
+    def __init__(self, max_per_host: int, idle_seconds: float) -> None:
+        self._lock = threading.Lock()
+        self._max_per_host = max_per_host
+        self._idle_seconds = idle_seconds
+        self._idle: dict[tuple[str, str], list[tuple[http.client.HTTPConnection, float]]] = {}
+        self._slots: dict[tuple[str, str], threading.BoundedSemaphore] = {}
+        self._ssl_context = ssl.create_default_context()
+
+    def _slot(self, key: tuple[str, str]) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self._max_per_host)
+                self._slots[key] = slot
+            return slot
+
+    def _checkout(self, key: tuple[str, str], timeout: float) -> tuple[http.client.HTTPConnection, bool]:
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                conn, idle_since = idle.pop()
+                if now - idle_since < self._idle_seconds:
+                    conn.timeout = timeout
+                    if conn.sock is not None:
+                        conn.sock.settimeout(timeout)
+                    return conn, True
+                conn.close()
+        scheme, host = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, timeout=timeout, context=self._ssl_context), False
+        return http.client.HTTPConnection(host, timeout=timeout), False
+
+    def _checkin(self, key: tuple[str, str], conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) >= self._max_per_host:
+                conn.close()
+                return
+            idle.append((conn, time.monotonic()))
+
+    def get(self, url: str, headers: dict[str, str], timeout: float) -> tuple[Any, bytes]:
+        _status, response_headers, body = self.fetch(url, headers, timeout)
+        return response_headers, body
+
+    # Like get(), but feeds the decoded body to a consumer parser as it arrives and returns its result.
+    def stream(self, url: str, headers: dict[str, str], timeout: float, consumer: Any) -> tuple[Any, Any]:
+        _status, response_headers, result = self.fetch(url, headers, timeout, consumer=consumer)
+        return response_headers, result
+
+    # Like get(), but also returns the status so callers can tell a 304 from an empty 200.
+    def fetch(
+        self,
+        url: str,
+        headers: dict[str, str],
+        timeout: float,
+        consumer: Any = None,
+    ) -> tuple[int, Any, Any]:
+        if ASYNC_HTTP_CLIENT.running():
+            # On the asyncio runtime every outbound request rides the event loop's connections.
+            return ASYNC_HTTP_CLIENT.fetch_blocking(url, headers, timeout, consumer)
+        for _ in range(4):
+            parts = urllib.parse.urlsplit(url)
+            key = (parts.scheme.lower() or "https", parts.netloc)
+            path = parts.path or "/"
+            if parts.query:
+                path = f"{path}?{parts.query}"
+            request_headers = dict(headers)
+            request_headers.setdefault("Accept-Encoding", "gzip")
+
+            slot = self._slot(key)
+            if not slot.acquire(timeout=timeout):
+                raise urllib.error.URLError(f"connection pool for {parts.netloc} exhausted")
+            try:
+                status, response_headers, body = self._send(key, path, request_headers, timeout, consumer)
+            finally:
+                slot.release()
+
+            location = response_headers.get("Location")
+            if status in {301, 302, 303, 307, 308} and location:
+                url = urllib.parse.urljoin(url, location)
+                continue
+            if status >= 400:
+                raise urllib.error.HTTPError(url, status, str(status), response_headers, io.BytesIO(body))
+            return status, response_headers, body
+        raise urllib.error.URLError(f"too many redirects for {url}")
+
+    def _send(
+        self,
+        key: tuple[str, str],
+        path: str,
+        headers: dict[str, str],
+        timeout: float,
+        consumer: Any = None,
+    ) -> tuple[int, Any, Any]:
+        for attempt in range(2):
+            conn, reused = self._checkout(key, timeout)
             try:
-                detail = exc.read().decode("utf-8")
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                if consumer is not None and response.status == 200:
+                    body = consume_body(consumer, iter_response_body(response))
+                else:
+                    body = b"".join(iter_response_body(response))
+            except (http.client.HTTPException, OSError, zlib.error) as exc:
+                conn.close()
+                # A pooled socket may have been closed by the server while idle; retry once on a fresh one.
+                if reused and attempt == 0:
+                    continue
+                raise urllib.error.URLError(exc) from exc
             except Exception:
-                detail = ""
-            last_error = RiotApiError(status=exc.code, endpoint=endpoint, url=url, detail=detail[:350])
+                conn.close()
+                raise
+            # A consumer that stopped early left the rest of the body on the socket, so it cannot be reused.
+            if response.will_close or not response.isclosed():
+                conn.close()
+            else:
+                self._checkin(key, conn)
+            return response.status, response.headers, body
+        raise urllib.error.URLError(f"request to {key[1]} failed")
+
+
+HTTP_POOL = HttpConnectionPool(HTTP_POOL_MAX_PER_HOST, HTTP_POOL_IDLE_SECONDS)
+
+
+# Process-wide outbound fetch workers: one global concurrency cap, priority classes, and
+# coalescing so concurrent callers asking for the same key share one in-flight future.
+class FetchScheduler:
+    def __init__(self, max_workers: int) -> None:
+        self._max_workers = max_workers
+        self._queue: queue.PriorityQueue[tuple[int, int, Any, Future, Any, tuple[Any, ...]]] = queue.PriorityQueue()
+        self._lock = threading.Lock()
+        self._inflight: dict[Any, Future] = {}
+        self._sequence = itertools.count()
+        self._workers: list[threading.Thread] = []
+        self._local = threading.local()
+
+    def _ensure_workers(self) -> None:
+        while len(self._workers) < self._max_workers:
+            worker = threading.Thread(
+                target=self._run,
+                name=f"fetch-worker-{len(self._workers)}",
+                daemon=True,
+            )
+            self._workers.append(worker)
+            worker.start()
 
-            # One quick retry for transient edge blocks/rate transitions.
-            if attempt == 0 and exc.code in {403, 429, 500, 502, 503, 504}:
-                time.sleep(0.35)
+    def submit(self, priority: int, key: Any, fn: Any, *args: Any) -> Future:
+        if getattr(self._local, "is_worker", False):
+            # Nested submits run inline so a worker never blocks waiting on the queue it drains.
+            future: Future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as exc:
+                future.set_exception(exc)
+            return future
+
+        with self._lock:
+            existing = self._inflight.get(key)
+            if existing is not None:
+                return existing
+            future = Future()
+            self._inflight[key] = future
+            self._queue.put((priority, next(self._sequence), key, future, fn, args))
+            self._ensure_workers()
+        return future
+
+    def _run(self) -> None:
+        self._local.is_worker = True
+        while True:
+            _priority, _seq, key, future, fn, args = self._queue.get()
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args))
+                    except Exception as exc:
+                        future.set_exception(exc)
+            finally:
+                with self._lock:
+                    if self._inflight.get(key) is future:
+                        self._inflight.pop(key, None)
+                self._queue.task_done()
+
+
+FETCH_SCHEDULER = FetchScheduler(RIOT_PARALLEL_WORKERS)
+
+
+# Keep-alive connections on the asyncio runtime: the same per-host cap as HttpConnectionPool, but a
+# request waiting on a slow upstream holds a coroutine instead of a thread. Only the loop touches
+# the pool; other threads go through fetch_blocking().
+class AsyncHttpClient:
+    def __init__(self, max_per_host: int, idle_seconds: float) -> None:
+        self._max_per_host = max_per_host
+        self._idle_seconds = idle_seconds
+        self._idle: dict[tuple[str, str], list[tuple[asyncio.StreamReader, asyncio.StreamWriter, float]]] = {}
+        self._slots: dict[tuple[str, str], asyncio.Semaphore] = {}
+        self._ssl_context = ssl.create_default_context()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+
+    # True when called off the loop thread while the asyncio runtime is serving.
+    def running(self) -> bool:
+        return self._loop is not None and threading.get_ident() != self._loop_thread
+
+    def fetch_blocking(
+        self,
+        url: str,
+        headers: dict[str, str],
+        timeout: float,
+        consumer: Any = None,
+    ) -> tuple[int, Any, Any]:
+        assert self._loop is not None
+        return asyncio.run_coroutine_threadsafe(self.fetch(url, headers, timeout, consumer), self._loop).result()
+
+    async def fetch(
+        self,
+        url: str,
+        headers: dict[str, str],
+        timeout: float,
+        consumer: Any = None,
+    ) -> tuple[int, Any, Any]:
+        for _ in range(4):
+            parts = urllib.parse.urlsplit(url)
+            key = (parts.scheme.lower() or "https", parts.netloc)
+            path = parts.path or "/"
+            if parts.query:
+                path = f"{path}?{parts.query}"
+            request_headers = dict(headers)
+            request_headers.setdefault("Accept-Encoding", "gzip")
+
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = asyncio.Semaphore(self._max_per_host)
+            try:
+                await asyncio.wait_for(slot.acquire(), timeout)
+            except asyncio.TimeoutError as exc:
+                raise urllib.error.URLError(f"connection pool for {parts.netloc} exhausted") from exc
+            try:
+                status, response_headers, body = await self._send(key, path, request_headers, timeout, consumer)
+            finally:
+                slot.release()
+
+            location = response_headers.get("Location")
+            if status in {301, 302, 303, 307, 308} and location:
+                url = urllib.parse.urljoin(url, location)
                 continue
-            raise last_error from exc
+            if status >= 400:
+                raise urllib.error.HTTPError(url, status, str(status), response_headers, io.BytesIO(body))
+            return status, response_headers, body
+        raise urllib.error.URLError(f"too many redirects for {url}")
+
+    async def _checkout(
+        self,
+        key: tuple[str, str],
+        timeout: float,
+    ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        now = time.monotonic()
+        idle = self._idle.get(key, [])
+        while idle:
+            reader, writer, idle_since = idle.pop()
+            if now - idle_since < self._idle_seconds and not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        scheme, netloc = key
+        address = urllib.parse.urlsplit(f"//{netloc}")
+        port = address.port or (443 if scheme == "https" else 80)
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(address.hostname, port, ssl=self._ssl_context if scheme == "https" else None),
+            timeout,
+        )
+        return reader, writer, False
+
+    def _checkin(self, key: tuple[str, str], reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        idle = self._idle.setdefault(key, [])
+        if len(idle) >= self._max_per_host:
+            writer.close()
+            return
+        idle.append((reader, writer, time.monotonic()))
+
+    async def _send(
+        self,
+        key: tuple[str, str],
+        path: str,
+        headers: dict[str, str],
+        timeout: float,
+        consumer: Any = None,
+    ) -> tuple[int, Any, Any]:
+        for attempt in range(2):
+            reader, writer, reused = await self._checkout(key, timeout)
+            try:
+                status, response_headers, body, reusable = await asyncio.wait_for(
+                    self._exchange(reader, writer, key[1], path, headers, consumer),
+                    timeout,
+                )
+            except (
+                asyncio.TimeoutError,
+                asyncio.IncompleteReadError,
+                http.client.HTTPException,
+                OSError,
+                ValueError,
+                zlib.error,
+            ) as exc:
+                writer.close()
+                # A pooled socket may have been closed by the server while idle; retry once on a fresh one.
+                if reused and attempt == 0:
+                    continue
+                raise urllib.error.URLError(exc) from exc
+            except BaseException:
+                writer.close()
+                raise
+            if reusable:
+                self._checkin(key, reader, writer)
+            else:
+                writer.close()
+            return status, response_headers, body
+        raise urllib.error.URLError(f"request to {key[1]} failed")
+
+    async def _exchange(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        host: str,
+        path: str,
+        headers: dict[str, str],
+        consumer: Any,
+    ) -> tuple[int, Any, Any, bool]:
+        lines = [f"GET {path} HTTP/1.1", f"Host: {host}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+        status_line = (await reader.readline()).decode("latin-1")
+        version, _, rest = status_line.partition(" ")
+        if not version.startswith("HTTP/") or not rest[:3].isdigit():
+            raise http.client.BadStatusLine(status_line)
+        status = int(rest[:3])
+        header_lines: list[bytes] = []
+        while True:
+            line = await reader.readline()
+            if line in {b"\r\n", b"\n", b""}:
+                break
+            header_lines.append(line)
+        response_headers = http.client.parse_headers(io.BytesIO(b"".join(header_lines) + b"\r\n"))
+
+        chunked = "chunked" in str(response_headers.get("Transfer-Encoding", "")).lower()
+        length = response_headers.get("Content-Length")
+        no_body = status in {204, 304} or 100 <= status < 200
+        reusable = (
+            version.strip() == "HTTP/1.1"
+            and str(response_headers.get("Connection", "")).lower() != "close"
+            and (no_body or chunked or length is not None)
+        )
+        if no_body:
+            return status, response_headers, b"", reusable
+
+        parts: list[bytes] = []
+        parser = consumer() if consumer is not None and status == 200 else None
+        feed = parser.feed if parser is not None else (lambda chunk: parts.append(chunk) or False)
+        encoding = str(response_headers.get("Content-Encoding", "") or "").strip().lower()
+        decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS) if encoding in {"gzip", "deflate"} else None
+
+        def deliver(raw: bytes) -> bool:
+            data = decompressor.decompress(raw) if decompressor is not None else raw
+            return bool(data) and feed(data)
+
+        finished = True
+        if chunked:
+            while True:
+                size = int((await reader.readline()).split(b";", 1)[0].strip() or b"0", 16)
+                if size == 0:
+                    while (await reader.readline()) not in {b"\r\n", b"\n", b""}:
+                        pass
+                    break
+                data = await reader.readexactly(size)
+                await reader.readexactly(2)
+                if deliver(data):
+                    finished = False
+                    break
+        elif length is not None:
+            remaining = int(length)
+            while remaining > 0:
+                data = await reader.read(min(remaining, HTTP_READ_CHUNK_BYTES))
+                if not data:
+                    raise asyncio.IncompleteReadError(b"", remaining)
+                remaining -= len(data)
+                if deliver(data):
+                    finished = remaining == 0
+                    break
+        else:
+            while True:
+                data = await reader.read(HTTP_READ_CHUNK_BYTES)
+                if not data or deliver(data):
+                    break
+        if finished and decompressor is not None:
+            tail = decompressor.flush()
+            if tail:
+                feed(tail)
+        # A consumer that stopped early left the rest of the body on the socket, so it cannot be reused.
+        reusable = reusable and finished
+        if parser is not None:
+            return status, response_headers, parser.result(), reusable
+        return status, response_headers, b"".join(parts), reusable
+
+
+ASYNC_HTTP_CLIENT = AsyncHttpClient(HTTP_POOL_MAX_PER_HOST, HTTP_POOL_IDLE_SECONDS)
+
+
+# FetchScheduler's counterpart on the asyncio runtime: the same priority classes and coalescing,
+# but the jobs are coroutines run by a fixed set of worker tasks on the loop. submit() is safe to
+# call from any thread and hands back a concurrent Future the blocking pipelines can wait on.
+class AsyncFetchScheduler:
+    def __init__(self, max_concurrency: int) -> None:
+        self._max_concurrency = max_concurrency
+        self._lock = threading.Lock()
+        self._inflight: dict[Any, Future] = {}
+        self._sequence = itertools.count()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.PriorityQueue[tuple[int, int, Any, Future, Any, tuple[Any, ...]]] | None = None
+        self._workers: list[asyncio.Task] = []
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [loop.create_task(self._run()) for _ in range(self._max_concurrency)]
+
+    def running(self) -> bool:
+        return self._loop is not None
+
+    def submit(self, priority: int, key: Any, coroutine_fn: Any, *args: Any) -> Future:
+        assert self._loop is not None and self._queue is not None
+        with self._lock:
+            existing = self._inflight.get(key)
+            if existing is not None:
+                return existing
+            future: Future = Future()
+            self._inflight[key] = future
+            item = (priority, next(self._sequence), key, future, coroutine_fn, args)
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+        return future
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        while True:
+            _priority, _seq, key, future, coroutine_fn, args = await self._queue.get()
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(await coroutine_fn(*args))
+                    except Exception as exc:
+                        future.set_exception(exc)
+            finally:
+                with self._lock:
+                    if self._inflight.get(key) is future:
+                        self._inflight.pop(key, None)
+                self._queue.task_done()
+
+
+ASYNC_FETCH_SCHEDULER = AsyncFetchScheduler(ASYNC_UPSTREAM_CONCURRENCY)
+
+
+# Decides what a failed Riot call turns into: the error to raise and how long to pause before the
+# next attempt, or None when the caller should give up now.
+def riot_retry_plan(
+    exc: urllib.error.URLError,
+    url: str,
+    endpoint: str,
+    attempt: int,
+    quick_retry_used: bool,
+) -> tuple[RiotApiError, float | None, bool]:
+    host = urllib.parse.urlsplit(url).netloc
+    is_last_attempt = attempt == RIOT_MAX_ATTEMPTS - 1
+    if not isinstance(exc, urllib.error.HTTPError):
+        error = RiotApiError(status=502, endpoint=endpoint, url=url, detail=str(exc))
+        if not quick_retry_used and not is_last_attempt:
+            return error, 0.25, True
+        return error, None, quick_retry_used
+
+    try:
+        detail = exc.read().decode("utf-8")
+    except Exception:
+        detail = ""
+    error = RiotApiError(status=exc.code, endpoint=endpoint, url=url, detail=detail[:350])
+    if exc.code == 429:
+        # The limiter blocks this host/method until Retry-After, so the next acquire() paces us.
+        retry_after = RIOT_RATE_LIMITER.penalize(host, endpoint, exc.headers)
+        if not is_last_attempt and retry_after <= RIOT_RATE_LIMIT_MAX_WAIT_SECONDS:
+            return error, 0.0, quick_retry_used
+        return error, None, quick_retry_used
+
+    RIOT_RATE_LIMITER.observe(host, endpoint, exc.headers)
+    # One quick retry for transient edge blocks.
+    if not quick_retry_used and not is_last_attempt and exc.code in {403, 500, 502, 503, 504}:
+        return error, 0.35, True
+    return error, None, quick_retry_used
+
+
+def riot_get_json(url: str, api_key: str, endpoint: str, consumer: Any = None) -> Any:
+    headers = dict(RIOT_HTTP_HEADERS)
+    headers["X-Riot-Token"] = api_key
+    host = urllib.parse.urlsplit(url).netloc
+
+    last_error: RiotApiError | None = None
+    quick_retry_used = False
+    for attempt in range(RIOT_MAX_ATTEMPTS):
+        RIOT_RATE_LIMITER.acquire(host, endpoint)
+        try:
+            if consumer is not None:
+                response_headers, result = HTTP_POOL.stream(url, headers, timeout=12, consumer=consumer)
+                RIOT_RATE_LIMITER.observe(host, endpoint, response_headers)
+                return result
+            response_headers, body = HTTP_POOL.get(url, headers, timeout=12)
+            RIOT_RATE_LIMITER.observe(host, endpoint, response_headers)
+            return json.loads(body.decode("utf-8"))
         except urllib.error.URLError as exc:
-            last_error = RiotApiError(status=502, endpoint=endpoint, url=url, detail=str(exc))
-            if attempt == 0:
-                time.sleep(0.25)
-                continue
-            raise last_error from exc
+            last_error, delay, quick_retry_used = riot_retry_plan(exc, url, endpoint, attempt, quick_retry_used)
+            if delay is None:
+                raise last_error from exc
+            if delay > 0:
+                time.sleep(delay)
+
+    if last_error:
+        raise last_error
+    raise RiotApiError(status=500, endpoint=endpoint, url=url, detail="Unknown request error")
+
+
+# Coroutine twin of riot_get_json() for the asyncio runtime's fetch scheduler.
+async def riot_get_json_async(url: str, api_key: str, endpoint: str, consumer: Any = None) -> Any:
+    headers = dict(RIOT_HTTP_HEADERS)
+    headers["X-Riot-Token"] = api_key
+    host = urllib.parse.urlsplit(url).netloc
+
+    last_error: RiotApiError | None = None
+    quick_retry_used = False
+    for attempt in range(RIOT_MAX_ATTEMPTS):
+        await RIOT_RATE_LIMITER.acquire_async(host, endpoint)
+        try:
+            _status, response_headers, body = await ASYNC_HTTP_CLIENT.fetch(url, headers, 12, consumer)
+            RIOT_RATE_LIMITER.observe(host, endpoint, response_headers)
+            if consumer is not None:
+                return body
+            return json.loads(body.decode("utf-8"))
+        except urllib.error.URLError as exc:
+            last_error, delay, quick_retry_used = riot_retry_plan(exc, url, endpoint, attempt, quick_retry_used)
+            if delay is None:
+                raise last_error from exc
+            if delay > 0:
+                await asyncio.sleep(delay)
 
     if last_error:
         raise last_error
     raise RiotApiError(status=500, endpoint=endpoint, url=url, detail="Unknown request error")
 
 
+def submit_riot_get_json(
+    url: str,
+    api_key: str,
+    endpoint: str,
+    priority: int | None = None,
+    consumer: Any = None,
+) -> Future:
+    if priority is None:
+        priority = RIOT_ENDPOINT_PRIORITY.get(endpoint, FETCH_PRIORITY_ACCOUNT)
+    key = ("riot", url) if consumer is None else ("riot", url, consumer)
+    if ASYNC_FETCH_SCHEDULER.running():
+        return ASYNC_FETCH_SCHEDULER.submit(priority, key, riot_get_json_async, url, api_key, endpoint, consumer)
+    return FETCH_SCHEDULER.submit(priority, key, riot_get_json, url, api_key, endpoint, consumer)
+
+
+def scheduled_riot_get_json(url: str, api_key: str, endpoint: str) -> Any:
+    return submit_riot_get_json(url, api_key, endpoint).result()
+
+
 def optional_riot_get_json(
     url: str,
     api_key: str,
@@ -165,7 +1293,7 @@ def optional_riot_get_json(
     diagnostics: list[dict[str, Any]],
 ) -> Any:
     try:
-        return riot_get_json(url, api_key, endpoint)
+        return scheduled_riot_get_json(url, api_key, endpoint)
     except RiotApiError as exc:
         diagnostics.append(
             {
@@ -195,34 +1323,1515 @@ def is_truthy_text(value: str) -> bool:
     return str(value).strip().lower() in {"1", "true", "yes", "on"}
 
 
-def get_player_summary_cache(cache_key: str) -> dict[str, Any] | None:
+def estimate_cache_size(value: Any) -> int:
+    # Roughly the compact JSON size. Lists and counters of same-shaped items are measured on their
+    # first CACHE_SIZE_SAMPLE items and scaled, so a write never serializes the whole value.
+    if isinstance(value, dict) and not isinstance(value, Counter):
+        return 2 + sum(len(str(key)) + 4 + estimate_cache_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple, Counter)) and len(value) > CACHE_SIZE_SAMPLE:
+        items = value.items() if isinstance(value, Counter) else value
+        sample = list(itertools.islice(items, CACHE_SIZE_SAMPLE))
+        return serialized_size(sample) * len(value) // len(sample)
+    return serialized_size(value)
+
+
+def serialized_size(value: Any) -> int:
+    if isinstance(value, Counter) and not all(isinstance(key, (str, int)) for key in value):
+        # Counters keyed by tuples are not JSON; their repr is a close enough size.
+        return len(repr(value))
+    try:
+        return len(json.dumps(value, separators=(",", ":"), default=str))
+    except (TypeError, ValueError):
+        return len(repr(value))
+
+
+# Bounded in-memory cache shared by request threads. Entries carry their own TTL and may be
+# served for stale_seconds past it; each lock stripe keeps its own LRU order and size budget.
+class TTLCache:
+    def __init__(
+        self,
+        name: str,
+        *,
+        ttl_seconds: float,
+        stale_seconds: float = 0,
+        max_entries: int = 256,
+        max_bytes: int = 0,
+        stripes: int = CACHE_LOCK_STRIPES,
+    ) -> None:
+        self.name = name
+        self.ttl_seconds = float(ttl_seconds)
+        self.stale_seconds = float(stale_seconds)
+        self.max_entries = max(int(max_entries), 1)
+        self.max_bytes = max(int(max_bytes), 0)
+        stripe_count = max(1, min(int(stripes), self.max_entries))
+        self._stripe_entries = -(-self.max_entries // stripe_count)
+        self._stripe_bytes = -(-self.max_bytes // stripe_count) if self.max_bytes else 0
+        self._stripes = [
+            {"lock": threading.Lock(), "entries": OrderedDict(), "bytes": 0}
+            for _ in range(stripe_count)
+        ]
+        self._counter_lock = threading.Lock()
+        self._counters = Counter()
+
+    def _stripe(self, key: Any) -> dict[str, Any]:
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._counter_lock:
+            self._counters[name] += amount
+
+    @staticmethod
+    def _drop(stripe: dict[str, Any], key: Any) -> None:
+        entry = stripe["entries"].pop(key, None)
+        if entry is not None:
+            stripe["bytes"] -= entry["size"]
+
+    def get_with_freshness(self, key: Any) -> tuple[Any, bool]:
+        now = time.time()
+        stripe = self._stripe(key)
+        with stripe["lock"]:
+            entry = stripe["entries"].get(key)
+            if entry is not None and now >= entry["expires_at"] + self.stale_seconds:
+                self._drop(stripe, key)
+                self._count("expirations")
+                entry = None
+            if entry is None:
+                self._count("misses")
+                return None, False
+            stripe["entries"].move_to_end(key)
+            is_fresh = now < entry["expires_at"]
+        self._count("hits" if is_fresh else "stale_hits")
+        return entry["value"], is_fresh
+
+    def get(self, key: Any) -> Any:
+        value, _is_fresh = self.get_with_freshness(key)
+        return value
+
+    def peek(self, key: Any) -> Any:
+        # The stored value as is: no expiry check, LRU move or hit/miss count.
+        stripe = self._stripe(key)
+        with stripe["lock"]:
+            entry = stripe["entries"].get(key)
+        return entry["value"] if entry is not None else None
+
+    def set(self, key: Any, value: Any, *, ttl_seconds: float | None = None, size: int | None = None) -> None:
+        if size is None:
+            size = estimate_cache_size(value) if self.max_bytes else 0
+        if self._stripe_bytes and size > self._stripe_bytes:
+            # Larger than a whole stripe's budget: caching it would only evict everything else.
+            self._count("rejected")
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else float(ttl_seconds)
+        stripe = self._stripe(key)
+        evicted = 0
+        with stripe["lock"]:
+            self._drop(stripe, key)
+            stripe["entries"][key] = {"value": value, "expires_at": time.time() + ttl, "size": size}
+            stripe["bytes"] += size
+            while len(stripe["entries"]) > self._stripe_entries or (
+                self._stripe_bytes and stripe["bytes"] > self._stripe_bytes
+            ):
+                oldest_key = next(iter(stripe["entries"]))
+                self._drop(stripe, oldest_key)
+                evicted += 1
+        if evicted:
+            self._count("evictions", evicted)
+
+    def pop(self, key: Any) -> None:
+        stripe = self._stripe(key)
+        with stripe["lock"]:
+            self._drop(stripe, key)
+
+    def clear(self) -> None:
+        for stripe in self._stripes:
+            with stripe["lock"]:
+                stripe["entries"].clear()
+                stripe["bytes"] = 0
+
+    def stats(self) -> dict[str, Any]:
+        entries = 0
+        size = 0
+        for stripe in self._stripes:
+            with stripe["lock"]:
+                entries += len(stripe["entries"])
+                size += stripe["bytes"]
+        with self._counter_lock:
+            counters = dict(self._counters)
+        return {
+            "entries": entries,
+            "bytes": size,
+            "maxEntries": self.max_entries,
+            "maxBytes": self.max_bytes,
+            "hits": counters.get("hits", 0),
+            "staleHits": counters.get("stale_hits", 0),
+            "misses": counters.get("misses", 0),
+            "expirations": counters.get("expirations", 0),
+            "evictions": counters.get("evictions", 0),
+            "rejected": counters.get("rejected", 0),
+        }
+
+
+PLAYER_SUMMARY_CACHE = TTLCache(
+    "player_summary",
+    ttl_seconds=PLAYER_SUMMARY_CACHE_SECONDS,
+    stale_seconds=PLAYER_SUMMARY_STALE_SECONDS,
+    max_entries=64,
+    max_bytes=32 * 1024 * 1024,
+)
+# Per-player Karma counters and recent rows, so /api/matchup can rerun only the matchup model.
+KARMA_AGGREGATE_CACHE = TTLCache(
+    "karma_aggregates",
+    ttl_seconds=PLAYER_SUMMARY_CACHE_SECONDS,
+    stale_seconds=PLAYER_SUMMARY_STALE_SECONDS,
+    max_entries=64,
+    max_bytes=16 * 1024 * 1024,
+)
+DEEPL0L_BUILD_CACHE = TTLCache(
+    "deeplol_builds",
+    ttl_seconds=DEEPL0L_BUILD_CACHE_SECONDS,
+    stale_seconds=DEEPL0L_BUILD_STALE_SECONDS,
+    max_entries=64,
+)
+DEEPL0L_MATCHUP_CACHE = TTLCache(
+    "deeplol_matchup_rows",
+    ttl_seconds=DEEPL0L_CACHE_SECONDS,
+    max_entries=256,
+    max_bytes=16 * 1024 * 1024,
+)
+# Normalized MatchRecords; finished matches never change, so only the entry count bounds this.
+MATCH_RECORD_CACHE = TTLCache("match_records", ttl_seconds=MATCH_RECORD_CACHE_SECONDS, max_entries=2048)
+TTL_CACHES = (
+    PLAYER_SUMMARY_CACHE,
+    KARMA_AGGREGATE_CACHE,
+    DEEPL0L_BUILD_CACHE,
+    DEEPL0L_MATCHUP_CACHE,
+    MATCH_RECORD_CACHE,
+)
+
+
+def cache_stats() -> dict[str, Any]:
+    return {cache.name: cache.stats() for cache in TTL_CACHES}
+
+
+# A cached summary keeps the JSON body it was sized by, so /api/stats sends it without encoding again.
+class SummaryEntry(NamedTuple):
+    payload: dict[str, Any]
+    body: bytes
+
+
+def get_player_summary_cache(cache_key: str) -> tuple[dict[str, Any] | None, bool]:
+    entry, is_fresh = PLAYER_SUMMARY_CACHE.get_with_freshness(cache_key)
+    if not isinstance(entry, SummaryEntry):
+        return None, False
+    return entry.payload, is_fresh
+
+
+def set_player_summary_cache(cache_key: str, payload: dict[str, Any]) -> None:
+    body = json_body(payload)
+    PLAYER_SUMMARY_CACHE.set(cache_key, SummaryEntry(payload, body), size=len(body))
+
+
+def player_summary_body(cache_key: str, payload: dict[str, Any]) -> bytes | None:
+    # Only while payload is still the cached summary; a copy with another matchup is encoded afresh.
+    entry = PLAYER_SUMMARY_CACHE.peek(cache_key)
+    return entry.body if isinstance(entry, SummaryEntry) and entry.payload is payload else None
+
+
+# Single-flight: concurrent callers with the same key share one computation and its result.
+class SingleFlight:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, Future] = {}
+
+    def _claim(self, key: str) -> tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    def _execute(self, key: str, future: Future, fn: Any, args: tuple[Any, ...]) -> None:
+        try:
+            future.set_result(fn(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        finally:
+            with self._lock:
+                if self._calls.get(key) is future:
+                    self._calls.pop(key, None)
+
+    def run(self, key: str, fn: Any, *args: Any) -> Any:
+        future, is_leader = self._claim(key)
+        if is_leader:
+            self._execute(key, future, fn, args)
+        return future.result()
+
+    def run_in_background(self, key: str, fn: Any, *args: Any) -> bool:
+        future, is_leader = self._claim(key)
+        if not is_leader:
+            return False
+        # Nobody waits on a background refresh; mark the exception as retrieved so it is not logged.
+        future.add_done_callback(lambda done: done.exception())
+        threading.Thread(
+            target=self._execute,
+            args=(key, future, fn, args),
+            name=f"refresh-{key[:40]}",
+            daemon=True,
+        ).start()
+        return True
+
+
+SUMMARY_FLIGHTS = SingleFlight()
+
+
+# Bounded gate in front of the cache-miss pipelines: a few run at once, a few more wait their turn,
+# and the rest fail fast with ServerBusyError so a spike turns into 503s instead of piled-up threads
+# and Riot 429s. Callers joining an in-flight SingleFlight computation do not pass through it.
+class PipelineAdmission:
+    def __init__(self, max_inflight: int, max_queued: int, wait_seconds: float) -> None:
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_inflight)
+        self._max_inflight = max_inflight
+        self._max_queued = max_queued
+        self._wait_seconds = wait_seconds
+        self._inflight = 0
+        self._queued = 0
+        self._admitted = 0
+        self._rejected = 0
+
+    def _acquire(self, queue_if_full: bool) -> None:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if not queue_if_full or self._queued >= self._max_queued:
+                    self._rejected += 1
+                    raise ServerBusyError()
+                self._queued += 1
+            try:
+                acquired = self._slots.acquire(timeout=self._wait_seconds)
+            finally:
+                with self._lock:
+                    self._queued -= 1
+            if not acquired:
+                with self._lock:
+                    self._rejected += 1
+                raise ServerBusyError()
+        with self._lock:
+            self._inflight += 1
+            self._admitted += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._inflight -= 1
+        self._slots.release()
+
+    def run(self, fn: Any, *args: Any, **kwargs: Any) -> Any:
+        self._acquire(queue_if_full=True)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._release()
+
+    # For work nobody is waiting on, such as refreshing a stale entry: skipped unless a slot is free now.
+    def run_if_free(self, fn: Any, *args: Any, **kwargs: Any) -> Any:
+        self._acquire(queue_if_full=False)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._release()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "inflight": self._inflight,
+                "maxInflight": self._max_inflight,
+                "queued": self._queued,
+                "maxQueued": self._max_queued,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+            }
+
+
+PIPELINE_ADMISSION = PipelineAdmission(PIPELINE_MAX_INFLIGHT, PIPELINE_QUEUE_MAX, PIPELINE_QUEUE_WAIT_SECONDS)
+
+
+def compute_player_summary_cached(cache_key: str, summary_args: dict[str, Any]) -> dict[str, Any]:
+    payload = player_summary(**summary_args)
+    set_player_summary_cache(cache_key, payload)
+    return payload
+
+
+def admit_player_summary(cache_key: str, summary_args: dict[str, Any]) -> dict[str, Any]:
+    return PIPELINE_ADMISSION.run(compute_player_summary_cached, cache_key, summary_args)
+
+
+def refresh_player_summary(cache_key: str, summary_args: dict[str, Any]) -> dict[str, Any]:
+    return PIPELINE_ADMISSION.run_if_free(compute_player_summary_cached, cache_key, summary_args)
+
+
+def get_or_compute_player_summary(cache_key: str, summary_args: dict[str, Any]) -> dict[str, Any]:
+    cached_payload, is_fresh = get_player_summary_cache(cache_key)
+    if cached_payload is not None:
+        if not is_fresh:
+            SUMMARY_FLIGHTS.run_in_background(cache_key, refresh_player_summary, cache_key, summary_args)
+        return cached_payload
+    return SUMMARY_FLIGHTS.run(cache_key, admit_player_summary, cache_key, summary_args)
+
+
+def player_cache_key(game_name: str, tag_line: str, platform: str, match_count: int) -> str:
+    return "|".join([game_name.lower(), tag_line.lower(), platform, str(match_count)])
+
+
+def get_karma_aggregates(aggregate_key: str) -> dict[str, Any] | None:
+    aggregates = KARMA_AGGREGATE_CACHE.get(aggregate_key)
+    return aggregates if isinstance(aggregates, dict) else None
+
+
+def set_karma_aggregates(aggregate_key: str, aggregates: dict[str, Any]) -> None:
+    KARMA_AGGREGATE_CACHE.set(aggregate_key, aggregates)
+
+
+def karma_matchup_from_aggregates(
+    aggregates: dict[str, Any],
+    *,
+    enemy_support_id: int,
+    enemy_bot_id: int,
+    diagnostics: list[dict[str, Any]],
+) -> dict[str, Any]:
+    selected_support_id = safe_num(enemy_support_id) or safe_num(aggregates.get("default_support_id"))
+    selected_bot_id = safe_num(enemy_bot_id) or safe_num(aggregates.get("default_bot_id"))
+    return karma_matchup_recommendation_from_deeplol(
+        enemy_support_id=selected_support_id,
+        enemy_bot_id=selected_bot_id,
+        karma_games=safe_num(aggregates.get("karma_games")),
+        karma_wins=safe_num(aggregates.get("karma_wins")),
+        karma_item_counter=aggregates.get("karma_item_counter") or Counter(),
+        karma_keystone_counter=aggregates.get("karma_keystone_counter") or Counter(),
+        karma_primary_style_counter=aggregates.get("karma_primary_style_counter") or Counter(),
+        karma_secondary_style_counter=aggregates.get("karma_secondary_style_counter") or Counter(),
+        karma_secondary_keystone_counter=aggregates.get("karma_secondary_keystone_counter") or Counter(),
+        karma_spell_counter=aggregates.get("karma_spell_counter") or Counter(),
+        karma_recent_match_rows=aggregates.get("karma_recent_match_rows") or [],
+        diagnostics=diagnostics,
+    )
+
+
+def match_store_connection() -> sqlite3.Connection | None:
+    if MATCH_STORE.get("disabled"):
+        return None
+    conn = MATCH_STORE.get("conn")
+    if conn is not None:
+        return conn
+    try:
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(MATCH_STORE_PATH), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS matches ("
+            "match_id TEXT PRIMARY KEY, "
+            "payload BLOB NOT NULL, "
+            "stored_at INTEGER NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS player_matches ("
+            "puuid TEXT NOT NULL, "
+            "match_id TEXT NOT NULL, "
+            "match_seq INTEGER NOT NULL, "
+            "PRIMARY KEY (puuid, match_id))"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS player_matches_order ON player_matches (puuid, match_seq DESC)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS match_records ("
+            "match_id TEXT PRIMARY KEY, "
+            "version INTEGER NOT NULL, "
+            "record BLOB NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS match_lanes ("
+            "match_id TEXT PRIMARY KEY, "
+            "version INTEGER NOT NULL, "
+            "record BLOB NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS player_backfill ("
+            "puuid TEXT PRIMARY KEY, "
+            "next_start INTEGER NOT NULL, "
+            "complete INTEGER NOT NULL, "
+            "updated_at INTEGER NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS player_sync ("
+            "puuid TEXT PRIMARY KEY, "
+            "newest_match_id TEXT NOT NULL, "
+            "newest_start_time INTEGER NOT NULL, "
+            "synced_at INTEGER NOT NULL)"
+        )
+        conn.commit()
+    except (sqlite3.Error, OSError):
+        # Read-only or missing disk: keep serving, just without persistence.
+        MATCH_STORE["disabled"] = True
+        return None
+    MATCH_STORE["conn"] = conn
+    return conn
+
+
+def load_stored_matches(match_ids: list[str], diagnostics: list[dict[str, Any]]) -> dict[str, Any]:
+    if not match_ids:
+        return {}
+    results: dict[str, Any] = {}
+    try:
+        with MATCH_STORE_LOCK:
+            conn = match_store_connection()
+            if conn is None:
+                return {}
+            for start in range(0, len(match_ids), 500):
+                chunk = match_ids[start:start + 500]
+                placeholders = ",".join("?" for _ in chunk)
+                rows = conn.execute(
+                    f"SELECT match_id, payload FROM matches WHERE match_id IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for match_id, blob in rows:
+                    results[str(match_id)] = blob
+    except sqlite3.Error as exc:
+        diagnostics.append({"endpoint": "match_store_read", "status": 0, "detail": str(exc)[:180]})
+        return {}
+
+    decoded: dict[str, Any] = {}
+    for match_id, blob in results.items():
+        try:
+            decoded[match_id] = json.loads(zlib.decompress(blob).decode("utf-8"))
+        except (zlib.error, ValueError):
+            continue
+    return decoded
+
+
+def store_matches(payloads: dict[str, Any], diagnostics: list[dict[str, Any]]) -> None:
     now = int(time.time())
-    entry = PLAYER_SUMMARY_CACHE.get(cache_key)
-    if not isinstance(entry, dict):
+    rows = [
+        (
+            match_id,
+            zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), 6),
+            now,
+        )
+        for match_id, payload in payloads.items()
+        if isinstance(payload, dict) and isinstance(payload.get("info"), dict)
+    ]
+    if not rows:
+        return
+    try:
+        with MATCH_STORE_LOCK:
+            conn = match_store_connection()
+            if conn is None:
+                return
+            conn.executemany(
+                "INSERT OR REPLACE INTO matches (match_id, payload, stored_at) VALUES (?, ?, ?)",
+                rows,
+            )
+            conn.commit()
+    except sqlite3.Error as exc:
+        diagnostics.append({"endpoint": "match_store_write", "status": 0, "detail": str(exc)[:180]})
+
+
+# One participant of a match with every field the aggregations read, converted once.
+class ParticipantRow(NamedTuple):
+    puuid: str
+    participant_id: int
+    team_id: int
+    team_position: str
+    role: str
+    champion_id: int
+    champion_name: str
+    win: bool
+    kills: int
+    deaths: int
+    assists: int
+    cs: int
+    gold: int
+    vision_score: int
+    control_wards: int
+    wards_cleared: int
+    ally_utility: int
+    cc_score: int
+    items: tuple[int, ...]
+    summoner1: int
+    summoner2: int
+    primary_style: int
+    primary_perks: tuple[int, ...]
+    secondary_style: int
+    secondary_perks: tuple[int, ...]
+    stat_perks: tuple[int, ...]
+
+
+class MatchRecord(NamedTuple):
+    match_id: str
+    queue_id: int
+    duration_seconds: int
+    start_timestamp: int
+    end_timestamp: int
+    participants: tuple[ParticipantRow, ...]
+    team_kills: dict[int, int]
+    # (team_id, lane) -> index into participants, lane being "UTILITY", "BOTTOM", ...
+    lanes: dict[tuple[int, str], int]
+    players: dict[str, int]
+
+    def player(self, puuid: str) -> ParticipantRow | None:
+        index = self.players.get(puuid)
+        return self.participants[index] if index is not None else None
+
+    def lane_player(self, team_id: int, lane: str) -> ParticipantRow | None:
+        index = self.lanes.get((team_id, lane))
+        return self.participants[index] if index is not None else None
+
+
+LANE_ALIASES = {"SUPPORT": "UTILITY", "BOT": "BOTTOM"}
+
+
+def perk_style_parts(styles: list[Any], index: int) -> tuple[int, tuple[int, ...]]:
+    style = styles[index] if len(styles) > index and isinstance(styles[index], dict) else {}
+    selections = style.get("selections", [])
+    if not isinstance(selections, list):
+        return safe_num(style.get("style")), ()
+    return safe_num(style.get("style")), tuple(safe_num((selection or {}).get("perk")) for selection in selections)
+
+
+def normalize_participant(participant: dict[str, Any]) -> ParticipantRow:
+    perks = participant.get("perks", {})
+    if not isinstance(perks, dict):
+        perks = {}
+    styles = perks.get("styles", [])
+    if not isinstance(styles, list):
+        styles = []
+    primary_style, primary_perks = perk_style_parts(styles, 0)
+    secondary_style, secondary_perks = perk_style_parts(styles, 1)
+    stat_perks = perks.get("statPerks", {}) if isinstance(perks.get("statPerks"), dict) else {}
+    return ParticipantRow(
+        puuid=str(participant.get("puuid", "")),
+        participant_id=safe_num(participant.get("participantId")),
+        team_id=safe_num(participant.get("teamId")),
+        team_position=str(participant.get("teamPosition", "")).upper(),
+        role=str(
+            participant.get("teamPosition")
+            or participant.get("individualPosition")
+            or "UNKNOWN"
+        ).upper(),
+        champion_id=safe_num(participant.get("championId")),
+        champion_name=str(participant.get("championName", "Unknown")),
+        win=bool(participant.get("win")),
+        kills=safe_num(participant.get("kills")),
+        deaths=safe_num(participant.get("deaths")),
+        assists=safe_num(participant.get("assists")),
+        cs=safe_num(participant.get("totalMinionsKilled")) + safe_num(participant.get("neutralMinionsKilled")),
+        gold=safe_num(participant.get("goldEarned")),
+        vision_score=safe_num(participant.get("visionScore")),
+        control_wards=safe_num(
+            participant.get("detectorWardsPlaced")
+            or participant.get("visionWardsBoughtInGame")
+        ),
+        wards_cleared=safe_num(participant.get("wardsKilled")),
+        ally_utility=(
+            safe_num(participant.get("totalHealsOnTeammates"))
+            + safe_num(participant.get("totalDamageShieldedOnTeammates"))
+        ),
+        cc_score=safe_num(participant.get("timeCCingOthers")),
+        items=tuple(safe_num(participant.get(f"item{slot}")) for slot in range(7)),
+        summoner1=safe_num(participant.get("summoner1Id")),
+        summoner2=safe_num(participant.get("summoner2Id")),
+        primary_style=primary_style,
+        primary_perks=primary_perks,
+        secondary_style=secondary_style,
+        secondary_perks=secondary_perks,
+        stat_perks=(
+            safe_num(stat_perks.get("offense")),
+            safe_num(stat_perks.get("flex")),
+            safe_num(stat_perks.get("defense")),
+        ),
+    )
+
+
+def build_match_record(
+    match_id: str,
+    queue_id: int,
+    duration_seconds: int,
+    start_timestamp: int,
+    end_timestamp: int,
+    participants: tuple[ParticipantRow, ...],
+) -> MatchRecord:
+    team_kills: dict[int, int] = {}
+    lanes: dict[tuple[int, str], int] = {}
+    players: dict[str, int] = {}
+    for index, row in enumerate(participants):
+        team_kills[row.team_id] = team_kills.get(row.team_id, 0) + row.kills
+        lanes.setdefault((row.team_id, LANE_ALIASES.get(row.team_position, row.team_position)), index)
+        if row.puuid:
+            players.setdefault(row.puuid, index)
+    return MatchRecord(
+        match_id=match_id,
+        queue_id=queue_id,
+        duration_seconds=duration_seconds,
+        start_timestamp=start_timestamp,
+        end_timestamp=end_timestamp,
+        participants=participants,
+        team_kills=team_kills,
+        lanes=lanes,
+        players=players,
+    )
+
+
+def normalize_match(match_id: str, match: dict[str, Any]) -> MatchRecord | None:
+    info = match.get("info") if isinstance(match, dict) else None
+    if not isinstance(info, dict):
         return None
-    fetched_at = safe_int_text(entry.get("fetched_at", 0))
-    if fetched_at <= 0 or (now - fetched_at) > PLAYER_SUMMARY_CACHE_SECONDS:
-        PLAYER_SUMMARY_CACHE.pop(cache_key, None)
+    participants = info.get("participants", [])
+    if not isinstance(participants, list):
+        participants = []
+    return build_match_record(
+        match_id,
+        safe_num(info.get("queueId")),
+        safe_num(info.get("gameDuration")),
+        safe_num(info.get("gameStartTimestamp") or info.get("gameCreation")),
+        safe_num(info.get("gameEndTimestamp")),
+        tuple(normalize_participant(p) for p in participants if isinstance(p, dict)),
+    )
+
+
+def encode_match_record(record: MatchRecord) -> bytes:
+    # Indexes are rebuilt on load, so only the header fields and participant rows are stored.
+    document = [
+        record.match_id,
+        record.queue_id,
+        record.duration_seconds,
+        record.start_timestamp,
+        record.end_timestamp,
+        record.participants,
+    ]
+    return zlib.compress(json.dumps(document, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def decode_match_record(blob: bytes) -> MatchRecord | None:
+    try:
+        match_id, queue_id, duration, start_ts, end_ts, rows = json.loads(zlib.decompress(blob).decode("utf-8"))
+        participants = tuple(
+            ParticipantRow(*[tuple(value) if isinstance(value, list) else value for value in row])
+            for row in rows
+        )
+    except (zlib.error, ValueError, TypeError):
+        return None
+    return build_match_record(str(match_id), queue_id, duration, start_ts, end_ts, participants)
+
+
+def load_match_records(match_ids: list[str], diagnostics: list[dict[str, Any]]) -> dict[str, MatchRecord]:
+    records: dict[str, MatchRecord] = {}
+    missing: list[str] = []
+    for match_id in match_ids:
+        record = MATCH_RECORD_CACHE.get(match_id)
+        if isinstance(record, MatchRecord):
+            records[match_id] = record
+        else:
+            missing.append(match_id)
+    if not missing:
+        return records
+
+    blobs: list[tuple[str, bytes]] = []
+    try:
+        with MATCH_STORE_LOCK:
+            conn = match_store_connection()
+            if conn is None:
+                return records
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                placeholders = ",".join("?" for _ in chunk)
+                blobs.extend(
+                    conn.execute(
+                        f"SELECT match_id, record FROM match_records WHERE version = ? AND match_id IN ({placeholders})",
+                        [MATCH_RECORD_VERSION, *chunk],
+                    ).fetchall()
+                )
+    except sqlite3.Error as exc:
+        diagnostics.append({"endpoint": "match_record_read", "status": 0, "detail": str(exc)[:180]})
+        return records
+
+    for match_id, blob in blobs:
+        record = decode_match_record(blob)
+        if record is not None:
+            MATCH_RECORD_CACHE.set(str(match_id), record)
+            records[str(match_id)] = record
+    return records
+
+
+def save_match_records(payloads: dict[str, Any], diagnostics: list[dict[str, Any]]) -> dict[str, MatchRecord]:
+    records: dict[str, MatchRecord] = {}
+    for match_id, payload in payloads.items():
+        record = normalize_match(match_id, payload)
+        if record is not None:
+            records[match_id] = record
+            MATCH_RECORD_CACHE.set(match_id, record)
+    if not records:
+        return records
+    try:
+        with MATCH_STORE_LOCK:
+            conn = match_store_connection()
+            if conn is None:
+                return records
+            conn.executemany(
+                "INSERT OR REPLACE INTO match_records (match_id, version, record) VALUES (?, ?, ?)",
+                [
+                    (match_id, MATCH_RECORD_VERSION, encode_match_record(record))
+                    for match_id, record in records.items()
+                ],
+            )
+            conn.commit()
+    except sqlite3.Error as exc:
+        diagnostics.append({"endpoint": "match_record_write", "status": 0, "detail": str(exc)[:180]})
+    return records
+
+
+class LaneKill(NamedTuple):
+    timestamp: int
+    killer_id: int
+    victim_id: int
+    assisting_ids: tuple[int, ...]
+
+
+# The lane-phase slice of a match timeline: champion kills up to 14:00 and the last frame at or
+# before 14:00 as (participantId, totalGold, xp) rows. This is all the timeline metrics read.
+class LaneRecord(NamedTuple):
+    kills: tuple[LaneKill, ...]
+    frame14: tuple[tuple[int, int, int], ...]
+
+    def metrics(self, participant_id: int, opponent_id: int) -> tuple[dict[str, Any], bool]:
+        assists_14 = 0
+        deaths_14 = 0
+        first_death_min = 0.0
+        for kill in self.kills:
+            if kill.victim_id == participant_id:
+                deaths_14 += 1
+                if first_death_min <= 0:
+                    first_death_min = round(kill.timestamp / 60000, 1)
+            if participant_id in kill.assisting_ids:
+                assists_14 += 1
+
+        gold_diff_14 = 0
+        xp_diff_14 = 0
+        has_diff = bool(self.frame14) and participant_id > 0 and opponent_id > 0
+        if has_diff:
+            stats = {row[0]: row for row in self.frame14}
+            _pid, my_gold, my_xp = stats.get(participant_id, (0, 0, 0))
+            _pid, opp_gold, opp_xp = stats.get(opponent_id, (0, 0, 0))
+            gold_diff_14 = my_gold - opp_gold
+            xp_diff_14 = my_xp - opp_xp
+        return (
+            {
+                "assists14": assists_14,
+                "deaths14": deaths_14,
+                "firstDeathMin": first_death_min,
+                "goldDiff14": gold_diff_14,
+                "xpDiff14": xp_diff_14,
+            },
+            has_diff,
+        )
+
+
+def lane_record_from_frames(frames: list[Any]) -> LaneRecord:
+    kills: list[LaneKill] = []
+    frame14: tuple[tuple[int, int, int], ...] = ()
+    for frame in frames:
+        events = frame.get("events", [])
+        for event in events if isinstance(events, list) else []:
+            if not isinstance(event, dict) or event.get("type") != "CHAMPION_KILL":
+                continue
+            assisting = event.get("assistingParticipantIds", [])
+            kills.append(
+                LaneKill(
+                    safe_num(event.get("timestamp")),
+                    safe_num(event.get("killerId")),
+                    safe_num(event.get("victimId")),
+                    tuple(safe_num(x) for x in assisting) if isinstance(assisting, list) else (),
+                )
+            )
+        pframes = frame.get("participantFrames", {})
+        if isinstance(pframes, dict):
+            frame14 = tuple(
+                (safe_num(key), safe_num(row.get("totalGold")), safe_num(row.get("xp")))
+                for key, row in pframes.items()
+                if isinstance(row, dict)
+            )
+    return LaneRecord(tuple(kills), frame14)
+
+
+# Push-style timeline reader: feed() it body chunks as they arrive; it stops asking for more as soon
+# as a frame past 14:00 shows up, so later frames are never parsed or read off the socket.
+class LaneRecordParser:
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._in_frames = False
+        self._frames: list[dict[str, Any]] = []
+        self._record: LaneRecord | None = None
+
+    # Returns True once the lane phase is complete and the rest of the body can be dropped.
+    def feed(self, chunk: bytes) -> bool:
+        if self._record is not None:
+            return True
+        buffer = self._buffer[self._pos:] + self._text_decoder.decode(chunk)
+        pos = 0
+        if not self._in_frames:
+            found = TIMELINE_FRAMES_PATTERN.search(buffer)
+            if found is None:
+                # Keep a short tail in case the key straddles two chunks.
+                self._buffer, self._pos = buffer, max(0, len(buffer) - 32)
+                return False
+            self._in_frames = True
+            pos = found.end()
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == "]":
+                self._record = lane_record_from_frames(self._frames)
+                return True
+            try:
+                frame, pos_end = self._decoder.raw_decode(buffer, pos)
+            except ValueError:
+                # The frame continues in the next chunk.
+                break
+            pos = pos_end
+            if not isinstance(frame, dict):
+                continue
+            if safe_num(frame.get("timestamp")) > LANE_PHASE_END_MS:
+                self._record = lane_record_from_frames(self._frames)
+                return True
+            self._frames.append(frame)
+        self._buffer, self._pos = buffer, pos
+        return False
+
+    # None for a truncated or malformed timeline: nothing trustworthy to keep.
+    def result(self) -> LaneRecord | None:
+        return self._record
+
+
+def encode_lane_record(record: LaneRecord) -> bytes:
+    return json.dumps([record.kills, record.frame14], separators=(",", ":")).encode("utf-8")
+
+
+def decode_lane_record(blob: bytes) -> LaneRecord | None:
+    try:
+        kills, frame14 = json.loads(blob.decode("utf-8"))
+        return LaneRecord(
+            tuple(LaneKill(ts, killer, victim, tuple(assisting)) for ts, killer, victim, assisting in kills),
+            tuple((pid, gold, xp) for pid, gold, xp in frame14),
+        )
+    except (ValueError, TypeError):
         return None
-    payload = entry.get("payload")
-    return payload if isinstance(payload, dict) else None
 
 
-def set_player_summary_cache(cache_key: str, payload: dict[str, Any]) -> None:
-    PLAYER_SUMMARY_CACHE[cache_key] = {
-        "fetched_at": int(time.time()),
-        "payload": payload,
-    }
+def load_lane_records(match_ids: list[str], diagnostics: list[dict[str, Any]]) -> dict[str, LaneRecord]:
+    blobs: list[tuple[str, bytes]] = []
+    try:
+        with MATCH_STORE_LOCK:
+            conn = match_store_connection()
+            if conn is None:
+                return {}
+            for start in range(0, len(match_ids), 500):
+                chunk = match_ids[start:start + 500]
+                placeholders = ",".join("?" for _ in chunk)
+                blobs.extend(
+                    conn.execute(
+                        f"SELECT match_id, record FROM match_lanes WHERE version = ? AND match_id IN ({placeholders})",
+                        [LANE_RECORD_VERSION, *chunk],
+                    ).fetchall()
+                )
+    except sqlite3.Error as exc:
+        diagnostics.append({"endpoint": "lane_record_read", "status": 0, "detail": str(exc)[:180]})
+        return {}
+
+    records: dict[str, LaneRecord] = {}
+    for match_id, blob in blobs:
+        record = decode_lane_record(blob)
+        if record is not None:
+            records[str(match_id)] = record
+    return records
+
+
+def save_lane_records(records: dict[str, LaneRecord], diagnostics: list[dict[str, Any]]) -> None:
+    if not records:
+        return
+    try:
+        with MATCH_STORE_LOCK:
+            conn = match_store_connection()
+            if conn is None:
+                return
+            conn.executemany(
+                "INSERT OR REPLACE INTO match_lanes (match_id, version, record) VALUES (?, ?, ?)",
+                [
+                    (match_id, LANE_RECORD_VERSION, encode_lane_record(record))
+                    for match_id, record in records.items()
+                ],
+            )
+            conn.commit()
+    except sqlite3.Error as exc:
+        diagnostics.append({"endpoint": "lane_record_write", "status": 0, "detail": str(exc)[:180]})
+
+
+def lane_record_fetchable(match_ids: list[str]) -> list[str]:
+    now = time.monotonic()
+    with LANE_RECORD_FAILURES_LOCK:
+        for match_id, retry_at in list(LANE_RECORD_FAILURES.items()):
+            if retry_at <= now:
+                del LANE_RECORD_FAILURES[match_id]
+        return [match_id for match_id in match_ids if match_id not in LANE_RECORD_FAILURES]
+
+
+def mark_lane_records_failed(match_ids: list[str]) -> None:
+    if not match_ids:
+        return
+    retry_at = time.monotonic() + LANE_RECORD_RETRY_SECONDS
+    with LANE_RECORD_FAILURES_LOCK:
+        for match_id in match_ids:
+            LANE_RECORD_FAILURES[match_id] = retry_at
+
+
+# Timelines are downloaded (and parsed up to 14:00) at most once per match; afterwards the
+# stored lane record answers every timeline metric.
+def get_lane_records(
+    *,
+    routing: str,
+    match_ids: list[str],
+    api_key: str,
+    diagnostics: list[dict[str, Any]],
+    priority: int | None = None,
+) -> dict[str, LaneRecord]:
+    records = load_lane_records(match_ids, diagnostics)
+    missing = lane_record_fetchable([match_id for match_id in match_ids if match_id not in records])
+    fetched = parallel_riot_fetch_json(
+        requests=[
+            (
+                match_id,
+                f"https://{routing}.api.riotgames.com/lol/match/v5/matches/{match_id}/timeline",
+                "match_timeline",
+            )
+            for match_id in missing
+        ],
+        api_key=api_key,
+        diagnostics=diagnostics,
+        fallback=None,
+        priority=priority,
+        consumer=LaneRecordParser,
+    )
+    fetched_records = {
+        match_id: record for match_id, record in fetched.items() if isinstance(record, LaneRecord)
+    }
+    save_lane_records(fetched_records, diagnostics)
+    mark_lane_records_failed([match_id for match_id in missing if match_id not in fetched_records])
+    records.update(fetched_records)
+    return records
+
+
+class LaneRecordFetcher:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._queue: queue.Queue[tuple[str, list[str], str]] = queue.Queue()
+        self._pending: set[str] = set()
+        self._thread: threading.Thread | None = None
+
+    def request(self, routing: str, match_ids: list[str], api_key: str) -> None:
+        with self._lock:
+            fresh = [match_id for match_id in match_ids if match_id not in self._pending]
+            if not fresh:
+                return
+            self._pending.update(fresh)
+            self._queue.put((routing, fresh, api_key))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="lane-records", daemon=True)
+                self._thread.start()
+
+    def pending(self, match_ids: list[str]) -> int:
+        with self._lock:
+            return sum(1 for match_id in match_ids if match_id in self._pending)
+
+    def _run(self) -> None:
+        while True:
+            routing, match_ids, api_key = self._queue.get()
+            diagnostics: list[dict[str, Any]] = []
+            try:
+                get_lane_records(routing=routing, match_ids=match_ids, api_key=api_key, diagnostics=diagnostics)
+            except Exception as exc:
+                print(f"Lane record fetch stopped: {type(exc).__name__}: {str(exc)[:150]}")
+            finally:
+                with self._lock:
+                    self._pending.difference_update(match_ids)
+
+
+LANE_RECORD_FETCHER = LaneRecordFetcher()
+
+
+# Per-game metrics for one player as parallel float columns, newest game first, so a window
+# like "last 15 games" is a prefix and every aggregate is a reduction over a slice.
+class PlayerGameColumns:
+    NAMES = (
+        "win",
+        "kills",
+        "deaths",
+        "assists",
+        "cs",
+        "kill_participation",
+        "vision_score",
+        "vision_per_min",
+        "control_wards",
+        "wards_cleared",
+        "ally_utility",
+        "cc_score",
+        "is_support",
+        "is_karma",
+        "is_benchmark_karma",
+        "enemy_support_id",
+        "enemy_bot_id",
+    )
+
+    def __init__(self) -> None:
+        self.columns: dict[str, array] = {name: array("d") for name in self.NAMES}
+        self.match_ids: list[str] = []
+        self.roles: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.match_ids)
+
+    def append(self, match_id: str, role: str, values: dict[str, float]) -> None:
+        self.match_ids.append(match_id)
+        self.roles.append(role)
+        for name, column in self.columns.items():
+            column.append(float(values.get(name, 0)))
+
+    def _size(self, last: int | None) -> int:
+        return len(self) if last is None else max(0, min(last, len(self)))
+
+    def _select(self, name: str, last: int | None, where: str | None) -> Any:
+        size = self._size(last)
+        if np is not None:
+            values = np.array(self.columns[name][:size], dtype=np.float64)
+            if where is not None:
+                values = values[np.array(self.columns[where][:size], dtype=np.float64) != 0]
+            return values
+        values = self.columns[name][:size]
+        if where is not None:
+            return array("d", itertools.compress(values, self.columns[where][:size]))
+        return values
+
+    def total(self, name: str, *, last: int | None = None, where: str | None = None) -> float:
+        values = self._select(name, last, where)
+        return float(values.sum()) if np is not None else float(sum(values))
+
+    def values(self, name: str, *, last: int | None = None, where: str | None = None) -> list[float]:
+        return [float(value) for value in self._select(name, last, where)]
+
+    def count(self, where: str, *, last: int | None = None) -> int:
+        # Mask columns hold 0/1, so their total is the number of matching games.
+        return int(self.total(where, last=last))
+
+    def role_counts(self, *, last: int | None = None) -> Counter[str]:
+        return Counter(self.roles[:self._size(last)])
+
+    def group_totals(
+        self,
+        keys: tuple[str, str],
+        names: tuple[str, ...],
+        *,
+        last: int | None = None,
+        where: str | None = None,
+    ) -> list[tuple[tuple[int, int], int, dict[str, float]]]:
+        # (key pair, games, {name: total}) per group, in order of each group's first game.
+        key_a = self._select(keys[0], last, where)
+        key_b = self._select(keys[1], last, where)
+        if len(key_a) == 0:
+            return []
+        columns = {name: self._select(name, last, where) for name in names}
+        if np is not None:
+            groups, first_index, inverse, counts = np.unique(
+                np.stack([key_a, key_b], axis=1),
+                axis=0,
+                return_index=True,
+                return_inverse=True,
+                return_counts=True,
+            )
+            inverse = inverse.reshape(-1)
+            sums = {
+                name: np.bincount(inverse, weights=values, minlength=len(groups))
+                for name, values in columns.items()
+            }
+            return [
+                (
+                    (int(groups[group][0]), int(groups[group][1])),
+                    int(counts[group]),
+                    {name: float(sums[name][group]) for name in names},
+                )
+                for group in np.argsort(first_index, kind="stable")
+            ]
+
+        grouped: dict[tuple[int, int], list[Any]] = {}
+        for index, key in enumerate(zip(key_a, key_b)):
+            group = grouped.setdefault((int(key[0]), int(key[1])), [0, {name: 0.0 for name in names}])
+            group[0] += 1
+            for name, values in columns.items():
+                group[1][name] += values[index]
+        return [(key, games, totals) for key, (games, totals) in grouped.items()]
+
+
+def game_metric_values(
+    record: MatchRecord,
+    participant: ParticipantRow,
+    enemy_names: dict[int, str] | None = None,
+) -> dict[str, float]:
+    # One PlayerGameColumns row; enemy lane champions are only tracked for Karma games.
+    team_kills = record.team_kills.get(participant.team_id, 0)
+    kill_participation = (
+        round(((participant.kills + participant.assists) * 100 / team_kills), 1) if team_kills > 0 else 0.0
+    )
+    duration_minutes = max(round(record.duration_seconds / 60, 1), 0.1)
+    is_karma = participant.champion_id == KARMA_CHAMPION_ID or participant.champion_name.lower() == "karma"
+    is_support = is_support_role(participant.role)
+    enemy_support_id = 0
+    enemy_bot_id = 0
+    if is_karma:
+        enemy_team_id = 200 if participant.team_id == 100 else 100
+        enemy_support = record.lane_player(enemy_team_id, "UTILITY")
+        enemy_bot = record.lane_player(enemy_team_id, "BOTTOM")
+        enemy_support_id = enemy_support.champion_id if enemy_support else 0
+        enemy_bot_id = enemy_bot.champion_id if enemy_bot else 0
+        if enemy_names is not None:
+            if enemy_support:
+                enemy_names.setdefault(enemy_support_id, enemy_support.champion_name)
+            if enemy_bot:
+                enemy_names.setdefault(enemy_bot_id, enemy_bot.champion_name)
+    return {
+        "win": 1 if participant.win else 0,
+        "kills": participant.kills,
+        "deaths": participant.deaths,
+        "assists": participant.assists,
+        "cs": participant.cs,
+        "kill_participation": kill_participation,
+        "vision_score": participant.vision_score,
+        "vision_per_min": participant.vision_score / duration_minutes,
+        "control_wards": participant.control_wards,
+        "wards_cleared": participant.wards_cleared,
+        "ally_utility": participant.ally_utility,
+        "cc_score": participant.cc_score,
+        "is_support": 1 if is_support else 0,
+        "is_karma": 1 if is_karma else 0,
+        "is_benchmark_karma": 1 if is_karma and is_support and record.queue_id == LANE_BENCHMARK_QUEUE_ID else 0,
+        "enemy_support_id": enemy_support_id,
+        "enemy_bot_id": enemy_bot_id,
+    }
+
+
+def get_match_records(
+    *,
+    routing: str,
+    match_ids: list[str],
+    api_key: str,
+    diagnostics: list[dict[str, Any]],
+) -> dict[str, MatchRecord]:
+    # Normalized records first; raw payloads are only decoded or downloaded for matches without one.
+    match_records = load_match_records(match_ids, diagnostics)
+    unrecorded_ids = [match_id for match_id in match_ids if match_id not in match_records]
+    match_payloads = load_stored_matches(unrecorded_ids, diagnostics)
+    match_requests = [
+        (
+            match_id,
+            f"https://{routing}.api.riotgames.com/lol/match/v5/matches/{match_id}",
+            "match_detail",
+        )
+        for match_id in unrecorded_ids
+        if match_id not in match_payloads
+    ]
+    fetched_payloads = parallel_riot_fetch_json(
+        requests=match_requests,
+        api_key=api_key,
+        diagnostics=diagnostics,
+        fallback={},
+    )
+    store_matches(fetched_payloads, diagnostics)
+    match_payloads.update(fetched_payloads)
+    match_records.update(save_match_records(match_payloads, diagnostics))
+    return match_records
+
+
+def recent_match_row(
+    match_id: str,
+    record: MatchRecord,
+    participant: ParticipantRow,
+    kill_participation: float,
+) -> dict[str, Any]:
+    return {
+        "matchId": match_id,
+        "championId": participant.champion_id,
+        "champion": participant.champion_name,
+        "queue": record.queue_id,
+        "result": "Win" if participant.win else "Loss",
+        "kills": participant.kills,
+        "deaths": participant.deaths,
+        "assists": participant.assists,
+        "cs": participant.cs,
+        "gold": participant.gold,
+        "durationMin": round(record.duration_seconds / 60, 1),
+        "role": participant.role,
+        "killParticipation": kill_participation,
+        "visionScore": participant.vision_score,
+        "controlWards": participant.control_wards,
+        "wardsCleared": participant.wards_cleared,
+        "allyUtility": participant.ally_utility,
+        "ccScore": participant.cc_score,
+    }
+
+
+def riot_account_url(routing: str, game_name: str, tag_line: str) -> str:
+    return (
+        f"https://{routing}.api.riotgames.com/riot/account/v1/accounts"
+        f"/by-riot-id/{urllib.parse.quote(game_name, safe='')}/{urllib.parse.quote(tag_line, safe='')}"
+    )
+
+
+def is_valid_puuid(puuid: str) -> bool:
+    return bool(PUUID_PATTERN.fullmatch(puuid))
+
+
+# The PUUID behind a player query: taken from the cached summary when there is one, otherwise from
+# the account lookup. Never from the client, so callers cannot point Riot calls at other paths.
+def resolve_player_puuid(request: dict[str, Any], api_key: str) -> str:
+    cache_key, _summary_args = summary_request_args(request, api_key)
+    cached_payload, _is_fresh = get_player_summary_cache(cache_key)
+    player = cached_payload.get("player") if cached_payload else None
+    puuid = str(player.get("puuid", "")).strip() if isinstance(player, dict) else ""
+    if not puuid:
+        routing = PLATFORM_TO_ROUTING[request["platform"]]
+        account_url = riot_account_url(routing, request["game_name"], request["tag_line"])
+        account = scheduled_riot_get_json(account_url, api_key, "account_by_riot_id")
+        puuid = str(account.get("puuid", "")).strip() if isinstance(account, dict) else ""
+    if not is_valid_puuid(puuid):
+        raise ValueError("Riot account lookup returned no usable puuid.")
+    return puuid
+
+
+def player_match_page(
+    *,
+    routing: str,
+    puuid: str,
+    cursor: str,
+    limit: int,
+    api_key: str,
+    diagnostics: list[dict[str, Any]],
+) -> dict[str, Any]:
+    # The cursor is the last match ID the client already shows; the page is the next `limit`
+    # older games, so a page costs `limit` record lookups no matter how deep it is.
+    before_seq = match_sequence(cursor) if cursor else 0
+    match_ids = load_player_match_ids(puuid, limit, before_seq)
+    has_more = False
+    if len(match_ids) < limit and not load_backfill_state(puuid).get("complete"):
+        # The store does not reach this far back yet; ask Riot for the games before the cursor.
+        start = 0
+        end_time = 0
+        if cursor:
+            cursor_record = get_match_records(
+                routing=routing, match_ids=[cursor], api_key=api_key, diagnostics=diagnostics
+            ).get(cursor)
+            if cursor_record is not None and cursor_record.start_timestamp > 0:
+                end_time = cursor_record.start_timestamp // 1000
+            else:
+                # No start time for the cursor: skip the games known to be at or after it instead.
+                start = count_player_match_ids(puuid, before_seq)
+        ids_url = (
+            f"https://{routing}.api.riotgames.com/lol/match/v5/matches/by-puuid/"
+            f"{urllib.parse.quote(puuid, safe='')}/ids?start={start}&count={limit + 1}"
+        )
+        if end_time > 0:
+            ids_url += f"&endTime={end_time}"
+        fetched_ids = optional_riot_get_json(ids_url, api_key, "match_ids", fallback=None, diagnostics=diagnostics)
+        if isinstance(fetched_ids, list):
+            merge_player_match_ids(puuid, [str(match_id).strip() for match_id in fetched_ids if str(match_id).strip()])
+            match_ids = load_player_match_ids(puuid, limit, before_seq)
+            if cursor and end_time <= 0 and len(fetched_ids) > limit:
+                # An offset page can overlap games newer than the cursor; Riot still has more.
+                has_more = True
+        else:
+            # Riot did not answer, which is not the end of the history; the client can retry.
+            has_more = True
+
+    match_records = get_match_records(routing=routing, match_ids=match_ids, api_key=api_key, diagnostics=diagnostics)
+    rows: list[dict[str, Any]] = []
+    next_cursor = cursor if match_ids or has_more else ""
+    for match_id in match_ids:
+        record = match_records.get(match_id)
+        if record is None:
+            # Stop before a game that failed to load so the next page retries it instead of skipping it.
+            has_more = True
+            break
+        next_cursor = match_id
+        participant = record.player(puuid)
+        if participant is None:
+            continue
+        metric_values = game_metric_values(record, participant)
+        rows.append(recent_match_row(match_id, record, participant, metric_values["kill_participation"]))
+    return {
+        "matches": rows,
+        "nextCursor": next_cursor,
+        "hasMore": has_more or len(match_ids) >= limit,
+    }
+
+
+def match_sequence(match_id: str) -> int:
+    # Match IDs are "<PLATFORM>_<n>" with n increasing over time on each platform.
+    return safe_int_text(str(match_id).rsplit("_", 1)[-1])
+
+
+def load_player_match_ids(puuid: str, limit: int, before_seq: int = 0) -> list[str]:
+    # before_seq > 0 pages backwards: only games older than that match sequence are returned.
+    try:
+        with MATCH_STORE_LOCK:
+            conn = match_store_connection()
+            if conn is None:
+                return []
+            if before_seq > 0:
+                rows = conn.execute(
+                    "SELECT match_id FROM player_matches WHERE puuid = ? AND match_seq < ? "
+                    "ORDER BY match_seq DESC LIMIT ?",
+                    (puuid, before_seq, max(0, limit)),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT match_id FROM player_matches WHERE puuid = ? ORDER BY match_seq DESC LIMIT ?",
+                    (puuid, max(0, limit)),
+                ).fetchall()
+    except sqlite3.Error:
+        return []
+    return [str(row[0]) for row in rows]
+
+
+def count_player_match_ids(puuid: str, min_seq: int) -> int:
+    try:
+        with MATCH_STORE_LOCK:
+            conn = match_store_connection()
+            if conn is None:
+                return 0
+            row = conn.execute(
+                "SELECT COUNT(*) FROM player_matches WHERE puuid = ? AND match_seq >= ?",
+                (puuid, min_seq),
+            ).fetchone()
+    except sqlite3.Error:
+        return 0
+    return safe_num(row[0]) if row else 0
+
+
+def merge_player_match_ids(puuid: str, match_ids: list[str]) -> None:
+    if not match_ids:
+        return
+    try:
+        with MATCH_STORE_LOCK:
+            conn = match_store_connection()
+            if conn is None:
+                return
+            conn.executemany(
+                "INSERT OR IGNORE INTO player_matches (puuid, match_id, match_seq) VALUES (?, ?, ?)",
+                [(puuid, match_id, match_sequence(match_id)) for match_id in match_ids],
+            )
+            conn.commit()
+    except sqlite3.Error:
+        return
+
+
+def load_player_sync_state(puuid: str) -> dict[str, Any]:
+    try:
+        with MATCH_STORE_LOCK:
+            conn = match_store_connection()
+            if conn is None:
+                return {}
+            row = conn.execute(
+                "SELECT newest_match_id, newest_start_time, synced_at FROM player_sync WHERE puuid = ?",
+                (puuid,),
+            ).fetchone()
+    except sqlite3.Error:
+        return {}
+    if not row:
+        return {}
+    return {
+        "newest_match_id": str(row[0]),
+        "newest_start_time": safe_num(row[1]),
+        "synced_at": safe_num(row[2]),
+    }
+
+
+def update_player_sync_state(puuid: str, match_ids: list[str], match_records: dict[str, MatchRecord]) -> None:
+    newest_id = ""
+    newest_start = 0
+    for match_id in match_ids:
+        record = match_records.get(match_id)
+        if record is None:
+            continue
+        start_ms = record.start_timestamp
+        if start_ms // 1000 > newest_start:
+            newest_start = start_ms // 1000
+            newest_id = match_id
+    if newest_start <= 0:
+        return
+
+    state = load_player_sync_state(puuid)
+    if safe_num(state.get("newest_start_time")) > newest_start:
+        return
+    try:
+        with MATCH_STORE_LOCK:
+            conn = match_store_connection()
+            if conn is None:
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO player_sync (puuid, newest_match_id, newest_start_time, synced_at) "
+                "VALUES (?, ?, ?, ?)",
+                (puuid, newest_id, newest_start, int(time.time())),
+            )
+            conn.commit()
+    except sqlite3.Error:
+        return
+
+
+def sync_player_match_ids(
+    *,
+    routing: str,
+    puuid: str,
+    count: int,
+    api_key: str,
+    diagnostics: list[dict[str, Any]],
+) -> list[str]:
+    known_ids = load_player_match_ids(puuid, count)
+    sync_state = load_player_sync_state(puuid)
+    newest_start = safe_num(sync_state.get("newest_start_time"))
+    ids_base = f"https://{routing}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids"
+
+    if newest_start > 0 and len(known_ids) >= count:
+        # Steady state: only ask for games that started at or after the newest stored one.
+        ids_url = f"{ids_base}?startTime={newest_start}&start=0&count=100"
+    else:
+        ids_url = f"{ids_base}?start=0&count={count}"
+
+    fetched_ids = optional_riot_get_json(
+        ids_url,
+        api_key,
+        "match_ids",
+        fallback=None,
+        diagnostics=diagnostics,
+    )
+    if not isinstance(fetched_ids, list):
+        return known_ids
+    fetched_ids = [str(match_id).strip() for match_id in fetched_ids if str(match_id).strip()]
+    merge_player_match_ids(puuid, fetched_ids)
 
-    # Opportunistic cleanup to prevent unbounded growth.
-    stale_keys: list[str] = []
-    now = int(time.time())
-    for key, entry in PLAYER_SUMMARY_CACHE.items():
-        fetched_at = safe_int_text((entry or {}).get("fetched_at", 0))
-        if fetched_at <= 0 or (now - fetched_at) > PLAYER_SUMMARY_CACHE_SECONDS:
-            stale_keys.append(key)
-    for key in stale_keys:
-        PLAYER_SUMMARY_CACHE.pop(key, None)
+    merged = load_player_match_ids(puuid, count)
+    if merged:
+        return merged
+    # Store unavailable: fall back to the live ID list.
+    return sorted(set(fetched_ids) | set(known_ids), key=match_sequence, reverse=True)[:count]
 
 
 def parallel_riot_fetch_json(
@@ -231,41 +2840,39 @@ def parallel_riot_fetch_json(
     api_key: str,
     diagnostics: list[dict[str, Any]],
     fallback: Any,
-    max_workers: int,
+    priority: int | None = None,
+    consumer: Any = None,
 ) -> dict[str, Any]:
     if not requests:
         return {}
 
     results: dict[str, Any] = {}
-    worker_count = max(1, min(max_workers, len(requests)))
-    with ThreadPoolExecutor(max_workers=worker_count) as executor:
-        future_map = {
-            executor.submit(riot_get_json, url, api_key, endpoint): (request_id, endpoint, url)
-            for request_id, url, endpoint in requests
-        }
-        for future in as_completed(future_map):
-            request_id, endpoint, url = future_map[future]
-            try:
-                results[request_id] = future.result()
-            except RiotApiError as exc:
-                diagnostics.append(
-                    {
-                        "endpoint": endpoint,
-                        "status": exc.status,
-                        "detail": exc.detail[:180],
-                    }
-                )
-                results[request_id] = fallback
-            except Exception as exc:
-                diagnostics.append(
-                    {
-                        "endpoint": endpoint,
-                        "status": 0,
-                        "detail": f"{type(exc).__name__}: {str(exc)[:150]}",
-                        "url": url[:120],
-                    }
-                )
-                results[request_id] = fallback
+    future_rows = [
+        (request_id, endpoint, url, submit_riot_get_json(url, api_key, endpoint, priority, consumer))
+        for request_id, url, endpoint in requests
+    ]
+    for request_id, endpoint, url, future in future_rows:
+        try:
+            results[request_id] = future.result()
+        except RiotApiError as exc:
+            diagnostics.append(
+                {
+                    "endpoint": endpoint,
+                    "status": exc.status,
+                    "detail": exc.detail[:180],
+                }
+            )
+            results[request_id] = fallback
+        except Exception as exc:
+            diagnostics.append(
+                {
+                    "endpoint": endpoint,
+                    "status": 0,
+                    "detail": f"{type(exc).__name__}: {str(exc)[:150]}",
+                    "url": url[:120],
+                }
+            )
+            results[request_id] = fallback
     return results
 
 
@@ -274,30 +2881,261 @@ def is_support_role(role: str) -> bool:
     return role_upper in {"UTILITY", "SUPPORT"}
 
 
-def http_get_json(url: str, endpoint: str) -> Any:
-    request = urllib.request.Request(
-        url,
-        headers={
-            "Accept": "application/json",
-            "User-Agent": RIOT_HTTP_HEADERS["User-Agent"],
-            "Accept-Language": RIOT_HTTP_HEADERS["Accept-Language"],
-        },
-    )
+def load_backfill_state(puuid: str) -> dict[str, Any]:
     try:
-        with urllib.request.urlopen(request, timeout=14) as response:
-            return json.loads(response.read().decode("utf-8"))
-    except urllib.error.HTTPError as exc:
+        with MATCH_STORE_LOCK:
+            conn = match_store_connection()
+            if conn is None:
+                return {}
+            row = conn.execute(
+                "SELECT next_start, complete, updated_at FROM player_backfill WHERE puuid = ?",
+                (puuid,),
+            ).fetchone()
+    except sqlite3.Error:
+        return {}
+    if not row:
+        return {}
+    return {"next_start": safe_num(row[0]), "complete": bool(row[1]), "updated_at": safe_num(row[2])}
+
+
+def save_backfill_state(puuid: str, next_start: int, complete: bool) -> None:
+    try:
+        with MATCH_STORE_LOCK:
+            conn = match_store_connection()
+            if conn is None:
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO player_backfill (puuid, next_start, complete, updated_at) VALUES (?, ?, ?, ?)",
+                (puuid, next_start, 1 if complete else 0, int(time.time())),
+            )
+            conn.commit()
+    except sqlite3.Error:
+        return
+
+
+def wait_for_backfill_headroom(routing: str, method: str) -> None:
+    host = f"{routing}.api.riotgames.com"
+    while RIOT_RATE_LIMITER.headroom(host, method) < HISTORY_BACKFILL_MIN_HEADROOM:
+        time.sleep(1.0)
+
+
+def record_matches_in_background(
+    routing: str,
+    match_ids: list[str],
+    api_key: str,
+    diagnostics: list[dict[str, Any]],
+) -> dict[str, MatchRecord]:
+    # Low-priority, rate-limit-friendly download of whichever matches have no record yet.
+    records = load_match_records(match_ids, diagnostics)
+    unrecorded = [match_id for match_id in match_ids if match_id not in records]
+    stored = load_stored_matches(unrecorded, diagnostics)
+    records.update(save_match_records(stored, diagnostics))
+    missing = [match_id for match_id in unrecorded if match_id not in stored]
+    for batch_start in range(0, len(missing), HISTORY_BACKFILL_BATCH_SIZE):
+        batch = missing[batch_start:batch_start + HISTORY_BACKFILL_BATCH_SIZE]
+        wait_for_backfill_headroom(routing, "match_detail")
+        fetched = parallel_riot_fetch_json(
+            requests=[
+                (match_id, f"https://{routing}.api.riotgames.com/lol/match/v5/matches/{match_id}", "match_detail")
+                for match_id in batch
+            ],
+            api_key=api_key,
+            diagnostics=diagnostics,
+            fallback={},
+            priority=FETCH_PRIORITY_BACKFILL,
+        )
+        store_matches(fetched, diagnostics)
+        records.update(save_match_records(fetched, diagnostics))
+        time.sleep(HISTORY_BACKFILL_PAUSE_SECONDS)
+    return records
+
+
+def backfill_player_history(routing: str, puuid: str, api_key: str) -> None:
+    # Offsets drift as new games are played, so pages may overlap a little; stored IDs are
+    # merged with INSERT OR IGNORE and already-recorded matches are skipped, so that is harmless.
+    state = load_backfill_state(puuid)
+    if state.get("complete"):
+        return
+    start = safe_num(state.get("next_start"))
+    ids_base = f"https://{routing}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids"
+    diagnostics: list[dict[str, Any]] = []
+    while start < HISTORY_BACKFILL_MAX_GAMES:
+        wait_for_backfill_headroom(routing, "match_ids")
+        page_ids = submit_riot_get_json(
+            f"{ids_base}?start={start}&count={HISTORY_BACKFILL_PAGE_SIZE}",
+            api_key,
+            "match_ids",
+            FETCH_PRIORITY_BACKFILL,
+        ).result()
+        if not isinstance(page_ids, list):
+            return
+        page_ids = [str(match_id).strip() for match_id in page_ids if str(match_id).strip()]
+        merge_player_match_ids(puuid, page_ids)
+
+        record_matches_in_background(routing, page_ids, api_key, diagnostics)
+        start += len(page_ids)
+        complete = len(page_ids) < HISTORY_BACKFILL_PAGE_SIZE
+        save_backfill_state(puuid, start, complete)
+        if complete:
+            return
+
+
+# One background thread walks older match history page by page; requests only enqueue players.
+class HistoryBackfill:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._queue: queue.Queue[tuple[str, str, str]] = queue.Queue()
+        self._pending: set[str] = set()
+        self._thread: threading.Thread | None = None
+
+    def request(self, routing: str, puuid: str, api_key: str) -> None:
+        with self._lock:
+            if puuid in self._pending:
+                return
+            self._pending.add(puuid)
+            self._queue.put((routing, puuid, api_key))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="history-backfill", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            routing, puuid, api_key = self._queue.get()
+            try:
+                backfill_player_history(routing, puuid, api_key)
+            except Exception as exc:
+                print(f"History backfill for {puuid[:12]} stopped: {type(exc).__name__}: {str(exc)[:150]}")
+            finally:
+                with self._lock:
+                    self._pending.discard(puuid)
+
+
+HISTORY_BACKFILL = HistoryBackfill()
+
+
+def history_summary(puuid: str, diagnostics: list[dict[str, Any]]) -> dict[str, Any]:
+    # Built only from what is already stored, so it never waits on the backfill.
+    match_ids = load_player_match_ids(puuid, HISTORY_BACKFILL_MAX_GAMES)
+    records = load_match_records(match_ids, diagnostics)
+    columns = PlayerGameColumns()
+    enemy_names: dict[int, str] = {0: "Unknown"}
+    for match_id in match_ids:
+        record = records.get(match_id)
+        participant = record.player(puuid) if record else None
+        if participant is None:
+            continue
+        columns.append(match_id, participant.role, game_metric_values(record, participant, enemy_names))
+
+    games = len(columns)
+    karma_games = columns.count("is_karma")
+    backfill_state = load_backfill_state(puuid)
+
+    def karma_average(name: str, digits: int) -> float:
+        return round(columns.total(name, where="is_karma") / karma_games, digits) if karma_games else 0.0
+
+    matchups = sorted(
+        [
+            {
+                "enemySupport": enemy_names.get(support_id, "Unknown"),
+                "enemyBot": enemy_names.get(bot_id, "Unknown"),
+                "games": group_games,
+                "winRate": round(totals["win"] * 100 / group_games, 1),
+                "avgKillParticipation": round(totals["kill_participation"] / group_games, 1),
+                "avgDeaths": round(totals["deaths"] / group_games, 2),
+                "avgVisionPerMin": round(totals["vision_per_min"] / group_games, 2),
+            }
+            for (support_id, bot_id), group_games, totals in columns.group_totals(
+                ("enemy_support_id", "enemy_bot_id"),
+                ("win", "kill_participation", "deaths", "vision_per_min"),
+                where="is_karma",
+            )
+        ],
+        key=lambda row: row["games"],
+        reverse=True,
+    )[:HISTORY_MATCHUP_ROWS]
+    return {
+        "storedGames": games,
+        "backfillComplete": bool(backfill_state.get("complete")),
+        "backfillMaxGames": HISTORY_BACKFILL_MAX_GAMES,
+        "winRate": round(columns.total("win") * 100 / games, 1) if games else 0.0,
+        "karmaGames": karma_games,
+        "karma": {
+            "winRate": round(karma_average("win", 3) * 100, 1),
+            "killParticipation": karma_average("kill_participation", 1),
+            "deathsPerGame": karma_average("deaths", 2),
+            "visionPerMin": karma_average("vision_per_min", 2),
+            "controlWardsPerGame": karma_average("control_wards", 2),
+        },
+        "matchups": matchups,
+    }
+
+
+def http_get_json(url: str, endpoint: str) -> Any:
+    payload, _validators, _not_modified = http_get_json_conditional(url, endpoint)
+    return payload
+
+
+def json_request_headers() -> dict[str, str]:
+    return {
+        "Accept": "application/json",
+        "User-Agent": RIOT_HTTP_HEADERS["User-Agent"],
+        "Accept-Language": RIOT_HTTP_HEADERS["Accept-Language"],
+    }
+
+
+def upstream_json_error(endpoint: str, exc: Exception) -> ValueError:
+    if isinstance(exc, urllib.error.HTTPError):
         detail = ""
         try:
             detail = exc.read().decode("utf-8")
         except Exception:
             detail = ""
-        raise ValueError(f"{endpoint} failed ({exc.code}): {detail[:160]}") from exc
+        return ValueError(f"{endpoint} failed ({exc.code}): {detail[:160]}")
+    return ValueError(f"{endpoint} failed: {exc}")
+
+
+async def http_get_json_async(url: str, endpoint: str) -> Any:
+    try:
+        _status, _headers, body = await ASYNC_HTTP_CLIENT.fetch(url, json_request_headers(), 14)
+        return json.loads(body.decode("utf-8"))
+    except Exception as exc:
+        raise upstream_json_error(endpoint, exc) from exc
+
+
+# Queues a plain JSON GET on whichever fetch scheduler the runtime is using.
+def submit_http_get_json(priority: int, key: Any, url: str, endpoint: str) -> Future:
+    if ASYNC_FETCH_SCHEDULER.running():
+        return ASYNC_FETCH_SCHEDULER.submit(priority, key, http_get_json_async, url, endpoint)
+    return FETCH_SCHEDULER.submit(priority, key, http_get_json, url, endpoint)
+
+
+# Returns (payload, validators, not_modified). When the server answers 304 the payload is None
+# and the caller keeps using its own copy; validators hold the ETag / Last-Modified to send next time.
+def http_get_json_conditional(
+    url: str,
+    endpoint: str,
+    validators: dict[str, str] | None = None,
+) -> tuple[Any, dict[str, str], bool]:
+    headers = json_request_headers()
+    validators = validators or {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    try:
+        status, response_headers, body = HTTP_POOL.fetch(url, headers, timeout=14)
+        new_validators = {
+            "etag": response_headers.get("ETag", "") or validators.get("etag", ""),
+            "last_modified": response_headers.get("Last-Modified", "") or validators.get("last_modified", ""),
+        }
+        if status == HTTPStatus.NOT_MODIFIED:
+            return None, new_validators, True
+        return json.loads(body.decode("utf-8")), new_validators, False
     except Exception as exc:
-        raise ValueError(f"{endpoint} failed: {exc}") from exc
+        raise upstream_json_error(endpoint, exc) from exc
 
 
-def get_static_reference_maps() -> tuple[
+StaticReferenceMaps = tuple[
     str,
     dict[int, str],
     dict[int, list[str]],
@@ -307,48 +3145,34 @@ def get_static_reference_maps() -> tuple[
     dict[int, str],
     dict[int, str],
     dict[int, str],
-]:
-    now = int(time.time())
-    if (
-        safe_int_text(STATIC_REF_CACHE.get("fetched_at", 0)) > 0
-        and (now - safe_int_text(STATIC_REF_CACHE.get("fetched_at", 0))) < STATIC_CACHE_SECONDS
-        and isinstance(STATIC_REF_CACHE.get("item_names"), dict)
-        and STATIC_REF_CACHE.get("item_names")
-    ):
-        return (
-            str(STATIC_REF_CACHE.get("version", "")),
-            STATIC_REF_CACHE["item_names"],
-            STATIC_REF_CACHE["item_tags"],
-            STATIC_REF_CACHE["rune_names"],
-            STATIC_REF_CACHE["rune_icons"],
-            STATIC_REF_CACHE["spell_names"],
-            STATIC_REF_CACHE["spell_icons"],
-            STATIC_REF_CACHE["champion_names"],
-            STATIC_REF_CACHE["champion_icons"],
-        )
+]
 
-    version_list = http_get_json("https://ddragon.leagueoflegends.com/api/versions.json", "ddragon_versions")
-    if not isinstance(version_list, list) or not version_list:
-        raise ValueError("Could not load Data Dragon versions.")
-    version = str(version_list[0])
 
-    item_data = http_get_json(
-        f"https://ddragon.leagueoflegends.com/cdn/{version}/data/en_US/item.json",
-        "ddragon_items",
-    )
-    rune_data = http_get_json(
-        f"https://ddragon.leagueoflegends.com/cdn/{version}/data/en_US/runesReforged.json",
-        "ddragon_runes",
-    )
-    spell_data = http_get_json(
-        f"https://ddragon.leagueoflegends.com/cdn/{version}/data/en_US/summoner.json",
-        "ddragon_spells",
-    )
-    champion_data = http_get_json(
-        f"https://ddragon.leagueoflegends.com/cdn/{version}/data/en_US/champion.json",
-        "ddragon_champions",
+def static_reference_maps_from_cache() -> StaticReferenceMaps:
+    return (
+        str(STATIC_REF_CACHE.get("version", "")),
+        STATIC_REF_CACHE["item_names"],
+        STATIC_REF_CACHE["item_tags"],
+        STATIC_REF_CACHE["rune_names"],
+        STATIC_REF_CACHE["rune_icons"],
+        STATIC_REF_CACHE["spell_names"],
+        STATIC_REF_CACHE["spell_icons"],
+        STATIC_REF_CACHE["champion_names"],
+        STATIC_REF_CACHE["champion_icons"],
     )
 
+
+def static_reference_cache_loaded() -> bool:
+    return isinstance(STATIC_REF_CACHE.get("item_names"), dict) and bool(STATIC_REF_CACHE.get("item_names"))
+
+
+def parse_static_reference_maps(
+    version: str,
+    item_data: Any,
+    rune_data: Any,
+    spell_data: Any,
+    champion_data: Any,
+) -> dict[str, Any]:
     item_names: dict[int, str] = {}
     item_tags: dict[int, list[str]] = {}
     for item_id_str, item in (item_data.get("data", {}) or {}).items():
@@ -409,33 +3233,147 @@ def get_static_reference_maps() -> tuple[
                 f"https://ddragon.leagueoflegends.com/cdn/{version}/img/champion/{image_full}"
             )
 
-    STATIC_REF_CACHE["fetched_at"] = now
-    STATIC_REF_CACHE["version"] = version
-    STATIC_REF_CACHE["item_names"] = item_names
-    STATIC_REF_CACHE["item_tags"] = item_tags
-    STATIC_REF_CACHE["rune_names"] = rune_names
-    STATIC_REF_CACHE["rune_icons"] = rune_icons
-    STATIC_REF_CACHE["spell_names"] = spell_names
-    STATIC_REF_CACHE["spell_icons"] = spell_icons
-    STATIC_REF_CACHE["champion_names"] = champion_names
-    STATIC_REF_CACHE["champion_icons"] = champion_icons
-    return (
-        version,
-        item_names,
-        item_tags,
-        rune_names,
-        rune_icons,
-        spell_names,
-        spell_icons,
-        champion_names,
-        champion_icons,
-    )
+    return {
+        "item_names": item_names,
+        "item_tags": item_tags,
+        "rune_names": rune_names,
+        "rune_icons": rune_icons,
+        "spell_names": spell_names,
+        "spell_icons": spell_icons,
+        "champion_names": champion_names,
+        "champion_icons": champion_icons,
+    }
 
 
-def deeplol_get_json(endpoint: str, params: dict[str, str]) -> Any:
+def save_static_reference_maps(version: str, fetched_at: int, maps: dict[str, Any]) -> None:
+    document = {
+        "version": version,
+        "fetched_at": fetched_at,
+        "maps": {name: {str(key): value for key, value in maps[name].items()} for name in STATIC_REF_MAP_KEYS},
+    }
+    target = STATIC_REF_DIR / f"static_maps_{version}.json"
+    try:
+        STATIC_REF_DIR.mkdir(parents=True, exist_ok=True)
+        temp_path = target.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(document, separators=(",", ":")), encoding="utf-8")
+        temp_path.replace(target)
+        # Only the current and previous patch are worth keeping.
+        saved = sorted(STATIC_REF_DIR.glob("static_maps_*.json"), key=lambda path: path.stat().st_mtime, reverse=True)
+        for stale_path in saved[2:]:
+            stale_path.unlink(missing_ok=True)
+    except OSError:
+        return
+
+
+def load_persisted_static_maps() -> bool:
+    try:
+        saved = sorted(STATIC_REF_DIR.glob("static_maps_*.json"), key=lambda path: path.stat().st_mtime, reverse=True)
+    except OSError:
+        return False
+    for path in saved:
+        try:
+            document = json.loads(path.read_text(encoding="utf-8"))
+            maps = document["maps"]
+            loaded = {
+                name: {safe_num(key): value for key, value in (maps.get(name) or {}).items()}
+                for name in STATIC_REF_MAP_KEYS
+            }
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            continue
+        if not loaded["item_names"]:
+            continue
+        STATIC_REF_CACHE.update(loaded)
+        STATIC_REF_CACHE["version"] = str(document.get("version", ""))
+        STATIC_REF_CACHE["fetched_at"] = safe_num(document.get("fetched_at"))
+        return True
+    return False
+
+
+def static_reference_cache_fresh(now: int, max_age_seconds: int) -> bool:
+    if not static_reference_cache_loaded():
+        return False
+    if now < safe_int_text(STATIC_REF_CACHE.get("retry_at", 0)):
+        return True
+    fetched_at = safe_int_text(STATIC_REF_CACHE.get("fetched_at", 0))
+    return fetched_at > 0 and (now - fetched_at) < max_age_seconds
+
+
+def static_reference_fallback(now: int) -> StaticReferenceMaps:
+    # Data Dragon failed: an older patch is better than no names and icons, and
+    # requests should not all retry the same failing fetch.
+    STATIC_REF_CACHE["retry_at"] = now + STATIC_RETRY_SECONDS
+    return static_reference_maps_from_cache()
+
+
+def get_static_reference_maps(max_age_seconds: int = STATIC_CACHE_SECONDS) -> StaticReferenceMaps:
+    now = int(time.time())
+    if static_reference_cache_fresh(now, max_age_seconds):
+        return static_reference_maps_from_cache()
+
+    with STATIC_REF_LOCK:
+        if not static_reference_cache_loaded():
+            load_persisted_static_maps()
+        if static_reference_cache_fresh(now, max_age_seconds):
+            return static_reference_maps_from_cache()
+
+        try:
+            version_list = http_get_json("https://ddragon.leagueoflegends.com/api/versions.json", "ddragon_versions")
+        except ValueError:
+            if static_reference_cache_loaded():
+                return static_reference_fallback(now)
+            raise
+        if not isinstance(version_list, list) or not version_list:
+            raise ValueError("Could not load Data Dragon versions.")
+        version = str(version_list[0])
+
+        if version == str(STATIC_REF_CACHE.get("version", "")) and static_reference_cache_loaded():
+            STATIC_REF_CACHE["fetched_at"] = now
+            return static_reference_maps_from_cache()
+
+        static_files = {
+            "item": "item.json",
+            "rune": "runesReforged.json",
+            "spell": "summoner.json",
+            "champion": "champion.json",
+        }
+        futures = {
+            name: submit_http_get_json(
+                FETCH_PRIORITY_ACCOUNT,
+                ("ddragon", version, filename),
+                f"https://ddragon.leagueoflegends.com/cdn/{version}/data/en_US/{filename}",
+                f"ddragon_{name}s",
+            )
+            for name, filename in static_files.items()
+        }
+        try:
+            static_data = {name: future.result() for name, future in futures.items()}
+        except ValueError:
+            # A patch can show up in versions.json before its CDN files do.
+            if static_reference_cache_loaded():
+                return static_reference_fallback(now)
+            raise
+        maps = parse_static_reference_maps(
+            version,
+            static_data["item"],
+            static_data["rune"],
+            static_data["spell"],
+            static_data["champion"],
+        )
+        STATIC_REF_CACHE.update(maps)
+        STATIC_REF_CACHE["fetched_at"] = now
+        STATIC_REF_CACHE["version"] = version
+        save_static_reference_maps(version, now, maps)
+        return static_reference_maps_from_cache()
+
+
+def submit_deeplol_get_json(endpoint: str, params: dict[str, str]) -> Future:
     query = urllib.parse.urlencode(params)
     url = f"{DEEPL0L_API_BASE}/{endpoint}?{query}"
-    return http_get_json(url, f"deeplol_{endpoint}")
+    return submit_http_get_json(FETCH_PRIORITY_DEEPL0L, ("deeplol", url), url, f"deeplol_{endpoint}")
+
+
+def deeplol_get_json(endpoint: str, params: dict[str, str]) -> Any:
+    return submit_deeplol_get_json(endpoint, params).result()
 
 
 def select_best_build_detail(data_rows: list[dict[str, Any]]) -> dict[str, Any]:
@@ -465,13 +3403,16 @@ def select_best_build_detail(data_rows: list[dict[str, Any]]) -> dict[str, Any]:
     return detail_pool[0]
 
 
-def get_karma_otp_rows_from_deeplol(limit: int = 12) -> list[dict[str, Any]]:
+def get_karma_otp_rows_from_deeplol(
+    limit: int = 12,
+    max_age_seconds: int = DEEPL0L_CACHE_SECONDS,
+) -> list[dict[str, Any]]:
     now = int(time.time())
     cache_ts = safe_int_text(DEEPL0L_KARMA_CACHE.get("fetched_at", 0))
     cache_rows = DEEPL0L_KARMA_CACHE.get("otp_rows", [])
     if (
         cache_ts > 0
-        and (now - cache_ts) < DEEPL0L_CACHE_SECONDS
+        and (now - cache_ts) < max_age_seconds
         and isinstance(cache_rows, list)
         and cache_rows
     ):
@@ -505,9 +3446,15 @@ def get_karma_otp_rows_from_deeplol(limit: int = 12) -> list[dict[str, Any]]:
     if not candidates:
         raise ValueError("No OTP candidates found for Karma.")
 
+    # Builds stay cached across ladder refreshes; an OTP whose game count moved (or who is new to
+    # the list) no longer matches its cached entry and gets revalidated on the next lookup.
     DEEPL0L_KARMA_CACHE["fetched_at"] = now
     DEEPL0L_KARMA_CACHE["otp_rows"] = candidates
-    DEEPL0L_KARMA_CACHE["builds"] = {}
+    DEEPL0L_KARMA_CACHE["otp_games"] = {
+        str(row.get("puu_id", "")).strip(): safe_num(row.get("games"))
+        for row in candidates
+        if str(row.get("puu_id", "")).strip()
+    }
     return candidates[:limit]
 
 
@@ -516,30 +3463,62 @@ def get_otp_build_from_deeplol(puu_id: str) -> dict[str, Any]:
     if not puu:
         raise ValueError("Missing OTP puu_id.")
 
-    builds_cache = DEEPL0L_KARMA_CACHE.get("builds", {})
-    if isinstance(builds_cache, dict):
-        cached = builds_cache.get(puu)
-        if isinstance(cached, dict) and cached:
-            return cached
+    otp_games = DEEPL0L_KARMA_CACHE.get("otp_games", {})
+    games = safe_num(otp_games.get(puu)) if isinstance(otp_games, dict) else 0
+    cached, is_fresh = DEEPL0L_BUILD_CACHE.get_with_freshness(puu)
+    if not isinstance(cached, dict) or not cached.get("build"):
+        cached = None
+    elif is_fresh and (games <= 0 or safe_num(cached.get("games")) == games):
+        return cached["build"]
+
+    query = urllib.parse.urlencode({"puu_id": puu, "platform_id": "KR"})
+    url = f"{DEEPL0L_API_BASE}/champion/master_build?{query}"
+    validators = cached.get("validators", {}) if cached else {}
+    build_payload, validators, not_modified = FETCH_SCHEDULER.submit(
+        FETCH_PRIORITY_DEEPL0L,
+        ("deeplol", url, validators.get("etag", "")),
+        http_get_json_conditional,
+        url,
+        "deeplol_champion/master_build",
+        validators,
+    ).result()
 
-    build_payload = deeplol_get_json(
-        "champion/master_build",
+    if not_modified and cached:
+        best_build = cached["build"]
+    else:
+        data_rows = build_payload.get("data", []) if isinstance(build_payload, dict) else []
+        if not isinstance(data_rows, list) or not data_rows:
+            raise ValueError("Deeplol master_build returned no rows.")
+        best_build = select_best_build_detail(data_rows)
+    DEEPL0L_BUILD_CACHE.set(
+        puu,
         {
-            "puu_id": puu,
-            "platform_id": "KR",
+            "build": best_build,
+            "games": games,
+            "validators": validators,
         },
     )
-    data_rows = build_payload.get("data", []) if isinstance(build_payload, dict) else []
-    if not isinstance(data_rows, list) or not data_rows:
-        raise ValueError("Deeplol master_build returned no rows.")
-
-    best_build = select_best_build_detail(data_rows)
-    if not isinstance(DEEPL0L_KARMA_CACHE.get("builds"), dict):
-        DEEPL0L_KARMA_CACHE["builds"] = {}
-    DEEPL0L_KARMA_CACHE["builds"][puu] = best_build
     return best_build
 
 
+def prefetch_otp_builds(otp_rows: list[dict[str, Any]]) -> dict[str, Future]:
+    # Start every OTP build lookup at once; callers read the futures in their own order.
+    futures: dict[str, Future] = {}
+    for row in otp_rows:
+        if not isinstance(row, dict):
+            continue
+        puu_id = str(row.get("puu_id", "")).strip()
+        if not puu_id or puu_id in futures:
+            continue
+        futures[puu_id] = FETCH_SCHEDULER.submit(
+            FETCH_PRIORITY_DEEPL0L,
+            ("deeplol_build", puu_id),
+            get_otp_build_from_deeplol,
+            puu_id,
+        )
+    return futures
+
+
 def build_champion_options(
     champion_names: dict[int, str],
     champion_icons: dict[int, str],
@@ -557,6 +3536,47 @@ def build_champion_options(
     return rows
 
 
+def get_catalog_payload() -> dict[str, Any]:
+    (
+        version,
+        item_names,
+        item_tags,
+        rune_names,
+        rune_icons,
+        spell_names,
+        spell_icons,
+        champion_names,
+        champion_icons,
+    ) = get_static_reference_maps()
+    cached = CATALOG_CACHE.get("payload")
+    if CATALOG_CACHE.get("version") == version and isinstance(cached, dict):
+        return cached
+
+    payload = {
+        "version": version,
+        "champions": build_champion_options(champion_names, champion_icons),
+        "items": [
+            {
+                "id": item_id,
+                "name": item_name,
+                "tags": item_tags.get(item_id, []),
+                "icon": f"https://ddragon.leagueoflegends.com/cdn/{version}/img/item/{item_id}.png",
+            }
+            for item_id, item_name in sorted(item_names.items())
+        ],
+        "runes": [
+            {"id": rune_id, "name": rune_name, "icon": rune_icons.get(rune_id, "")}
+            for rune_id, rune_name in sorted(rune_names.items())
+        ],
+        "spells": [
+            {"id": spell_id, "name": spell_name, "icon": spell_icons.get(spell_id, "")}
+            for spell_id, spell_name in sorted(spell_names.items())
+        ],
+    }
+    CATALOG_CACHE.update({"version": version, "payload": payload})
+    return payload
+
+
 def filter_champion_options(
     options: list[dict[str, Any]],
     allowed_ids: set[int],
@@ -567,67 +3587,92 @@ def filter_champion_options(
     return options
 
 
-def get_matchup_rows_from_deeplol(
-    enemy_champion_id: int,
-    *,
-    pages: int = 3,
-    player_type: str = MATCHUP_PLAYER_TYPE,
-) -> list[dict[str, Any]]:
-    enemy_id = safe_num(enemy_champion_id)
-    if enemy_id <= 0:
-        return []
+def matchup_rows_cache_key(enemy_id: int, page_count: int, player_type: str) -> str:
+    return f"{enemy_id}|{page_count}|{str(player_type).upper()}"
 
-    page_count = max(1, safe_num(pages))
-    cache_key = f"{enemy_id}|{page_count}|{str(player_type).upper()}"
-    now = int(time.time())
-    cache_map = DEEPL0L_KARMA_CACHE.get("matchup_rows", {})
-    if isinstance(cache_map, dict):
-        cached = cache_map.get(cache_key)
-        if (
-            isinstance(cached, dict)
-            and (now - safe_int_text(cached.get("fetched_at", 0))) < DEEPL0L_CACHE_SECONDS
-            and isinstance(cached.get("rows"), list)
-        ):
-            return cached["rows"][:MATCHUP_SETUP_MATCH_COUNT]
 
-    rows: list[dict[str, Any]] = []
-    for page in range(1, page_count + 1):
-        payload = deeplol_get_json(
-            "matchup/OTP_match",
-            {
-                "champion_id": str(KARMA_CHAMPION_ID),
-                "enemy_champion_id": str(enemy_id),
-                "page": str(page),
-                "player_type": str(player_type),
-            },
-        )
-        page_rows = payload.get("match_up_list", []) if isinstance(payload, dict) else []
-        if not isinstance(page_rows, list) or not page_rows:
-            break
+def submit_matchup_page(enemy_id: int, page: int, player_type: str) -> Future:
+    return submit_deeplol_get_json(
+        "matchup/OTP_match",
+        {
+            "champion_id": str(KARMA_CHAMPION_ID),
+            "enemy_champion_id": str(enemy_id),
+            "page": str(page),
+            "player_type": str(player_type),
+        },
+    )
 
-        for row in page_rows:
-            if not isinstance(row, dict):
-                continue
-            row_champion = safe_num(row.get("champion_id"))
-            row_enemy = safe_num(row.get("enemy_champion_id"))
-            if row_champion != KARMA_CHAMPION_ID or row_enemy != enemy_id:
-                continue
-            if str(row.get("position", "")).lower() not in {"supporter", "support"}:
-                continue
-            rows.append(row)
-            if len(rows) >= MATCHUP_SETUP_MATCH_COUNT:
+
+# Pages of matchup/OTP_match for one enemy, fetched through the scheduler a few at a time.
+# The first wave is submitted on construction so several enemies can be started together.
+class MatchupPageFetch:
+    def __init__(self, enemy_id: int, page_count: int, player_type: str) -> None:
+        self.enemy_id = enemy_id
+        self.page_count = page_count
+        self.player_type = player_type
+        self.cache_key = matchup_rows_cache_key(enemy_id, page_count, player_type)
+        self.cached_rows: list[dict[str, Any]] | None = None
+        self._pending: deque[Future] = deque()
+        self._next_page = 1
+
+        cached = DEEPL0L_MATCHUP_CACHE.get(self.cache_key)
+        if isinstance(cached, list):
+            self.cached_rows = cached[:MATCHUP_SETUP_MATCH_COUNT]
+            return
+        self._fill_window()
+
+    def _fill_window(self) -> None:
+        while len(self._pending) < MATCHUP_PREFETCH_PAGES and self._next_page <= self.page_count:
+            self._pending.append(submit_matchup_page(self.enemy_id, self._next_page, self.player_type))
+            self._next_page += 1
+
+    def result(self) -> list[dict[str, Any]]:
+        if self.cached_rows is not None:
+            return self.cached_rows
+
+        rows: list[dict[str, Any]] = []
+        while self._pending:
+            payload = self._pending.popleft().result()
+            page_rows = payload.get("match_up_list", []) if isinstance(payload, dict) else []
+            if not isinstance(page_rows, list) or not page_rows:
                 break
 
-        if len(page_rows) < MATCHUP_PAGE_SIZE or len(rows) >= MATCHUP_SETUP_MATCH_COUNT:
-            break
+            for row in page_rows:
+                if not isinstance(row, dict):
+                    continue
+                row_champion = safe_num(row.get("champion_id"))
+                row_enemy = safe_num(row.get("enemy_champion_id"))
+                if row_champion != KARMA_CHAMPION_ID or row_enemy != self.enemy_id:
+                    continue
+                if str(row.get("position", "")).lower() not in {"supporter", "support"}:
+                    continue
+                rows.append(row)
+                if len(rows) >= MATCHUP_SETUP_MATCH_COUNT:
+                    break
+
+            if len(page_rows) < MATCHUP_PAGE_SIZE or len(rows) >= MATCHUP_SETUP_MATCH_COUNT:
+                # Pages already in flight finish in the background; they are simply not read.
+                break
+            self._fill_window()
+
+        DEEPL0L_MATCHUP_CACHE.set(self.cache_key, rows)
+        self.cached_rows = rows
+        return rows
 
-    if not isinstance(DEEPL0L_KARMA_CACHE.get("matchup_rows"), dict):
-        DEEPL0L_KARMA_CACHE["matchup_rows"] = {}
-    DEEPL0L_KARMA_CACHE["matchup_rows"][cache_key] = {
-        "fetched_at": now,
-        "rows": rows,
-    }
-    return rows
+
+def get_matchup_rows_for_enemies(
+    enemy_champion_ids: list[int],
+    *,
+    pages: int = 3,
+    player_type: str = MATCHUP_PLAYER_TYPE,
+) -> dict[int, list[dict[str, Any]]]:
+    page_count = max(1, safe_num(pages))
+    fetches: dict[int, MatchupPageFetch] = {}
+    for enemy_champion_id in enemy_champion_ids:
+        enemy_id = safe_num(enemy_champion_id)
+        if enemy_id > 0 and enemy_id not in fetches:
+            fetches[enemy_id] = MatchupPageFetch(enemy_id, page_count, player_type)
+    return {enemy_id: fetch.result() for enemy_id, fetch in fetches.items()}
 
 
 def karma_matchup_recommendation_from_deeplol(
@@ -742,12 +3787,13 @@ def karma_matchup_recommendation_from_deeplol(
         )
 
         exact_setup = {}
+        build_futures = prefetch_otp_builds(ranked_rows)
         for row in ranked_rows:
             puu_id = str(row.get("puu_id", "")).strip()
             if not puu_id:
                 continue
             try:
-                otp_build = get_otp_build_from_deeplol(puu_id)
+                otp_build = build_futures[puu_id].result()
                 exact_setup = build_exact_deeplol_setup(
                     otp_row=row,
                     otp_build=otp_build,
@@ -829,14 +3875,9 @@ def karma_matchup_recommendation_from_deeplol(
             "detail": str(exc)[:200],
             "selectedEnemySupportId": safe_num(enemy_support_id),
             "selectedEnemyBotId": safe_num(enemy_bot_id),
-            "championOptions": [],
-            "supportChampionOptions": [],
-            "botChampionOptions": [],
+            "catalogVersion": "",
         }
 
-    champion_options = build_champion_options(champion_names, champion_icons)
-    support_options = champion_options
-    bot_options = champion_options
     selected_support = safe_num(enemy_support_id)
     selected_bot = safe_num(enemy_bot_id)
     if selected_support <= 0 or selected_support not in champion_names:
@@ -864,9 +3905,7 @@ def karma_matchup_recommendation_from_deeplol(
             "selectedEnemyBotId": 0,
             "selectedEnemySupport": "Select enemy support",
             "selectedEnemyBot": "Select enemy bot carry",
-            "championOptions": champion_options,
-            "supportChampionOptions": support_options,
-            "botChampionOptions": bot_options,
+            "catalogVersion": ddragon_version,
             "sampleMatches": 0,
             "aggregate": {"wins": 0, "losses": 0, "winRate": 0.0},
             "bestBuild": {},
@@ -880,20 +3919,13 @@ def karma_matchup_recommendation_from_deeplol(
     deeplol_fetch_error = ""
     try:
         page_count = max(1, MATCHUP_SETUP_MATCH_COUNT // MATCHUP_PAGE_SIZE)
-        if selected_support > 0:
-            support_rows = get_matchup_rows_from_deeplol(
-                selected_support,
-                pages=page_count,
-                player_type=MATCHUP_PLAYER_TYPE,
-            )
-            matchup_rows.extend(support_rows)
-        if selected_bot > 0 and selected_bot != selected_support:
-            bot_rows = get_matchup_rows_from_deeplol(
-                selected_bot,
-                pages=page_count,
-                player_type=MATCHUP_PLAYER_TYPE,
-            )
-            matchup_rows.extend(bot_rows)
+        rows_by_enemy = get_matchup_rows_for_enemies(
+            [selected_support, selected_bot],
+            pages=page_count,
+            player_type=MATCHUP_PLAYER_TYPE,
+        )
+        for enemy_rows in rows_by_enemy.values():
+            matchup_rows.extend(enemy_rows)
     except Exception as exc:
         diagnostics.append(
             {
@@ -920,9 +3952,7 @@ def karma_matchup_recommendation_from_deeplol(
                 "selectedEnemyBotId": selected_bot,
                 "selectedEnemySupport": champion_names.get(selected_support, "Unknown"),
                 "selectedEnemyBot": champion_names.get(selected_bot, "Unknown"),
-                "championOptions": champion_options,
-                "supportChampionOptions": support_options,
-                "botChampionOptions": bot_options,
+                "catalogVersion": ddragon_version,
                 "sampleMatches": 0,
                 "aggregate": {"wins": 0, "losses": 0, "winRate": 0.0},
                 "winrateSources": [general_fallback.get("winrateSource", {})],
@@ -949,9 +3979,7 @@ def karma_matchup_recommendation_from_deeplol(
             "selectedEnemyBotId": selected_bot,
             "selectedEnemySupport": champion_names.get(selected_support, "Unknown"),
             "selectedEnemyBot": champion_names.get(selected_bot, "Unknown"),
-            "championOptions": champion_options,
-            "supportChampionOptions": support_options,
-            "botChampionOptions": bot_options,
+            "catalogVersion": ddragon_version,
             "sampleMatches": 0,
             "aggregate": {"wins": 0, "losses": 0, "winRate": 0.0},
             "bestBuild": {},
@@ -1194,9 +4222,7 @@ def karma_matchup_recommendation_from_deeplol(
                 "selectedEnemyBotId": selected_bot,
                 "selectedEnemySupport": champion_names.get(selected_support, "Unknown"),
                 "selectedEnemyBot": champion_names.get(selected_bot, "Unknown"),
-                "championOptions": champion_options,
-                "supportChampionOptions": support_options,
-                "botChampionOptions": bot_options,
+                "catalogVersion": ddragon_version,
                 "sampleMatches": sample_games,
                 "aggregate": {
                     "wins": wins,
@@ -1229,9 +4255,7 @@ def karma_matchup_recommendation_from_deeplol(
             "selectedEnemyBotId": selected_bot,
             "selectedEnemySupport": champion_names.get(selected_support, "Unknown"),
             "selectedEnemyBot": champion_names.get(selected_bot, "Unknown"),
-            "championOptions": champion_options,
-            "supportChampionOptions": support_options,
-            "botChampionOptions": bot_options,
+            "catalogVersion": ddragon_version,
             "sampleMatches": sample_games,
             "aggregate": {
                 "wins": wins,
@@ -1277,9 +4301,7 @@ def karma_matchup_recommendation_from_deeplol(
         "selectedEnemyBotId": selected_bot,
         "selectedEnemySupport": champion_names.get(selected_support, "Unknown"),
         "selectedEnemyBot": champion_names.get(selected_bot, "Unknown"),
-        "championOptions": champion_options,
-        "supportChampionOptions": support_options,
-        "botChampionOptions": bot_options,
+        "catalogVersion": ddragon_version,
         "sampleMatches": sample_games,
         "aggregate": {
             "wins": wins,
@@ -1538,17 +4560,6 @@ def weighted_average(pairs: list[tuple[float, float]]) -> float:
     return sum(value * max(weight, 0.0) for value, weight in pairs) / total_weight
 
 
-def frame_at_or_before(frames: list[dict[str, Any]], target_ms: int) -> dict[str, Any] | None:
-    chosen = None
-    chosen_ts = -1
-    for frame in frames:
-        frame_ts = safe_num(frame.get("timestamp"))
-        if frame_ts <= target_ms and frame_ts > chosen_ts:
-            chosen = frame
-            chosen_ts = frame_ts
-    return chosen
-
-
 def top_k_from_counter(counter: Counter[int], k: int) -> list[int]:
     return [item for item, _ in counter.most_common(k) if safe_num(item) > 0]
 
@@ -1582,6 +4593,7 @@ def build_top5_otp_benchmark(
     lp_values: list[float] = []
     games_values: list[float] = []
     profile_rows: list[dict[str, Any]] = []
+    build_futures = prefetch_otp_builds(top_rows)
 
     for row in top_rows:
         puu_id = str(row.get("puu_id", "")).strip()
@@ -1605,7 +4617,7 @@ def build_top5_otp_benchmark(
         if not puu_id:
             continue
         try:
-            build = get_otp_build_from_deeplol(puu_id)
+            build = build_futures[puu_id].result()
         except Exception:
             continue
 
@@ -1932,6 +4944,242 @@ def karma_otp_comparison_from_deeplol(
     }
 
 
+def benchmark_game_row(
+    record: MatchRecord,
+    participant: ParticipantRow,
+    lane_record: LaneRecord | None,
+) -> dict[str, float]:
+    values = game_metric_values(record, participant)
+    row = {
+        "kp": values["kill_participation"],
+        "deaths": values["deaths"],
+        "vision_per_min": values["vision_per_min"],
+        "control_wards": values["control_wards"],
+    }
+    if lane_record is not None:
+        enemy_support = record.lane_player(200 if participant.team_id == 100 else 100, "UTILITY")
+        lane_metrics, has_lane_diff = lane_record.metrics(
+            participant.participant_id,
+            enemy_support.participant_id if enemy_support else 0,
+        )
+        row["assists_14"] = lane_metrics["assists14"]
+        row["deaths_14"] = lane_metrics["deaths14"]
+        if lane_metrics["firstDeathMin"] > 0:
+            row["first_death_min"] = lane_metrics["firstDeathMin"]
+        if has_lane_diff:
+            row["gold_diff_14"] = lane_metrics["goldDiff14"]
+            row["xp_diff_14"] = lane_metrics["xpDiff14"]
+    return row
+
+
+def collect_otp_benchmark_rows(api_key: str, diagnostics: list[dict[str, Any]]) -> list[dict[str, float]]:
+    routing = LANE_BENCHMARK_ROUTING
+    rows: list[dict[str, float]] = []
+    seen: set[tuple[str, str]] = set()
+    for otp in get_karma_otp_rows_from_deeplol(limit=LANE_BENCHMARK_OTP_PLAYERS):
+        game_name = str(otp.get("riot_id_name", "")).strip()
+        tag_line = str(otp.get("riot_id_tag_line", "")).strip()
+        if not game_name or not tag_line:
+            continue
+        # Deeplol PUUIDs are encrypted for its own key, so resolve each OTP by Riot ID first.
+        account_url = (
+            f"https://{routing}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/"
+            f"{urllib.parse.quote(game_name, safe='')}/{urllib.parse.quote(tag_line, safe='')}"
+        )
+        try:
+            wait_for_backfill_headroom(routing, "account_by_riot_id")
+            account = submit_riot_get_json(account_url, api_key, "account_by_riot_id", FETCH_PRIORITY_BACKFILL).result()
+            puuid = str(account.get("puuid", "")).strip() if isinstance(account, dict) else ""
+            if not puuid:
+                continue
+            wait_for_backfill_headroom(routing, "match_ids")
+            match_ids = submit_riot_get_json(
+                f"https://{routing}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids"
+                f"?queue={LANE_BENCHMARK_QUEUE_ID}&start=0&count={LANE_BENCHMARK_GAMES_PER_PLAYER}",
+                api_key,
+                "match_ids",
+                FETCH_PRIORITY_BACKFILL,
+            ).result()
+        except RiotApiError as exc:
+            diagnostics.append({"endpoint": exc.endpoint, "status": exc.status, "detail": exc.detail[:180]})
+            continue
+        if not isinstance(match_ids, list):
+            continue
+        match_ids = [str(match_id).strip() for match_id in match_ids if str(match_id).strip()]
+
+        records = record_matches_in_background(routing, match_ids, api_key, diagnostics)
+        karma_games: list[tuple[str, MatchRecord, ParticipantRow]] = []
+        for match_id in match_ids:
+            record = records.get(match_id)
+            participant = record.player(puuid) if record else None
+            if record is None or participant is None or (match_id, puuid) in seen:
+                continue
+            if participant.champion_id == KARMA_CHAMPION_ID and is_support_role(participant.role):
+                seen.add((match_id, puuid))
+                karma_games.append((match_id, record, participant))
+
+        lane_records: dict[str, LaneRecord] = {}
+        karma_ids = [match_id for match_id, _record, _participant in karma_games]
+        for batch_start in range(0, len(karma_ids), HISTORY_BACKFILL_BATCH_SIZE):
+            wait_for_backfill_headroom(routing, "match_timeline")
+            lane_records.update(
+                get_lane_records(
+                    routing=routing,
+                    match_ids=karma_ids[batch_start:batch_start + HISTORY_BACKFILL_BATCH_SIZE],
+                    api_key=api_key,
+                    diagnostics=diagnostics,
+                    priority=FETCH_PRIORITY_BACKFILL,
+                )
+            )
+        for match_id, record, participant in karma_games:
+            rows.append(benchmark_game_row(record, participant, lane_records.get(match_id)))
+    return rows
+
+
+def load_benchmark_dataset(path: str) -> list[dict[str, float]]:
+    document = json.loads(Path(path).read_text(encoding="utf-8"))
+    raw_rows = document.get("rows", []) if isinstance(document, dict) else document
+    if not isinstance(raw_rows, list):
+        raise ValueError(f"{path} does not contain a list of rows.")
+    rows: list[dict[str, float]] = []
+    for raw in raw_rows:
+        if not isinstance(raw, dict):
+            continue
+        row: dict[str, float] = {}
+        for metric in BENCHMARK_METRICS:
+            try:
+                if raw.get(metric) is not None:
+                    row[metric] = float(raw[metric])
+            except (TypeError, ValueError):
+                continue
+        if row:
+            rows.append(row)
+    return rows
+
+
+def build_benchmark_table(rows: list[dict[str, float]]) -> dict[str, Any]:
+    metrics: dict[str, Any] = {}
+    for metric in BENCHMARK_METRICS:
+        values = sorted(row[metric] for row in rows if metric in row)
+        if not values:
+            continue
+        last = len(values) - 1
+        metrics[metric] = {
+            "samples": len(values),
+            "quantiles": [
+                round(values[round(step * last / (LANE_BENCHMARK_QUANTILES - 1))], 3)
+                for step in range(LANE_BENCHMARK_QUANTILES)
+            ],
+        }
+    return metrics
+
+
+def save_lane_benchmarks() -> None:
+    try:
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        temp_path = LANE_BENCHMARK_PATH.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(LANE_BENCHMARK_CACHE, separators=(",", ":")), encoding="utf-8")
+        temp_path.replace(LANE_BENCHMARK_PATH)
+    except OSError:
+        return
+
+
+def load_persisted_lane_benchmarks() -> bool:
+    try:
+        document = json.loads(LANE_BENCHMARK_PATH.read_text(encoding="utf-8"))
+        metrics = {
+            str(metric): {"samples": safe_num(entry["samples"]), "quantiles": [float(v) for v in entry["quantiles"]]}
+            for metric, entry in document["metrics"].items()
+        }
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return False
+    LANE_BENCHMARK_CACHE["built_at"] = safe_num(document.get("built_at"))
+    LANE_BENCHMARK_CACHE["source"] = str(document.get("source", ""))
+    LANE_BENCHMARK_CACHE["metrics"] = metrics
+    return True
+
+
+def build_lane_benchmarks() -> None:
+    diagnostics: list[dict[str, Any]] = []
+    if LANE_BENCHMARK_DATASET:
+        rows = load_benchmark_dataset(LANE_BENCHMARK_DATASET)
+        source = f"dataset:{Path(LANE_BENCHMARK_DATASET).name}"
+    else:
+        api_key = os.environ.get("RIOT_API_KEY", "").strip()
+        if not api_key:
+            return
+        rows = collect_otp_benchmark_rows(api_key, diagnostics)
+        source = "deeplol_kr_otp"
+    metrics = build_benchmark_table(rows)
+    if not metrics:
+        return
+    # Swap the whole table at once so readers never see a half-built mix.
+    LANE_BENCHMARK_CACHE["metrics"] = metrics
+    LANE_BENCHMARK_CACHE["source"] = source
+    LANE_BENCHMARK_CACHE["built_at"] = int(time.time())
+    save_lane_benchmarks()
+
+
+def benchmark_percentile(metric: str, value: float) -> float | None:
+    entry = LANE_BENCHMARK_CACHE["metrics"].get(metric)
+    if not entry or entry["samples"] < LANE_BENCHMARK_MIN_SAMPLES:
+        return None
+    quantiles = entry["quantiles"]
+    low = bisect.bisect_left(quantiles, value)
+    high = bisect.bisect_right(quantiles, value)
+    if low != high:
+        position = (low + high - 1) / 2
+    elif low == 0:
+        position = 0.0
+    elif low == len(quantiles):
+        position = float(len(quantiles) - 1)
+    else:
+        # Interpolate between the two surrounding percentile points.
+        position = low - 1 + (value - quantiles[low - 1]) / (quantiles[low] - quantiles[low - 1])
+    percentile = position * 100 / (len(quantiles) - 1)
+    return percentile if BENCHMARK_METRICS[metric] else 100 - percentile
+
+
+# The table holds single games, so each of the player's games is ranked on its own and the
+# percentiles averaged; ranking a multi-game average would push typical players to the extremes.
+def mean_benchmark_percentile(metric: str, values: list[float]) -> float | None:
+    percentiles = [benchmark_percentile(metric, value) for value in values]
+    ranked = [percentile for percentile in percentiles if percentile is not None]
+    return sum(ranked) / len(ranked) if ranked else None
+
+
+def target_deficit(metric: str, value: float) -> float:
+    target = HIGH_LEVEL_TARGETS[metric]
+    gap = value - target if not BENCHMARK_METRICS[metric] else target - value
+    return max(0.0, gap / max(target, 1.0))
+
+
+class LaneBenchmarkBuilder:
+    def __init__(self) -> None:
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="lane-benchmarks", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            age = int(time.time()) - safe_num(LANE_BENCHMARK_CACHE.get("built_at"))
+            if age >= LANE_BENCHMARK_REFRESH_SECONDS:
+                try:
+                    build_lane_benchmarks()
+                except Exception as exc:
+                    print(f"Lane benchmark build failed: {type(exc).__name__}: {str(exc)[:150]}")
+                time.sleep(15 * 60)
+                continue
+            time.sleep(min(LANE_BENCHMARK_REFRESH_SECONDS - age, 60 * 60))
+
+
+LANE_BENCHMARK_BUILDER = LaneBenchmarkBuilder()
+
+
 def player_summary(
     game_name: str,
     tag_line: str,
@@ -1941,33 +5189,29 @@ def player_summary(
     selected_enemy_support_id: int,
     selected_enemy_bot_id: int,
     debug_mode: bool = False,
-    include_timeline: bool = TIMELINE_ENABLED_DEFAULT,
+    timeline_mode: str = TIMELINE_MODE_DEFAULT,
+    emit: Any = None,
 ) -> dict[str, Any]:
+    # emit(section, fields) is called as each SUMMARY_STREAM_SECTIONS group becomes final.
     routing = PLATFORM_TO_ROUTING.get(platform)
     if not routing:
         raise ValueError("Unsupported platform region")
     diagnostics: list[dict[str, Any]] = []
 
-    encoded_game_name = urllib.parse.quote(game_name, safe="")
-    encoded_tag_line = urllib.parse.quote(tag_line, safe="")
-
-    account_url = (
-        f"https://{routing}.api.riotgames.com/riot/account/v1/accounts"
-        f"/by-riot-id/{encoded_game_name}/{encoded_tag_line}"
-    )
+    account_url = riot_account_url(routing, game_name, tag_line)
     account: dict[str, Any]
     summoner: dict[str, Any]
     puuid: str
 
     try:
-        account = riot_get_json(account_url, api_key, "account_by_riot_id")
+        account = scheduled_riot_get_json(account_url, api_key, "account_by_riot_id")
         puuid = str(account.get("puuid", "")).strip()
         if not puuid:
             raise ValueError("Riot account response did not include puuid.")
         summoner_url = (
             f"https://{platform}.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/{puuid}"
         )
-        summoner = riot_get_json(summoner_url, api_key, "summoner_by_puuid")
+        summoner = scheduled_riot_get_json(summoner_url, api_key, "summoner_by_puuid")
     except RiotApiError as primary_error:
         diagnostics.append(
             {
@@ -2013,67 +5257,41 @@ def player_summary(
 
     ranked_solo = ranked_entry("RANKED_SOLO_5x5")
     ranked_flex = ranked_entry("RANKED_FLEX_SR")
+    player_info = {
+        "gameName": account.get("gameName"),
+        "tagLine": account.get("tagLine"),
+        "profileIconId": summoner.get("profileIconId"),
+        "summonerLevel": summoner.get("summonerLevel"),
+        "rankedSolo": ranked_solo,
+        "rankedFlex": ranked_flex,
+        "puuid": puuid,
+    }
+    if emit is not None:
+        emit("player", {"player": player_info})
 
     match_ids_count = max(match_count, KARMA_SETUP_MATCH_COUNT)
-    match_ids_url = (
-        f"https://{routing}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids"
-        f"?start=0&count={match_ids_count}"
-    )
-    match_ids = optional_riot_get_json(
-        match_ids_url,
-        api_key,
-        "match_ids",
-        fallback=[],
-        diagnostics=diagnostics,
-    )
-    if not isinstance(match_ids, list):
-        match_ids = []
-    match_ids = [str(match_id).strip() for match_id in match_ids if str(match_id).strip()]
-
-    match_requests = [
-        (
-            match_id,
-            f"https://{routing}.api.riotgames.com/lol/match/v5/matches/{match_id}",
-            "match_detail",
-        )
-        for match_id in match_ids
-    ]
-    match_payloads = parallel_riot_fetch_json(
-        requests=match_requests,
+    match_ids = sync_player_match_ids(
+        routing=routing,
+        puuid=puuid,
+        count=match_ids_count,
         api_key=api_key,
         diagnostics=diagnostics,
-        fallback={},
-        max_workers=RIOT_PARALLEL_WORKERS,
     )
 
+    match_records = get_match_records(routing=routing, match_ids=match_ids, api_key=api_key, diagnostics=diagnostics)
+    update_player_sync_state(puuid, match_ids, match_records)
+    if HISTORY_BACKFILL_ENABLED and HISTORY_BACKFILL_MAX_GAMES > match_ids_count:
+        HISTORY_BACKFILL.request(routing, puuid, api_key)
+
     recent_matches: list[dict[str, Any]] = []
-    wins = 0
-    total_kills = 0
-    total_deaths = 0
-    total_assists = 0
-    total_cs = 0
-    support_games = 0
-    total_vision = 0
-    total_control_wards = 0
-    total_wards_cleared = 0
-    total_kp = 0.0
-    total_ally_utility = 0
-    total_cc_score = 0
-    role_counts: dict[str, int] = {}
-    karma_games = 0
-    karma_wins = 0
+    game_columns = PlayerGameColumns()
+    enemy_names: dict[int, str] = {0: "Unknown"}
     karma_item_counter: Counter[int] = Counter()
     karma_keystone_counter: Counter[int] = Counter()
     karma_primary_style_counter: Counter[int] = Counter()
     karma_secondary_style_counter: Counter[int] = Counter()
     karma_secondary_keystone_counter: Counter[int] = Counter()
     karma_spell_counter: Counter[tuple[int, int]] = Counter()
-    karma_kills_sum = 0
-    karma_deaths_sum = 0
-    karma_assists_sum = 0
-    karma_kp_sum = 0.0
-    karma_vision_per_min_sum = 0.0
-    karma_control_wards_sum = 0
     karma_assists_14_sum = 0
     karma_deaths_14_sum = 0
     karma_first_death_min_sum = 0.0
@@ -2081,134 +5299,63 @@ def player_summary(
     karma_gold_diff_14_sum = 0
     karma_xp_diff_14_sum = 0
     karma_lane_samples = 0
+    karma_lane_games = 0
+    # Per-game lane values, ranked one game at a time against the benchmark table.
+    karma_lane_values: dict[str, list[float]] = {
+        "assists_14": [],
+        "deaths_14": [],
+        "first_death_min": [],
+        "gold_diff_14": [],
+        "xp_diff_14": [],
+    }
     karma_trend: list[dict[str, Any]] = []
-    matchup_stats: dict[str, dict[str, Any]] = {}
     enemy_support_counter: Counter[int] = Counter()
     enemy_bot_counter: Counter[int] = Counter()
     karma_recent_match_rows: list[dict[str, Any]] = []
     timeline_contexts: list[dict[str, Any]] = []
 
     for match_id in match_ids:
-        match = match_payloads.get(match_id, {})
-        if not isinstance(match, dict) or "info" not in match:
+        record = match_records.get(match_id)
+        if record is None:
             continue
-        participants = match.get("info", {}).get("participants", [])
-        participant = next((p for p in participants if p.get("puuid") == puuid), None)
-        if not participant:
+        participant = record.player(puuid)
+        if participant is None:
             continue
 
-        champion_id = safe_num(participant.get("championId"))
-        kills = safe_num(participant.get("kills"))
-        deaths = safe_num(participant.get("deaths"))
-        assists = safe_num(participant.get("assists"))
-        cs = safe_num(participant.get("totalMinionsKilled")) + safe_num(participant.get("neutralMinionsKilled"))
-        win = bool(participant.get("win"))
-        role = str(
-            participant.get("teamPosition")
-            or participant.get("individualPosition")
-            or "UNKNOWN"
-        ).upper()
+        deaths = participant.deaths
+        win = participant.win
         should_include_in_display = len(recent_matches) < match_count
-        if should_include_in_display:
-            role_counts[role] = role_counts.get(role, 0) + 1
-
-        team_id = participant.get("teamId")
-        team_kills = sum(
-            safe_num(p.get("kills"))
-            for p in participants
-            if p.get("teamId") == team_id
-        )
-        kill_participation = round(((kills + assists) * 100 / team_kills), 1) if team_kills > 0 else 0.0
 
-        vision_score = safe_num(participant.get("visionScore"))
-        control_wards = safe_num(
-            participant.get("detectorWardsPlaced")
-            or participant.get("visionWardsBoughtInGame")
-        )
-        wards_cleared = safe_num(participant.get("wardsKilled"))
-        ally_utility = (
-            safe_num(participant.get("totalHealsOnTeammates"))
-            + safe_num(participant.get("totalDamageShieldedOnTeammates"))
-        )
-        cc_score = safe_num(participant.get("timeCCingOthers"))
-
-        if champion_id == KARMA_CHAMPION_ID or str(participant.get("championName", "")).lower() == "karma":
-            karma_games += 1
-            karma_wins += 1 if win else 0
-            karma_kills_sum += kills
-            karma_deaths_sum += deaths
-            karma_assists_sum += assists
-            karma_kp_sum += kill_participation
-            duration_minutes = max(round(safe_num(match.get("info", {}).get("gameDuration")) / 60, 1), 0.1)
-            karma_vision_per_min_sum += vision_score / duration_minutes
-            karma_control_wards_sum += control_wards
-
-            for slot in ("item0", "item1", "item2", "item3", "item4", "item5", "item6"):
-                item_id = safe_num(participant.get(slot))
+        metric_values = game_metric_values(record, participant, enemy_names)
+        game_columns.append(match_id, participant.role, metric_values)
+        kill_participation = metric_values["kill_participation"]
+        vision_score = participant.vision_score
+        control_wards = participant.control_wards
+        duration_minutes = max(round(record.duration_seconds / 60, 1), 0.1)
+        enemy_support_id = int(metric_values["enemy_support_id"])
+        enemy_bot_id = int(metric_values["enemy_bot_id"])
+
+        if metric_values["is_karma"]:
+            for item_id in participant.items:
                 if item_id > 0:
                     karma_item_counter[item_id] += 1
 
-            perks = participant.get("perks", {})
-            styles = perks.get("styles", []) if isinstance(perks, dict) else []
-            if isinstance(styles, list) and styles:
-                primary = styles[0] if isinstance(styles[0], dict) else {}
-                primary_style = safe_num(primary.get("style"))
-                if primary_style > 0:
-                    karma_primary_style_counter[primary_style] += 1
-                primary_selections = primary.get("selections", []) if isinstance(primary, dict) else []
-                if isinstance(primary_selections, list) and primary_selections:
-                    keystone = safe_num((primary_selections[0] or {}).get("perk"))
-                    if keystone > 0:
-                        karma_keystone_counter[keystone] += 1
-
-            if isinstance(styles, list) and len(styles) > 1:
-                secondary = styles[1] if isinstance(styles[1], dict) else {}
-                secondary_style = safe_num(secondary.get("style"))
-                if secondary_style > 0:
-                    karma_secondary_style_counter[secondary_style] += 1
-                secondary_selections = secondary.get("selections", []) if isinstance(secondary, dict) else []
-                if isinstance(secondary_selections, list) and secondary_selections:
-                    secondary_rune = safe_num((secondary_selections[0] or {}).get("perk"))
-                    if secondary_rune > 0:
-                        karma_secondary_keystone_counter[secondary_rune] += 1
-
-            summoner1 = safe_num(participant.get("summoner1Id"))
-            summoner2 = safe_num(participant.get("summoner2Id"))
-            if summoner1 > 0 and summoner2 > 0:
-                karma_spell_counter[(summoner1, summoner2)] += 1
-
-            enemy_team_id = 200 if safe_num(participant.get("teamId")) == 100 else 100
-            enemy_support = next(
-                (
-                    p for p in participants
-                    if safe_num(p.get("teamId")) == enemy_team_id
-                    and str(p.get("teamPosition", "")).upper() in {"UTILITY", "SUPPORT"}
-                ),
-                None,
-            )
-            enemy_bot = next(
-                (
-                    p for p in participants
-                    if safe_num(p.get("teamId")) == enemy_team_id
-                    and str(p.get("teamPosition", "")).upper() in {"BOTTOM", "BOT"}
-                ),
-                None,
-            )
-            enemy_support_name = (enemy_support or {}).get("championName", "Unknown")
-            enemy_bot_name = (enemy_bot or {}).get("championName", "Unknown")
-            enemy_support_id = safe_num((enemy_support or {}).get("championId"))
-            enemy_bot_id = safe_num((enemy_bot or {}).get("championId"))
-            primary_perk_ids = []
-            if isinstance(styles, list) and styles and isinstance(styles[0], dict):
-                selections = styles[0].get("selections", [])
-                if isinstance(selections, list):
-                    primary_perk_ids = [safe_num((selection or {}).get("perk")) for selection in selections]
-            secondary_perk_ids = []
-            if isinstance(styles, list) and len(styles) > 1 and isinstance(styles[1], dict):
-                selections = styles[1].get("selections", [])
-                if isinstance(selections, list):
-                    secondary_perk_ids = [safe_num((selection or {}).get("perk")) for selection in selections]
-            stat_perks = perks.get("statPerks", {}) if isinstance(perks, dict) else {}
+            if participant.primary_style > 0:
+                karma_primary_style_counter[participant.primary_style] += 1
+            if participant.primary_perks and participant.primary_perks[0] > 0:
+                karma_keystone_counter[participant.primary_perks[0]] += 1
+            if participant.secondary_style > 0:
+                karma_secondary_style_counter[participant.secondary_style] += 1
+            if participant.secondary_perks and participant.secondary_perks[0] > 0:
+                karma_secondary_keystone_counter[participant.secondary_perks[0]] += 1
+
+            if participant.summoner1 > 0 and participant.summoner2 > 0:
+                karma_spell_counter[(participant.summoner1, participant.summoner2)] += 1
+
+            enemy_team_id = 200 if participant.team_id == 100 else 100
+            enemy_support = record.lane_player(enemy_team_id, "UTILITY")
+            primary_perk_ids = participant.primary_perks
+            secondary_perk_ids = participant.secondary_perks
             karma_recent_match_rows.append(
                 {
                     "source": "riot_recent",
@@ -2217,50 +5364,26 @@ def player_summary(
                     "enemyBotId": enemy_bot_id,
                     "win": 1 if win else 0,
                     "item_core": [],
-                    "item_final": [
-                        safe_num(participant.get("item0")),
-                        safe_num(participant.get("item1")),
-                        safe_num(participant.get("item2")),
-                        safe_num(participant.get("item3")),
-                        safe_num(participant.get("item4")),
-                        safe_num(participant.get("item5")),
-                        safe_num(participant.get("item6")),
-                    ],
+                    "item_final": list(participant.items),
                     "spell": {
-                        "spell_1": safe_num(participant.get("summoner1Id")),
-                        "spell_2": safe_num(participant.get("summoner2Id")),
+                        "spell_1": participant.summoner1,
+                        "spell_2": participant.summoner2,
                     },
                     "rune": {
-                        "perk_primary_style": safe_num((styles[0] or {}).get("style")) if isinstance(styles, list) and styles else 0,
+                        "perk_primary_style": participant.primary_style,
                         "perk_0": primary_perk_ids[0] if len(primary_perk_ids) > 0 else 0,
                         "perk_1": primary_perk_ids[1] if len(primary_perk_ids) > 1 else 0,
                         "perk_2": primary_perk_ids[2] if len(primary_perk_ids) > 2 else 0,
                         "perk_3": primary_perk_ids[3] if len(primary_perk_ids) > 3 else 0,
-                        "perk_sub_style": safe_num((styles[1] or {}).get("style")) if isinstance(styles, list) and len(styles) > 1 else 0,
+                        "perk_sub_style": participant.secondary_style,
                         "perk_4": secondary_perk_ids[0] if len(secondary_perk_ids) > 0 else 0,
                         "perk_5": secondary_perk_ids[1] if len(secondary_perk_ids) > 1 else 0,
-                        "stat_perk_0": safe_num((stat_perks or {}).get("offense")),
-                        "stat_perk_1": safe_num((stat_perks or {}).get("flex")),
-                        "stat_perk_2": safe_num((stat_perks or {}).get("defense")),
+                        "stat_perk_0": participant.stat_perks[0],
+                        "stat_perk_1": participant.stat_perks[1],
+                        "stat_perk_2": participant.stat_perks[2],
                     },
                 }
             )
-            matchup_key = f"{enemy_support_name}|{enemy_bot_name}"
-            if matchup_key not in matchup_stats:
-                matchup_stats[matchup_key] = {
-                    "enemySupport": enemy_support_name,
-                    "enemyBot": enemy_bot_name,
-                    "games": 0,
-                    "wins": 0,
-                    "kpSum": 0.0,
-                    "deathsSum": 0,
-                    "visionPerMinSum": 0.0,
-                }
-            matchup_stats[matchup_key]["games"] += 1
-            matchup_stats[matchup_key]["wins"] += 1 if win else 0
-            matchup_stats[matchup_key]["kpSum"] += kill_participation
-            matchup_stats[matchup_key]["deathsSum"] += deaths
-            matchup_stats[matchup_key]["visionPerMinSum"] += vision_score / duration_minutes
             if enemy_support_id > 0:
                 enemy_support_counter[enemy_support_id] += 1
             if enemy_bot_id > 0:
@@ -2271,7 +5394,7 @@ def player_summary(
                 {
                     "matchId": match_id,
                     "result": "Win" if win else "Loss",
-                    "timestamp": safe_num(match.get("info", {}).get("gameEndTimestamp")),
+                    "timestamp": record.end_timestamp,
                     "deaths": deaths,
                     "killParticipation": round(kill_participation, 1),
                     "visionPerMin": round(vision_score / duration_minutes, 2),
@@ -2283,180 +5406,176 @@ def player_summary(
                     "xpDiff14": 0,
                 }
             )
-            if include_timeline:
+            if timeline_mode != "off":
                 timeline_contexts.append(
                     {
                         "matchId": match_id,
-                        "participantId": safe_num(participant.get("participantId")),
-                        "enemySupportPid": safe_num((enemy_support or {}).get("participantId")),
+                        "participantId": participant.participant_id,
+                        "enemySupportPid": enemy_support.participant_id if enemy_support else 0,
                         "trendIndex": trend_index,
+                        "benchmark": bool(metric_values["is_benchmark_karma"]),
                     }
                 )
 
         if should_include_in_display:
-            total_kills += kills
-            total_deaths += deaths
-            total_assists += assists
-            total_cs += cs
-            wins += 1 if win else 0
-            if is_support_role(role):
-                support_games += 1
-                total_vision += vision_score
-                total_control_wards += control_wards
-                total_wards_cleared += wards_cleared
-                total_kp += kill_participation
-                total_ally_utility += ally_utility
-                total_cc_score += cc_score
-
-            recent_matches.append(
-                {
-                    "matchId": match_id,
-                    "championId": champion_id,
-                    "champion": participant.get("championName", "Unknown"),
-                    "queue": match.get("info", {}).get("queueId"),
-                    "result": "Win" if win else "Loss",
-                    "kills": kills,
-                    "deaths": deaths,
-                    "assists": assists,
-                    "cs": cs,
-                    "gold": safe_num(participant.get("goldEarned")),
-                    "durationMin": round(safe_num(match.get("info", {}).get("gameDuration")) / 60, 1),
-                    "role": role,
-                    "killParticipation": kill_participation,
-                    "visionScore": vision_score,
-                    "controlWards": control_wards,
-                    "wardsCleared": wards_cleared,
-                    "allyUtility": ally_utility,
-                    "ccScore": cc_score,
-                }
-            )
+            recent_matches.append(recent_match_row(match_id, record, participant, kill_participation))
 
-    if include_timeline and timeline_contexts:
-        timeline_requests = [
-            (
-                str(ctx.get("matchId", "")),
-                f"https://{routing}.api.riotgames.com/lol/match/v5/matches/{str(ctx.get('matchId', ''))}/timeline",
-                "match_timeline",
+    # Display aggregates cover the newest games_played games; Karma ones cover every loaded game.
+    games_played = len(recent_matches)
+    wins = int(game_columns.total("win", last=games_played))
+    total_kills = int(game_columns.total("kills", last=games_played))
+    total_deaths = int(game_columns.total("deaths", last=games_played))
+    total_assists = int(game_columns.total("assists", last=games_played))
+    total_cs = int(game_columns.total("cs", last=games_played))
+    role_counts = game_columns.role_counts(last=games_played)
+    support_games = game_columns.count("is_support", last=games_played)
+
+    def support_total(name: str) -> float:
+        return game_columns.total(name, last=games_played, where="is_support")
+
+    total_vision = int(support_total("vision_score"))
+    total_control_wards = int(support_total("control_wards"))
+    total_wards_cleared = int(support_total("wards_cleared"))
+    total_kp = support_total("kill_participation")
+    total_ally_utility = int(support_total("ally_utility"))
+    total_cc_score = int(support_total("cc_score"))
+
+    karma_games = game_columns.count("is_karma")
+    karma_wins = int(game_columns.total("win", where="is_karma"))
+    karma_kills_sum = int(game_columns.total("kills", where="is_karma"))
+    karma_deaths_sum = int(game_columns.total("deaths", where="is_karma"))
+    karma_assists_sum = int(game_columns.total("assists", where="is_karma"))
+    karma_kp_sum = game_columns.total("kill_participation", where="is_karma")
+    karma_vision_per_min_sum = game_columns.total("vision_per_min", where="is_karma")
+    karma_control_wards_sum = int(game_columns.total("control_wards", where="is_karma"))
+
+    avg_kda = (
+        (total_kills + total_assists) / max(total_deaths, 1)
+        if games_played
+        else 0.0
+    )
+    win_rate = (wins * 100 / games_played) if games_played else 0.0
+
+    primary_role = max(role_counts, key=role_counts.get) if role_counts else "UNKNOWN"
+    matches_section = {
+        "recentMatches": recent_matches,
+        "aggregate": {
+            "games": games_played,
+            "wins": wins,
+            "losses": max(games_played - wins, 0),
+            "winRate": round(win_rate, 1),
+            "avgKda": round(avg_kda, 2),
+            "avgCs": round((total_cs / games_played), 1) if games_played else 0.0,
+            "avgKills": round((total_kills / games_played), 1) if games_played else 0.0,
+            "avgDeaths": round((total_deaths / games_played), 1) if games_played else 0.0,
+            "avgAssists": round((total_assists / games_played), 1) if games_played else 0.0,
+        },
+        "supportInsights": {
+            "primaryRole": primary_role,
+            "supportGames": support_games,
+            "supportRate": round((support_games * 100 / games_played), 1) if games_played else 0.0,
+            "avgVisionScore": round((total_vision / support_games), 1) if support_games else 0.0,
+            "avgControlWards": round((total_control_wards / support_games), 1) if support_games else 0.0,
+            "avgWardsCleared": round((total_wards_cleared / support_games), 1) if support_games else 0.0,
+            "avgKillParticipation": round((total_kp / support_games), 1) if support_games else 0.0,
+            "avgAllyUtility": round((total_ally_utility / support_games), 0) if support_games else 0.0,
+            "avgCcScore": round((total_cc_score / support_games), 1) if support_games else 0.0,
+        },
+    }
+    if emit is not None:
+        emit("matches", matches_section)
+
+    lane_pending = 0
+    if timeline_contexts:
+        lane_match_ids = [str(ctx.get("matchId", "")) for ctx in timeline_contexts if str(ctx.get("matchId", "")).strip()]
+        if timeline_mode == "sync":
+            lane_records = get_lane_records(
+                routing=routing,
+                match_ids=lane_match_ids,
+                api_key=api_key,
+                diagnostics=diagnostics,
             )
-            for ctx in timeline_contexts
-            if str(ctx.get("matchId", "")).strip()
-        ]
-        timeline_payloads = parallel_riot_fetch_json(
-            requests=timeline_requests,
-            api_key=api_key,
-            diagnostics=diagnostics,
-            fallback={},
-            max_workers=RIOT_PARALLEL_WORKERS,
-        )
+        else:
+            # Answer from whatever is stored now; the rest fills in for a later request.
+            lane_records = load_lane_records(lane_match_ids, diagnostics)
+            missing_lane_ids = lane_record_fetchable(
+                [match_id for match_id in lane_match_ids if match_id not in lane_records]
+            )
+            if missing_lane_ids:
+                LANE_RECORD_FETCHER.request(routing, missing_lane_ids, api_key)
+                lane_pending = LANE_RECORD_FETCHER.pending(missing_lane_ids)
 
         for ctx in timeline_contexts:
             match_id = str(ctx.get("matchId", "")).strip()
-            timeline = timeline_payloads.get(match_id, {})
-            if not isinstance(timeline, dict):
+            lane_record = lane_records.get(match_id)
+            if lane_record is None:
                 continue
 
-            participant_id = safe_num(ctx.get("participantId"))
-            enemy_support_pid = safe_num(ctx.get("enemySupportPid"))
+            karma_lane_games += 1
             trend_index = safe_num(ctx.get("trendIndex"))
-            assists_14 = 0
-            deaths_14 = 0
-            first_death_min = 0.0
-            gold_diff_14 = 0
-            xp_diff_14 = 0
-
-            timeline_info = timeline.get("info", {})
-            frames = timeline_info.get("frames", []) if isinstance(timeline_info, dict) else []
-            for frame in frames:
-                frame_ts = safe_num(frame.get("timestamp"))
-                if frame_ts > 14 * 60 * 1000:
-                    continue
-                events = frame.get("events", [])
-                if not isinstance(events, list):
-                    continue
-                for event in events:
-                    if event.get("type") != "CHAMPION_KILL":
-                        continue
-                    if safe_num(event.get("victimId")) == participant_id:
-                        deaths_14 += 1
-                        if first_death_min <= 0:
-                            first_death_min = round(safe_num(event.get("timestamp")) / 60000, 1)
-                    assisting = event.get("assistingParticipantIds", [])
-                    if isinstance(assisting, list) and participant_id in [safe_num(x) for x in assisting]:
-                        assists_14 += 1
-
-            frame_14 = frame_at_or_before(frames, 14 * 60 * 1000)
-            if frame_14 and participant_id > 0 and enemy_support_pid > 0:
-                pframes = frame_14.get("participantFrames", {})
-                my_frame = pframes.get(str(participant_id), {}) if isinstance(pframes, dict) else {}
-                opp_frame = pframes.get(str(enemy_support_pid), {}) if isinstance(pframes, dict) else {}
-                if isinstance(my_frame, dict) and isinstance(opp_frame, dict):
-                    gold_diff_14 = safe_num(my_frame.get("totalGold")) - safe_num(opp_frame.get("totalGold"))
-                    xp_diff_14 = safe_num(my_frame.get("xp")) - safe_num(opp_frame.get("xp"))
-                    karma_gold_diff_14_sum += gold_diff_14
-                    karma_xp_diff_14_sum += xp_diff_14
-                    karma_lane_samples += 1
-
-            karma_assists_14_sum += assists_14
-            karma_deaths_14_sum += deaths_14
-            if first_death_min > 0:
-                karma_first_death_min_sum += first_death_min
+            benchmark_game = bool(ctx.get("benchmark"))
+            lane_metrics, has_lane_diff = lane_record.metrics(
+                safe_num(ctx.get("participantId")),
+                safe_num(ctx.get("enemySupportPid")),
+            )
+            if has_lane_diff:
+                karma_gold_diff_14_sum += lane_metrics["goldDiff14"]
+                karma_xp_diff_14_sum += lane_metrics["xpDiff14"]
+                karma_lane_samples += 1
+                if benchmark_game:
+                    karma_lane_values["gold_diff_14"].append(lane_metrics["goldDiff14"])
+                    karma_lane_values["xp_diff_14"].append(lane_metrics["xpDiff14"])
+
+            karma_assists_14_sum += lane_metrics["assists14"]
+            karma_deaths_14_sum += lane_metrics["deaths14"]
+            if benchmark_game:
+                karma_lane_values["assists_14"].append(lane_metrics["assists14"])
+                karma_lane_values["deaths_14"].append(lane_metrics["deaths14"])
+            if lane_metrics["firstDeathMin"] > 0:
+                karma_first_death_min_sum += lane_metrics["firstDeathMin"]
                 karma_first_death_samples += 1
+                if benchmark_game:
+                    karma_lane_values["first_death_min"].append(lane_metrics["firstDeathMin"])
 
             if 0 <= trend_index < len(karma_trend):
-                trend_row = karma_trend[trend_index]
-                trend_row["assists14"] = assists_14
-                trend_row["deaths14"] = deaths_14
-                trend_row["firstDeathMin"] = first_death_min
-                trend_row["goldDiff14"] = gold_diff_14
-                trend_row["xpDiff14"] = xp_diff_14
+                karma_trend[trend_index].update(lane_metrics)
 
-    games_played = len(recent_matches)
-    avg_kda = (
-        (total_kills + total_assists) / max(total_deaths, 1)
-        if games_played
-        else 0.0
+    matchup_groups = game_columns.group_totals(
+        ("enemy_support_id", "enemy_bot_id"),
+        ("win", "kill_participation", "deaths", "vision_per_min"),
+        where="is_karma",
     )
-    win_rate = (wins * 100 / games_played) if games_played else 0.0
-
-    primary_role = max(role_counts, key=role_counts.get) if role_counts else "UNKNOWN"
     matchup_breakdown = sorted(
         [
             {
-                "enemySupport": row["enemySupport"],
-                "enemyBot": row["enemyBot"],
-                "games": row["games"],
-                "winRate": round((row["wins"] * 100 / row["games"]), 1) if row["games"] else 0.0,
-                "avgKillParticipation": round((row["kpSum"] / row["games"]), 1) if row["games"] else 0.0,
-                "avgDeaths": round((row["deathsSum"] / row["games"]), 2) if row["games"] else 0.0,
-                "avgVisionPerMin": round((row["visionPerMinSum"] / row["games"]), 2) if row["games"] else 0.0,
+                "enemySupport": enemy_names.get(support_id, "Unknown"),
+                "enemyBot": enemy_names.get(bot_id, "Unknown"),
+                "games": games,
+                "winRate": round((totals["win"] * 100 / games), 1) if games else 0.0,
+                "avgKillParticipation": round((totals["kill_participation"] / games), 1) if games else 0.0,
+                "avgDeaths": round((totals["deaths"] / games), 2) if games else 0.0,
+                "avgVisionPerMin": round((totals["vision_per_min"] / games), 2) if games else 0.0,
             }
-            for row in matchup_stats.values()
+            for (support_id, bot_id), games, totals in matchup_groups
         ],
         key=lambda x: x["games"],
         reverse=True,
     )[:10]
 
-    selected_support_id = safe_num(selected_enemy_support_id)
-    selected_bot_id = safe_num(selected_enemy_bot_id)
-    if selected_support_id <= 0 and enemy_support_counter:
-        selected_support_id = enemy_support_counter.most_common(1)[0][0]
-    if selected_bot_id <= 0 and enemy_bot_counter:
-        selected_bot_id = enemy_bot_counter.most_common(1)[0][0]
-
-    karma_matchup = karma_matchup_recommendation_from_deeplol(
-        enemy_support_id=selected_support_id,
-        enemy_bot_id=selected_bot_id,
-        karma_games=karma_games,
-        karma_wins=karma_wins,
-        karma_item_counter=karma_item_counter,
-        karma_keystone_counter=karma_keystone_counter,
-        karma_primary_style_counter=karma_primary_style_counter,
-        karma_secondary_style_counter=karma_secondary_style_counter,
-        karma_secondary_keystone_counter=karma_secondary_keystone_counter,
-        karma_spell_counter=karma_spell_counter,
-        karma_recent_match_rows=karma_recent_match_rows,
-        diagnostics=diagnostics,
-    )
+    karma_aggregates = {
+        "karma_games": karma_games,
+        "karma_wins": karma_wins,
+        "karma_item_counter": karma_item_counter,
+        "karma_keystone_counter": karma_keystone_counter,
+        "karma_primary_style_counter": karma_primary_style_counter,
+        "karma_secondary_style_counter": karma_secondary_style_counter,
+        "karma_secondary_keystone_counter": karma_secondary_keystone_counter,
+        "karma_spell_counter": karma_spell_counter,
+        "karma_recent_match_rows": karma_recent_match_rows,
+        "default_support_id": enemy_support_counter.most_common(1)[0][0] if enemy_support_counter else 0,
+        "default_bot_id": enemy_bot_counter.most_common(1)[0][0] if enemy_bot_counter else 0,
+    }
+    set_karma_aggregates(player_cache_key(game_name, tag_line, platform, match_count), karma_aggregates)
 
     karma_win_rate = round((karma_wins * 100 / karma_games), 1) if karma_games else 0.0
     karma_kda = round(((karma_kills_sum + karma_assists_sum) / max(karma_deaths_sum, 1)), 2) if karma_games else 0.0
@@ -2464,12 +5583,12 @@ def player_summary(
     karma_kp = round((karma_kp_sum / karma_games), 1) if karma_games else 0.0
     karma_vpm = round((karma_vision_per_min_sum / karma_games), 2) if karma_games else 0.0
     karma_ctrl_pg = round((karma_control_wards_sum / karma_games), 2) if karma_games else 0.0
-    assists_14_pg = round((karma_assists_14_sum / karma_games), 2) if karma_games else 0.0
-    deaths_14_pg = round((karma_deaths_14_sum / karma_games), 2) if karma_games else 0.0
+    assists_14_pg = round((karma_assists_14_sum / karma_lane_games), 2) if karma_lane_games else 0.0
+    deaths_14_pg = round((karma_deaths_14_sum / karma_lane_games), 2) if karma_lane_games else 0.0
     first_death_avg = round((karma_first_death_min_sum / karma_first_death_samples), 2) if karma_first_death_samples else 0.0
     gold_diff_14 = round((karma_gold_diff_14_sum / karma_lane_samples), 1) if karma_lane_samples else 0.0
     xp_diff_14 = round((karma_xp_diff_14_sum / karma_lane_samples), 1) if karma_lane_samples else 0.0
-    timeline_metrics_enabled = bool(include_timeline)
+    timeline_metrics_enabled = karma_lane_games > 0
 
     delta_vs_targets = {
         "killParticipation": round(karma_kp - HIGH_LEVEL_TARGETS["kp"], 1),
@@ -2490,19 +5609,42 @@ def player_summary(
         ),
     }
 
-    deficit_rows = [
-        ("Kill Participation", max(0.0, (HIGH_LEVEL_TARGETS["kp"] - karma_kp) / max(HIGH_LEVEL_TARGETS["kp"], 1.0)), 20),
-        ("Deaths per game", max(0.0, (karma_deaths_pg - HIGH_LEVEL_TARGETS["deaths"]) / max(HIGH_LEVEL_TARGETS["deaths"], 1.0)), 25),
-        ("Vision per minute", max(0.0, (HIGH_LEVEL_TARGETS["vision_per_min"] - karma_vpm) / max(HIGH_LEVEL_TARGETS["vision_per_min"], 1.0)), 20),
-        ("Control wards per game", max(0.0, (HIGH_LEVEL_TARGETS["control_wards"] - karma_ctrl_pg) / max(HIGH_LEVEL_TARGETS["control_wards"], 1.0)), 15),
+    score_inputs = [
+        ("Kill Participation", "kp", karma_kp, 20),
+        ("Deaths per game", "deaths", karma_deaths_pg, 25),
+        ("Vision per minute", "vision_per_min", karma_vpm, 20),
+        ("Control wards per game", "control_wards", karma_ctrl_pg, 15),
     ]
     if timeline_metrics_enabled:
-        deficit_rows.extend(
+        score_inputs.extend(
             [
-                ("Assists before 14", max(0.0, (HIGH_LEVEL_TARGETS["assists_14"] - assists_14_pg) / max(HIGH_LEVEL_TARGETS["assists_14"], 1.0)), 10),
-                ("Deaths before 14", max(0.0, (deaths_14_pg - HIGH_LEVEL_TARGETS["deaths_14"]) / max(HIGH_LEVEL_TARGETS["deaths_14"], 1.0)), 10),
+                ("Assists before 14", "assists_14", assists_14_pg, 10),
+                ("Deaths before 14", "deaths_14", deaths_14_pg, 10),
             ]
         )
+    # With a benchmark table the deficit is the distance below the target percentile of KR OTP
+    # games; otherwise it is the relative gap to the fixed HIGH_LEVEL_TARGETS value.
+    karma_game_values = {
+        "kp": game_columns.values("kill_participation", where="is_benchmark_karma"),
+        "deaths": game_columns.values("deaths", where="is_benchmark_karma"),
+        "vision_per_min": game_columns.values("vision_per_min", where="is_benchmark_karma"),
+        "control_wards": game_columns.values("control_wards", where="is_benchmark_karma"),
+        **karma_lane_values,
+    }
+    deficit_rows: list[tuple[str, float, int]] = []
+    metric_percentiles: dict[str, float] = {}
+    for label, metric, value, weight in score_inputs:
+        percentile = mean_benchmark_percentile(metric, karma_game_values[metric])
+        if percentile is None:
+            deficit = target_deficit(metric, value)
+        else:
+            metric_percentiles[metric] = round(percentile, 1)
+            deficit = max(0.0, (LANE_BENCHMARK_TARGET_PERCENTILE - percentile) / LANE_BENCHMARK_TARGET_PERCENTILE)
+        deficit_rows.append((label, deficit, weight))
+    for metric in ("gold_diff_14", "xp_diff_14", "first_death_min"):
+        percentile = mean_benchmark_percentile(metric, karma_game_values[metric])
+        if percentile is not None:
+            metric_percentiles[metric] = round(percentile, 1)
     penalty = sum(min(deficit, 1.5) * weight for _, deficit, weight in deficit_rows)
     improvement_score = max(0, round(100 - penalty))
     if improvement_score >= 85:
@@ -2520,39 +5662,10 @@ def player_summary(
     ][:3]
 
     payload: dict[str, Any] = {
-        "player": {
-            "gameName": account.get("gameName"),
-            "tagLine": account.get("tagLine"),
-            "profileIconId": summoner.get("profileIconId"),
-            "summonerLevel": summoner.get("summonerLevel"),
-            "rankedSolo": ranked_solo,
-            "rankedFlex": ranked_flex,
-            "puuid": puuid,
-        },
-        "recentMatches": recent_matches,
-        "aggregate": {
-            "games": games_played,
-            "wins": wins,
-            "losses": max(games_played - wins, 0),
-            "winRate": round(win_rate, 1),
-            "avgKda": round(avg_kda, 2),
-            "avgCs": round((total_cs / games_played), 1) if games_played else 0.0,
-            "avgKills": round((total_kills / games_played), 1) if games_played else 0.0,
-            "avgDeaths": round((total_deaths / games_played), 1) if games_played else 0.0,
-            "avgAssists": round((total_assists / games_played), 1) if games_played else 0.0,
-        },
-        "supportInsights": {
-            "primaryRole": primary_role,
-            "supportGames": support_games,
-            "supportRate": round((support_games * 100 / games_played), 1) if games_played else 0.0,
-            "avgVisionScore": round((total_vision / support_games), 1) if support_games else 0.0,
-            "avgControlWards": round((total_control_wards / support_games), 1) if support_games else 0.0,
-            "avgWardsCleared": round((total_wards_cleared / support_games), 1) if support_games else 0.0,
-            "avgKillParticipation": round((total_kp / support_games), 1) if support_games else 0.0,
-            "avgAllyUtility": round((total_ally_utility / support_games), 0) if support_games else 0.0,
-            "avgCcScore": round((total_cc_score / support_games), 1) if support_games else 0.0,
-        },
-        "karmaMatchup": karma_matchup,
+        "player": player_info,
+        **matches_section,
+        # Filled in last: the Deeplol-backed recommendation is the slowest section.
+        "karmaMatchup": {},
         "karmaInsights": {
             "sampleMatches": KARMA_SETUP_MATCH_COUNT,
             "analyzedKarmaGames": karma_games,
@@ -2574,6 +5687,12 @@ def player_summary(
             "trend": karma_trend,
             "lanePhase": {
                 "timelineEnabled": timeline_metrics_enabled,
+                "mode": timeline_mode,
+                "coverage": {
+                    "games": karma_lane_games,
+                    "total": len(timeline_contexts),
+                    "pending": lane_pending,
+                },
                 "samples": karma_lane_samples,
                 "avgGoldDiff14": gold_diff_14,
                 "avgXpDiff14": xp_diff_14,
@@ -2582,22 +5701,175 @@ def player_summary(
                 "avgFirstDeathMin": first_death_avg,
             },
             "matchups": matchup_breakdown,
+            "history": history_summary(puuid, diagnostics),
             "improvementScore": {
                 "score": improvement_score,
                 "grade": improvement_grade,
                 "focusTargets": focus_targets,
+                "percentiles": metric_percentiles,
+                "benchmarkSource": LANE_BENCHMARK_CACHE["source"] if metric_percentiles else "",
             },
         },
     }
+    if emit is not None:
+        emit("insights", {"karmaInsights": payload["karmaInsights"]})
+    payload["karmaMatchup"] = karma_matchup_from_aggregates(
+        karma_aggregates,
+        enemy_support_id=selected_enemy_support_id,
+        enemy_bot_id=selected_enemy_bot_id,
+        diagnostics=diagnostics,
+    )
+    if emit is not None:
+        emit("matchup", {"karmaMatchup": payload["karmaMatchup"]})
     if debug_mode:
         payload["diagnostics"] = diagnostics
     return payload
 
 
+def is_data_path(url_path: str) -> bool:
+    try:
+        requested = (BASE_DIR / urllib.parse.unquote(url_path).lstrip("/")).resolve()
+    except (OSError, ValueError):
+        return True
+    return requested == DATA_DIR or DATA_DIR in requested.parents
+
+
+def parse_player_query(query: dict[str, list[str]]) -> dict[str, Any]:
+    game_name = query.get("game_name", [LOCKED_GAME_NAME])[0].strip() or LOCKED_GAME_NAME
+    tag_line = query.get("tag_line", [LOCKED_TAG_LINE])[0].strip() or LOCKED_TAG_LINE
+    platform = query.get("platform", [PLATFORM_FIXED])[0].strip().lower()
+    timeline_mode = TIMELINE_MODE_DEFAULT
+    timeline_values = query.get("timeline") or query.get("include_timeline")
+    if timeline_values:
+        # timeline=1 forces the synchronous fetch, timeline=0 turns lane-phase metrics off.
+        timeline_text = timeline_values[0].strip().lower()
+        if timeline_text in TIMELINE_MODES:
+            timeline_mode = timeline_text
+        else:
+            timeline_mode = "sync" if is_truthy_text(timeline_text) else "off"
+    requested_matches = safe_num(query.get("matches", [str(DISPLAY_MATCH_COUNT_FIXED)])[0])
+    matches = min(
+        DISPLAY_MATCH_COUNT_MAX,
+        max(DISPLAY_MATCH_COUNT_FIXED, requested_matches or DISPLAY_MATCH_COUNT_FIXED),
+    )
+    return {
+        "game_name": game_name,
+        "tag_line": tag_line,
+        "platform": platform,
+        "matches": matches,
+        "enemy_support_id": safe_num(query.get("enemy_support_id", ["0"])[0]),
+        "enemy_bot_id": safe_num(query.get("enemy_bot_id", ["0"])[0]),
+        "debug_mode": query.get("debug", ["0"])[0].strip() == "1",
+        "timeline_mode": timeline_mode,
+    }
+
+
+def summary_request_args(request: dict[str, Any], api_key: str) -> tuple[str, dict[str, Any]]:
+    # Enemy picks are not part of the key: the cached summary carries the default matchup and
+    # other picks are recomputed from the cached Karma aggregates.
+    cache_key = "|".join(
+        [
+            player_cache_key(request["game_name"], request["tag_line"], request["platform"], request["matches"]),
+            f"timeline-{request['timeline_mode']}",
+        ]
+    )
+    summary_args = {
+        "game_name": request["game_name"],
+        "tag_line": request["tag_line"],
+        "platform": request["platform"],
+        "match_count": request["matches"],
+        "api_key": api_key,
+        "selected_enemy_support_id": 0,
+        "selected_enemy_bot_id": 0,
+        "debug_mode": request["debug_mode"],
+        "timeline_mode": request["timeline_mode"],
+    }
+    return cache_key, summary_args
+
+
+def with_requested_matchup(payload: dict[str, Any], request: dict[str, Any], api_key: str) -> dict[str, Any]:
+    default_matchup = payload.get("karmaMatchup", {}) if isinstance(payload.get("karmaMatchup"), dict) else {}
+    picks_changed = (
+        (request["enemy_support_id"] > 0 and request["enemy_support_id"] != safe_num(default_matchup.get("selectedEnemySupportId")))
+        or (request["enemy_bot_id"] > 0 and request["enemy_bot_id"] != safe_num(default_matchup.get("selectedEnemyBotId")))
+    )
+    if not picks_changed:
+        return payload
+    matchup, _diagnostics = matchup_for_request(request, api_key)
+    payload = dict(payload)
+    payload["karmaMatchup"] = matchup
+    return payload
+
+
+def api_error_payload(exc: Exception) -> tuple[HTTPStatus, dict[str, Any]]:
+    if isinstance(exc, RiotApiError):
+        return (
+            HTTPStatus.BAD_GATEWAY,
+            {
+                "error": f"Riot API error ({exc.status}) on {exc.endpoint}.",
+                "endpoint": exc.endpoint,
+                "detail": exc.detail[:250],
+                "hint": (
+                    "Your Riot key may be expired or missing access for this endpoint. "
+                    "Generate a fresh key at developer.riotgames.com, set RIOT_API_KEY, "
+                    "restart the server, and test /riot/account/v1/by-riot-id first."
+                    if exc.status in {401, 403}
+                    else ""
+                ),
+            },
+        )
+    if isinstance(exc, ServerBusyError):
+        return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Server is busy, try again shortly.", "retryAfter": exc.retry_after}
+    if isinstance(exc, urllib.error.URLError):
+        return HTTPStatus.BAD_GATEWAY, {"error": "Network error contacting Riot API."}
+    return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Unexpected server error.", "detail": str(exc)}
+
+
+def matchup_for_request(request: dict[str, Any], api_key: str) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    diagnostics: list[dict[str, Any]] = []
+    aggregate_key = player_cache_key(request["game_name"], request["tag_line"], request["platform"], request["matches"])
+    aggregates = get_karma_aggregates(aggregate_key)
+    if aggregates is None:
+        cache_key, summary_args = summary_request_args(request, api_key)
+        summary_args["debug_mode"] = False
+        get_or_compute_player_summary(cache_key, summary_args)
+        aggregates = get_karma_aggregates(aggregate_key) or {}
+    matchup = karma_matchup_from_aggregates(
+        aggregates,
+        enemy_support_id=request["enemy_support_id"],
+        enemy_bot_id=request["enemy_bot_id"],
+        diagnostics=diagnostics,
+    )
+    return matchup, diagnostics
+
+
 class LoLTrackerHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Socket timeout, so an idle keep-alive connection releases its thread.
+    timeout = KEEPALIVE_IDLE_SECONDS
+    api_routes = {
+        "/api/stats": "handle_stats",
+        "/api/matchup": "handle_matchup",
+        "/api/matches": "handle_matches",
+        "/api/stats/stream": "handle_stats_stream",
+    }
+    # Routes that need neither the Riot key nor a player query.
+    public_api_routes = {
+        "/api/catalog": "handle_catalog",
+    }
+
     def do_GET(self) -> None:
         parsed = urllib.parse.urlparse(self.path)
-        if parsed.path != "/api/stats":
+        public_route = self.public_api_routes.get(parsed.path)
+        if public_route is not None:
+            return getattr(self, public_route)(urllib.parse.parse_qs(parsed.query))
+        route = self.api_routes.get(parsed.path)
+        if route is None:
+            asset = STATIC_ASSETS.get(parsed.path)
+            if asset is not None:
+                return send_static_asset(self, asset)
+            if is_data_path(parsed.path):
+                return self.send_error(HTTPStatus.NOT_FOUND)
             return super().do_GET()
 
         api_key = os.environ.get("RIOT_API_KEY", "").strip()
@@ -2608,97 +5880,446 @@ class LoLTrackerHandler(SimpleHTTPRequestHandler):
                 {"error": "Missing RIOT_API_KEY environment variable."},
             )
 
-        query = urllib.parse.parse_qs(parsed.query)
-        game_name = query.get("game_name", [LOCKED_GAME_NAME])[0].strip() or LOCKED_GAME_NAME
-        tag_line = query.get("tag_line", [LOCKED_TAG_LINE])[0].strip() or LOCKED_TAG_LINE
-        platform = query.get("platform", [PLATFORM_FIXED])[0].strip().lower()
-        selected_enemy_support_id = safe_num(query.get("enemy_support_id", ["0"])[0])
-        selected_enemy_bot_id = safe_num(query.get("enemy_bot_id", ["0"])[0])
-        debug_mode = query.get("debug", ["0"])[0].strip() == "1"
-        include_timeline = TIMELINE_ENABLED_DEFAULT
-        if "timeline" in query:
-            include_timeline = is_truthy_text(query.get("timeline", ["0"])[0])
-        elif "include_timeline" in query:
-            include_timeline = is_truthy_text(query.get("include_timeline", ["0"])[0])
-
-        if platform not in PLATFORM_TO_ROUTING:
+        request = parse_player_query(urllib.parse.parse_qs(parsed.query))
+        if request["platform"] not in PLATFORM_TO_ROUTING:
             return json_response(
                 self,
                 HTTPStatus.BAD_REQUEST,
                 {"error": "Unsupported platform. Example: na1, euw1, kr, oc1."},
             )
 
-        requested_matches = safe_num(query.get("matches", [str(DISPLAY_MATCH_COUNT_FIXED)])[0])
-        matches = min(
-            DISPLAY_MATCH_COUNT_MAX,
-            max(DISPLAY_MATCH_COUNT_FIXED, requested_matches or DISPLAY_MATCH_COUNT_FIXED),
-        )
-        cache_key = "|".join(
-            [
-                game_name.lower(),
-                tag_line.lower(),
-                platform,
-                str(matches),
-                str(selected_enemy_support_id),
-                str(selected_enemy_bot_id),
-                "timeline1" if include_timeline else "timeline0",
-            ]
-        )
+        try:
+            return getattr(self, route)(request, api_key)
+        except Exception as exc:
+            status, payload = api_error_payload(exc)
+            headers = {"Retry-After": str(exc.retry_after)} if isinstance(exc, ServerBusyError) else None
+            return json_response(self, status, payload, headers=headers)
+
+    def handle_one_request(self) -> None:
+        if isinstance(self.server, BoundedThreadingHTTPServer):
+            self.server.mark_idle(self.connection)
+        super().handle_one_request()
+
+    def parse_request(self) -> bool:
+        # Called once the request line is in, so from here on the connection is busy.
+        if isinstance(self.server, BoundedThreadingHTTPServer):
+            self.server.mark_active(self.connection)
+        return super().parse_request()
+
+    def do_HEAD(self) -> None:
+        path = urllib.parse.urlparse(self.path).path
+        asset = STATIC_ASSETS.get(path)
+        if asset is not None:
+            return send_static_asset(self, asset, include_body=False)
+        if is_data_path(path):
+            return self.send_error(HTTPStatus.NOT_FOUND)
+        return super().do_HEAD()
+
+    def handle_stats(self, request: dict[str, Any], api_key: str) -> None:
+        cache_key, summary_args = summary_request_args(request, api_key)
+        if request["debug_mode"]:
+            summary_args["selected_enemy_support_id"] = request["enemy_support_id"]
+            summary_args["selected_enemy_bot_id"] = request["enemy_bot_id"]
+            payload = PIPELINE_ADMISSION.run(player_summary, **summary_args)
+            payload["cacheStats"] = cache_stats()
+            payload["admissionStats"] = PIPELINE_ADMISSION.stats()
+            return json_response(self, HTTPStatus.OK, payload)
 
-        if not debug_mode:
-            cached_payload = get_player_summary_cache(cache_key)
-            if cached_payload is not None:
-                return json_response(self, HTTPStatus.OK, cached_payload)
+        payload = with_requested_matchup(get_or_compute_player_summary(cache_key, summary_args), request, api_key)
+        return json_response(self, HTTPStatus.OK, payload, body=player_summary_body(cache_key, payload))
+
+    # Same payload as /api/stats, sent as Server-Sent Events one section at a time so the
+    # browser can paint the profile after the account lookup instead of after every stage.
+    def handle_stats_stream(self, request: dict[str, Any], api_key: str) -> None:
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("X-Accel-Buffering", "no")
+        # The stream has no length, so its end is marked by closing the connection.
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        sent: set[str] = set()
+        picks_requested = request["enemy_support_id"] > 0 or request["enemy_bot_id"] > 0
+
+        def send_event(event: str, data: dict[str, Any]) -> None:
+            body = json.dumps(data, separators=(",", ":"))
+            try:
+                self.wfile.write(f"event: {event}\ndata: {body}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            except OSError:
+                # The browser went away; keep computing so the summary cache still fills.
+                pass
+
+        def emit(section: str, fields: dict[str, Any]) -> None:
+            # A default matchup would be replaced right away when the page asked for specific picks.
+            if section in sent or (section == "matchup" and picks_requested and not request["debug_mode"]):
+                return
+            sent.add(section)
+            send_event(section, fields)
+
+        cache_key, summary_args = summary_request_args(request, api_key)
+        try:
+            if request["debug_mode"]:
+                summary_args["selected_enemy_support_id"] = request["enemy_support_id"]
+                summary_args["selected_enemy_bot_id"] = request["enemy_bot_id"]
+                payload = PIPELINE_ADMISSION.run(player_summary, **summary_args, emit=emit)
+            else:
+                cached_payload, is_fresh = get_player_summary_cache(cache_key)
+                if cached_payload is not None:
+                    if not is_fresh:
+                        SUMMARY_FLIGHTS.run_in_background(cache_key, refresh_player_summary, cache_key, summary_args)
+                    payload = cached_payload
+                else:
+                    # Joins an in-flight computation for the same key; its sections then arrive together at the end.
+                    payload = SUMMARY_FLIGHTS.run(cache_key, admit_player_summary, cache_key, {**summary_args, "emit": emit})
+                payload = with_requested_matchup(payload, request, api_key)
+                picks_requested = False
+        except Exception as exc:
+            _status, error_payload = api_error_payload(exc)
+            send_event("failed", error_payload)
+            return
+
+        for section, keys in SUMMARY_STREAM_SECTIONS:
+            emit(section, {key: payload.get(key) for key in keys})
+        done: dict[str, Any] = {}
+        if request["debug_mode"]:
+            done["diagnostics"] = payload.get("diagnostics", [])
+            done["cacheStats"] = cache_stats()
+            done["admissionStats"] = PIPELINE_ADMISSION.stats()
+        send_event("done", done)
+
+    def handle_matches(self, request: dict[str, Any], api_key: str) -> None:
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        cursor = query.get("cursor", [""])[0].strip()
+        if cursor and (not MATCH_ID_PATTERN.fullmatch(cursor) or match_sequence(cursor) <= 0):
+            return json_response(self, HTTPStatus.BAD_REQUEST, {"error": "Invalid cursor."})
+        puuid = resolve_player_puuid(request, api_key)
+        limit = safe_num(query.get("limit", [str(MATCH_PAGE_SIZE_DEFAULT)])[0]) or MATCH_PAGE_SIZE_DEFAULT
+        diagnostics: list[dict[str, Any]] = []
+        payload = PIPELINE_ADMISSION.run(
+            player_match_page,
+            routing=PLATFORM_TO_ROUTING[request["platform"]],
+            puuid=puuid,
+            cursor=cursor,
+            limit=min(MATCH_PAGE_SIZE_MAX, max(1, limit)),
+            api_key=api_key,
+            diagnostics=diagnostics,
+        )
+        if request["debug_mode"]:
+            payload["diagnostics"] = diagnostics
+        return json_response(self, HTTPStatus.OK, payload)
 
+    def handle_catalog(self, query: dict[str, list[str]]) -> None:
         try:
-            payload = player_summary(
-                game_name=game_name,
-                tag_line=tag_line,
-                platform=platform,
-                match_count=matches,
-                api_key=api_key,
-                selected_enemy_support_id=selected_enemy_support_id,
-                selected_enemy_bot_id=selected_enemy_bot_id,
-                debug_mode=debug_mode,
-                include_timeline=include_timeline,
-            )
-            if not debug_mode:
-                set_player_summary_cache(cache_key, payload)
-            return json_response(self, HTTPStatus.OK, payload)
-        except RiotApiError as exc:
-            return json_response(
-                self,
-                HTTPStatus.BAD_GATEWAY,
-                {
-                    "error": f"Riot API error ({exc.status}) on {exc.endpoint}.",
-                    "endpoint": exc.endpoint,
-                    "detail": exc.detail[:250],
-                    "hint": (
-                        "Your Riot key may be expired or missing access for this endpoint. "
-                        "Generate a fresh key at developer.riotgames.com, set RIOT_API_KEY, "
-                        "restart the server, and test /riot/account/v1/by-riot-id first."
-                        if exc.status in {401, 403}
-                        else ""
-                    ),
-                },
-            )
-        except urllib.error.URLError:
-            return json_response(
-                self,
-                HTTPStatus.BAD_GATEWAY,
-                {"error": "Network error contacting Riot API."},
-            )
+            catalog = get_catalog_payload()
         except Exception as exc:
             return json_response(
                 self,
-                HTTPStatus.INTERNAL_SERVER_ERROR,
-                {"error": "Unexpected server error.", "detail": str(exc)},
+                HTTPStatus.BAD_GATEWAY,
+                {"error": "Failed to load Data Dragon catalog.", "detail": str(exc)[:200]},
             )
+        requested_version = query.get("v", [""])[0].strip()
+        cache_control = IMMUTABLE_CACHE_CONTROL if requested_version == catalog["version"] else "no-cache"
+        return json_response(self, HTTPStatus.OK, catalog, cache_control=cache_control)
+
+    def handle_matchup(self, request: dict[str, Any], api_key: str) -> None:
+        matchup, diagnostics = matchup_for_request(request, api_key)
+        payload: dict[str, Any] = {"karmaMatchup": matchup}
+        if request["debug_mode"]:
+            payload["diagnostics"] = diagnostics
+            payload["cacheStats"] = cache_stats()
+        return json_response(self, HTTPStatus.OK, payload)
+
+
+# Background thread that refreshes shared caches shortly before they expire, so request
+# handlers only ever see cache hits for the static maps, OTP data and locked account.
+class CacheWarmer:
+    def __init__(self) -> None:
+        self._tasks: list[dict[str, Any]] = []
+        self._thread: threading.Thread | None = None
+
+    def add(self, name: str, interval_seconds: float, fn: Any) -> None:
+        self._tasks.append(
+            {
+                "name": name,
+                "interval": max(float(interval_seconds), 1.0),
+                "fn": fn,
+                "next_run": 0.0,
+                "last_error": "",
+            }
+        )
+
+    def start(self) -> None:
+        if self._thread is not None or not self._tasks:
+            return
+        self._thread = threading.Thread(target=self._run, name="cache-warmer", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            for task in self._tasks:
+                if task["next_run"] > now:
+                    continue
+                try:
+                    task["fn"]()
+                    task["last_error"] = ""
+                except Exception as exc:
+                    task["last_error"] = f"{type(exc).__name__}: {str(exc)[:150]}"
+                    print(f"Cache warm-up '{task['name']}' failed: {task['last_error']}")
+                task["next_run"] = time.monotonic() + task["interval"]
+            next_due = min(task["next_run"] for task in self._tasks)
+            time.sleep(min(max(next_due - time.monotonic(), 0.5), 30.0))
+
+
+def warm_static_reference_maps() -> None:
+    get_static_reference_maps(max_age_seconds=0)
+
+
+def warm_deeplol_otp_cache() -> None:
+    otp_rows = get_karma_otp_rows_from_deeplol(limit=12, max_age_seconds=0)
+    for future in prefetch_otp_builds(otp_rows[:5]).values():
+        future.result()
+
+
+def warm_locked_account_summary() -> None:
+    api_key = os.environ.get("RIOT_API_KEY", "").strip()
+    if not api_key:
+        return
+    cache_key, summary_args = summary_request_args(parse_player_query({}), api_key)
+    try:
+        # Same gate as a stale refresh: under load the warm-up waits for its next turn.
+        SUMMARY_FLIGHTS.run(cache_key, refresh_player_summary, cache_key, summary_args)
+    except ServerBusyError:
+        return
+
+
+CACHE_WARMER = CacheWarmer()
+CACHE_WARMER.add(
+    "static_reference_maps",
+    STATIC_CACHE_SECONDS - CACHE_WARM_LEAD_SECONDS["static"],
+    warm_static_reference_maps,
+)
+CACHE_WARMER.add(
+    "deeplol_otp",
+    DEEPL0L_CACHE_SECONDS - CACHE_WARM_LEAD_SECONDS["deeplol"],
+    warm_deeplol_otp_cache,
+)
+CACHE_WARMER.add(
+    "locked_account_summary",
+    PLAYER_SUMMARY_CACHE_SECONDS - CACHE_WARM_LEAD_SECONDS["summary"],
+    warm_locked_account_summary,
+)
+
+
+# ThreadingHTTPServer with a cap on connection threads. At the cap, the longest-idle keep-alive
+# connection is closed to make room; a new connection only gets the canned 503 from the accept loop
+# when every connection is in the middle of a request.
+class BoundedThreadingHTTPServer(ThreadingHTTPServer):
+    def __init__(self, server_address: tuple[str, int], handler_class: Any, max_connections: int) -> None:
+        super().__init__(server_address, handler_class)
+        self._max_connections = max_connections
+        self._connection_lock = threading.Lock()
+        self._open_connections = 0
+        # Connections waiting for their next request line -> when they started waiting.
+        self._idle_connections: dict[Any, float] = {}
+
+    def mark_idle(self, connection: Any) -> None:
+        with self._connection_lock:
+            self._idle_connections[connection] = time.monotonic()
+
+    def mark_active(self, connection: Any) -> None:
+        with self._connection_lock:
+            self._idle_connections.pop(connection, None)
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        reclaimed = None
+        with self._connection_lock:
+            at_capacity = self._open_connections >= self._max_connections
+            if at_capacity and self._idle_connections:
+                reclaimed = min(self._idle_connections, key=self._idle_connections.__getitem__)
+                del self._idle_connections[reclaimed]
+            if not at_capacity or reclaimed is not None:
+                self._open_connections += 1
+        if reclaimed is not None:
+            try:
+                # Wakes the idle handler's blocking read so its thread exits.
+                reclaimed.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        elif at_capacity:
+            try:
+                request.sendall(busy_response_bytes())
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self._release_connection(request)
+            raise
+
+    def process_request_thread(self, request: Any, client_address: Any) -> None:
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._release_connection(request)
+
+    def _release_connection(self, request: Any) -> None:
+        with self._connection_lock:
+            self._open_connections -= 1
+            self._idle_connections.pop(request, None)
+
+
+# wfile for a handler running on an executor thread: each write is handed to the event loop and
+# waits for the transport to drain, so a slow client only holds up its own response.
+class AsyncResponseWriter:
+    def __init__(self, loop: asyncio.AbstractEventLoop, writer: asyncio.StreamWriter) -> None:
+        self._loop = loop
+        self._writer = writer
+
+    def write(self, data: bytes) -> int:
+        payload = bytes(data)
+        future = asyncio.run_coroutine_threadsafe(self._write(payload), self._loop)
+        try:
+            future.result(timeout=KEEPALIVE_IDLE_SECONDS + 1)
+        except FutureTimeoutError:
+            future.cancel()
+            self._loop.call_soon_threadsafe(self._writer.transport.abort)
+            raise ConnectionResetError("client stopped reading") from None
+        return len(payload)
+
+    async def _write(self, payload: bytes) -> None:
+        if self._writer.is_closing():
+            raise ConnectionResetError("client disconnected")
+        self._writer.write(payload)
+        try:
+            await asyncio.wait_for(self._writer.drain(), KEEPALIVE_IDLE_SECONDS)
+        except asyncio.TimeoutError:
+            # A client that stops reading would otherwise pin this executor thread for good.
+            self._writer.transport.abort()
+            raise ConnectionResetError("client stopped reading") from None
+
+    def flush(self) -> None:
+        pass
+
+
+# Runs the regular handler for one request the event loop has already read off the socket.
+class AsyncBridgeHandler(LoLTrackerHandler):
+    def __init__(
+        self,
+        raw_request: bytes,
+        wfile: AsyncResponseWriter,
+        client_address: tuple[str, int],
+        server: Any,
+    ) -> None:
+        self._raw_request = raw_request
+        self._bridge_wfile = wfile
+        super().__init__(None, client_address, server)
+
+    def setup(self) -> None:
+        self.rfile = io.BytesIO(self._raw_request)
+        self.wfile = self._bridge_wfile
+
+    def handle(self) -> None:
+        # Keep-alive is decided by the event loop, which reads the next request itself.
+        self.close_connection = True
+        self.handle_one_request()
+
+    def finish(self) -> None:
+        pass
+
+
+ASYNC_PIPELINE_EXECUTOR = ThreadPoolExecutor(max_workers=ASYNC_PIPELINE_WORKERS, thread_name_prefix="pipeline")
+# Requests handed to the executor and not finished yet; only the event loop touches it.
+ASYNC_REQUEST_STATE = {"pending": 0}
+
+
+# Returns True when the connection should be closed after this response.
+def run_bridged_request(raw_request: bytes, wfile: AsyncResponseWriter, client_address: tuple[str, int]) -> bool:
+    try:
+        handler = AsyncBridgeHandler(raw_request, wfile, client_address, None)
+    except OSError:
+        return True
+    except Exception:
+        traceback.print_exc()
+        return True
+    return handler.close_connection
+
+
+async def handle_async_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    loop = asyncio.get_running_loop()
+    peer = writer.get_extra_info("peername")
+    client_address = (str(peer[0]), int(peer[1])) if isinstance(peer, tuple) and len(peer) >= 2 else ("", 0)
+    wfile = AsyncResponseWriter(loop, writer)
+    try:
+        while True:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_IDLE_SECONDS)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, OSError):
+                break
+            request_headers = http.client.parse_headers(io.BytesIO(head.split(b"\r\n", 1)[-1]))
+            body = b""
+            length = safe_int_text(request_headers.get("Content-Length", "0") or "0")
+            if length > ASYNC_MAX_REQUEST_BODY_BYTES:
+                break
+            if length > 0:
+                try:
+                    body = await asyncio.wait_for(reader.readexactly(length), KEEPALIVE_IDLE_SECONDS)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, OSError):
+                    break
+            if ASYNC_REQUEST_STATE["pending"] >= ASYNC_PIPELINE_WORKERS + ASYNC_REQUEST_QUEUE_MAX:
+                # Every executor thread is busy and the backlog is full: shed the request from the loop.
+                try:
+                    writer.write(busy_response_bytes())
+                    await writer.drain()
+                except OSError:
+                    pass
+                break
+            ASYNC_REQUEST_STATE["pending"] += 1
+            try:
+                close = await loop.run_in_executor(
+                    ASYNC_PIPELINE_EXECUTOR, run_bridged_request, head + body, wfile, client_address
+                )
+            finally:
+                ASYNC_REQUEST_STATE["pending"] -= 1
+            if close:
+                break
+    finally:
+        writer.close()
+
+
+async def serve_asyncio() -> None:
+    loop = asyncio.get_running_loop()
+    ASYNC_HTTP_CLIENT.start(loop)
+    ASYNC_FETCH_SCHEDULER.start(loop)
+    start_background_jobs()
+    server = await asyncio.start_server(handle_async_connection, HOST, PORT)
+    print(f"LoL tracker running on http://{HOST}:{PORT} (asyncio runtime)")
+    print("Set RIOT_API_KEY before launching to enable live stats.")
+    async with server:
+        await server.serve_forever()
+
+
+def start_background_jobs() -> None:
+    if CACHE_WARMER_ENABLED:
+        CACHE_WARMER.start()
+    if LANE_BENCHMARK_ENABLED:
+        LANE_BENCHMARK_BUILDER.start()
 
 
 def run() -> None:
     os.chdir(BASE_DIR)
-    server = ThreadingHTTPServer((HOST, PORT), LoLTrackerHandler)
+    load_static_assets()
+    load_persisted_static_maps()
+    load_persisted_lane_benchmarks()
+    if SERVER_RUNTIME == "asyncio":
+        asyncio.run(serve_asyncio())
+        return
+    start_background_jobs()
+    server = BoundedThreadingHTTPServer((HOST, PORT), LoLTrackerHandler, HTTP_MAX_CONNECTIONS)
     print(f"LoL tracker running on http://{HOST}:{PORT}")
     print("Set RIOT_API_KEY before launching to enable live stats.")
     server.serve_forever()